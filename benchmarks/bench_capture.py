@@ -0,0 +1,129 @@
+"""Headless end-to-end capture benchmark on synthetic screens."""
+import argparse
+import configparser
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from harness import SCENES, FakeMss, fake_modules
+import engine as engine_module
+from engine import CaptureEngine
+from profiles import BUILTIN_PROFILES
+
+# Lower is better for these, higher for frames/sec
+REGRESSION_METRICS = {"fps": "higher", "cpu_ms_per_frame": "lower", "bytes_per_frame": "lower"}
+BENCH_INTERVAL = 0.001 # Capture interval; with blocking backpressure the pipeline sets the pace
+DETAILS = {"name": "Benchmark", "company": "", "description": "", "ticket_id": "", "ticket_link": ""}
+
+
+def bench_config(args):
+    config = configparser.ConfigParser()
+    config.read_dict({"Capture": {
+        "Format": args.format,
+        "Workers": str(args.workers),
+        "Pool": args.pool,
+        "Backpressure": "block",
+        "OverrunPolicy": "coalesce",
+        "ChangeThreshold": str(args.change_threshold),
+        "FastPath": "yes" if args.fast_path else "no",
+        "Summary": "off",
+        "SearchIndex": "no",
+    }})
+    return config
+
+
+def run_scene(scene, args):
+    sct = FakeMss(scene, (args.width, args.height))
+    sys.modules.update(fake_modules(sct))
+    engine_module.MIN_SS_INTERVAL = BENCH_INTERVAL # The GUI's lower bound would cap the benchmark at 10 frames/sec
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory) # The engine keeps its segments and journal in archives/ under the working directory
+        try:
+            engine = CaptureEngine(bench_config(args))
+            engine.master_save_dir = directory
+            masters = []
+            engine.on_session_end = masters.append
+
+            cpu_start, wall_start = time.process_time(), time.perf_counter()
+            engine.start(DETAILS, BENCH_INTERVAL, args.quality, "Benchmark")
+            while sct.grabs < args.frames and not engine.wait(0.005):
+                pass
+            engine.stop("Benchmark done")
+            engine.wait()
+            wall, cpu = time.perf_counter() - wall_start, time.process_time() - cpu_start
+            if not masters or not masters[0]:
+                raise RuntimeError(f"The {scene} session produced no master archive")
+            stored = os.path.getsize(masters[0])
+        finally:
+            os.chdir(cwd)
+
+    stages = engine.timings.to_dict()
+    master = stages.get("master", {})
+    master_seconds = master.get("mean_ms", 0.0) * master.get("count", 0) / 1000
+    frames = engine.pipeline.submitted
+    return {
+        "scene": scene,
+        "frames": frames,
+        "kept": engine.change_detector.kept,
+        "fps": frames / (wall - master_seconds),
+        "cpu_ms_per_frame": max(0.0, cpu - master_seconds) / frames * 1000,
+        "bytes_per_frame": stored / frames,
+        "stages": stages,
+    }
+
+
+def compare(results, baseline_path, tolerance):
+    """Prints the regressions against a saved run and returns how many there were."""
+    with open(baseline_path) as f:
+        baseline = {result["scene"]: result for result in json.load(f)["results"]}
+    regressions = 0
+    for result in results:
+        before = baseline.get(result["scene"])
+        if not before:
+            continue
+        for metric, better in REGRESSION_METRICS.items():
+            change = (result[metric] - before[metric]) / before[metric] if before[metric] else 0.0
+            if (better == "higher" and change < -tolerance) or (better == "lower" and change > tolerance):
+                regressions += 1
+                print(f"REGRESSION {result['scene']} {metric}: {before[metric]:.2f} -> {result[metric]:.2f} ({change:+.0%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenes", nargs="+", choices=SCENES, default=list(SCENES))
+    parser.add_argument("--frames", type=int, default=120)
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    parser.add_argument("--format", choices=("webp", "tiles", "filmstrip"), default="webp")
+    parser.add_argument("--quality", choices=list(BUILTIN_PROFILES), default="Medium")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--pool", choices=("thread", "process"), default="thread")
+    parser.add_argument("--change-threshold", type=float, default=0.5)
+    parser.add_argument("--no-fast-path", dest="fast_path", action="store_false")
+    parser.add_argument("--json", help="Write the results to this file")
+    parser.add_argument("--compare", help="Results file of an earlier run to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Allowed relative change before a metric counts as regressed")
+    args = parser.parse_args()
+
+    results = [run_scene(scene, args) for scene in args.scenes]
+    print(f"{'scene':<11}{'frames':>7}{'kept':>6}{'fps':>8}{'cpu ms/f':>10}{'bytes/f':>10}  stage means (ms)")
+    for result in results:
+        stages = "  ".join(f"{name} {stats['mean_ms']:.1f}" for name, stats in result["stages"].items())
+        print(f"{result['scene']:<11}{result['frames']:>7}{result['kept']:>6}{result['fps']:>8.1f}"
+              f"{result['cpu_ms_per_frame']:>10.2f}{result['bytes_per_frame']:>10.0f}  {stages}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"settings": {k: v for k, v in vars(args).items() if k not in ("json", "compare")}, "results": results}, f, indent=2)
+    if args.compare and compare(results, args.compare, args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
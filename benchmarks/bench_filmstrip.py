@@ -0,0 +1,82 @@
+"""Storage and CPU cost of filmstrip segments versus one WebP still per frame."""
+import argparse
+import io
+import os
+import sys
+import time
+import zipfile
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from samples import load_session, synthetic_session
+from frames import QUALITY_MAP, encode_webp
+from filmstrip import FilmstripWriter, INCREMENTAL
+
+
+def archive_bytes(entries):
+    """Size of a ZIP_STORED segment archive holding the given (name, data) entries."""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_STORED) as zipf:
+        for name, data in entries:
+            zipf.writestr(name, data)
+    return len(buffer.getvalue())
+
+
+def encode_stills(images, quality, interval):
+    start = datetime(2025, 1, 1)
+    entries = []
+    cpu = time.process_time()
+    for i, img in enumerate(images):
+        timestamp = start + timedelta(seconds=i * interval)
+        entries.append((f"ss_{timestamp.strftime('%Y%m%d_%H%M%S_%f')}.webp", encode_webp(img, quality)))
+    return archive_bytes(entries), time.process_time() - cpu
+
+
+def encode_filmstrip(images, quality, interval, strip_frames):
+    start = datetime(2025, 1, 1)
+    writer = FilmstripWriter(quality, strip_frames)
+    strips = []
+    cpu = time.process_time()
+    for i, img in enumerate(images):
+        strip = writer.add(img, start + timedelta(seconds=i * interval))
+        if strip:
+            strips.append(strip)
+    strips.append(writer.flush(start + timedelta(seconds=len(images) * interval)))
+    cpu = time.process_time() - cpu
+    return archive_bytes((strip.name, strip.data) for strip in strips if strip), cpu
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("archives", nargs="*")
+    parser.add_argument("--interval", type=float, default=5.0, help="Seconds between frames")
+    parser.add_argument("--strip-frames", type=int, default=60)
+    args = parser.parse_args()
+
+    sessions = [(path, load_session(path)) for path in args.archives] or [("synthetic", synthetic_session())]
+    print(f"Filmstrip encoding: {'incremental' if INCREMENTAL else 'buffered per strip'}")
+    print(f"{'session':<32}{'quality':>9}{'frames':>7}{'stills MB/h':>13}{'strip MB/h':>12}{'saving':>8}"
+          f"{'stills ms/f':>13}{'strip ms/f':>12}")
+    for path, segments in sessions:
+        segments = [images for images in segments.values() if images]
+        frames = sum(len(images) for images in segments)
+        if not frames:
+            print(f"{os.path.basename(path):<32} no frames found")
+            continue
+        hours = frames * args.interval / 3600
+        for level, quality in QUALITY_MAP.items():
+            stills = strips = 0
+            stills_cpu = strips_cpu = 0.0
+            for images in segments:
+                size, cpu = encode_stills(images, quality, args.interval)
+                stills, stills_cpu = stills + size, stills_cpu + cpu
+                size, cpu = encode_filmstrip(images, quality, args.interval, args.strip_frames)
+                strips, strips_cpu = strips + size, strips_cpu + cpu
+            print(f"{os.path.basename(path)[:31]:<32}{level:>9}{frames:>7}{stills / hours / 2**20:>13.2f}"
+                  f"{strips / hours / 2**20:>12.2f}{1 - strips / stills:>8.0%}"
+                  f"{stills_cpu / frames * 1000:>13.2f}{strips_cpu / frames * 1000:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
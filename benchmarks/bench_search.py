@@ -0,0 +1,80 @@
+"""Query times of the search index at the scale of years of sessions."""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import search
+from search import SearchIndex
+
+WORDS = ("printer", "driver", "vpn", "outlook", "backup", "firewall", "license", "update", "restart", "password", "share", "dns")
+
+
+def synthetic_scan(n, frames, rng):
+    start = datetime(2023, 1, 1) + timedelta(hours=9 * n)
+    ticket = f"INC-{1000 + n % 500}"
+    timeline = [("Session Start", start, f"Looking at the {rng.choice(WORDS)} issue")]
+    for i in range(1, 4):
+        timeline.append(("Pause" if i % 2 else "Resume", start + timedelta(minutes=10 * i), f"{rng.choice(WORDS)} {rng.choice(WORDS)}"))
+    timeline.append(("Session Stop", start + timedelta(minutes=45), f"Fixed the {rng.choice(WORDS)}"))
+    return {
+        "path": f"/sessions/MASTER_{n:05d}.zip",
+        "signature": (0, 0.0, None),
+        "details": {"name": "Tester", "description": f"{rng.choice(WORDS)} problem", "ticket_id": ticket, "ticket_link": ""},
+        "summary": None,
+        "timeline": timeline,
+        "frames": [(start + timedelta(seconds=5 * i), 0, rng.getrandbits(64)) for i in range(frames)],
+    }
+
+
+def timed(fn, runs):
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = fn()
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times), max(times), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=2000)
+    parser.add_argument("--frames", type=int, default=1000, help="Frames per session")
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--no-numpy", action="store_true", help="Time the pure-Python similar-screen fallback")
+    args = parser.parse_args()
+    if args.no_numpy:
+        search.np = None
+
+    rng = random.Random(1)
+    with tempfile.TemporaryDirectory() as tmp:
+        with SearchIndex(os.path.join(tmp, "search.db")) as index:
+            start = time.perf_counter()
+            for n in range(args.sessions):
+                index.store(synthetic_scan(n, args.frames, rng))
+            build = time.perf_counter() - start
+            print(f"{args.sessions} sessions, {args.sessions * args.frames} frames indexed in {build:.1f}s "
+                  f"({os.path.getsize(index.path) / 1024 / 1024:.1f} MB)")
+
+            print(f"{'query':<22}{'median ms':>10}{'max ms':>8}{'results':>9}")
+            load_ms, _, _ = timed(lambda: index.similar(0), 1)
+            print(f"{'similar (first, load)':<22}{load_ms:>10.1f}{load_ms:>8.1f}")
+            queries = {
+                "text": lambda: index.search(rng.choice(WORDS)),
+                "text, two words": lambda: index.search(f"{rng.choice(WORDS)} {rng.choice(WORDS)}"),
+                "ticket": lambda: index.ticket(f"INC-{rng.randrange(1000, 1500)}"),
+                "similar": lambda: index.similar(rng.getrandbits(64)),
+            }
+            for name, query in queries.items():
+                median, worst, result = timed(query, args.queries)
+                print(f"{name:<22}{median:>10.1f}{worst:>8.1f}{len(result):>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Cold start time of the GUI and CLI entry points."""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+HEAVY_MODULES = ("tkinter", "PIL", "numpy", "mss", "pynput", "dotenv", "google.genai")
+
+# Each snippet prints the heavy modules it loaded; the window is only built if there is a display to build it on
+REPORT = f"import sys; print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+ENTRY_POINTS = {
+    "gui": ("import tkinter as tk, main\n"
+            "try:\n"
+            "    root = tk.Tk()\n"
+            "except tk.TclError:\n"
+            "    root = None\n"
+            "if root:\n"
+            "    main.ScreenshotApp(root); root.update(); root.destroy()\n"
+            + REPORT),
+    "cli control": "import cli\ncli.main(['--port', '1', 'status'])\n" + REPORT,
+    "cli daemon": "import cli, configparser\ncli.CaptureDaemon(configparser.ConfigParser())\n" + REPORT,
+}
+
+
+def run_once(code, cwd, importtime=False):
+    """Wall time of one fresh interpreter running code, its last output line and its stderr."""
+    command = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", code]
+    env = dict(os.environ, PYTHONPATH=SRC_DIR, PYTHONDONTWRITEBYTECODE="1")
+    start = time.perf_counter()
+    result = subprocess.run(command, cwd=cwd, env=env, capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+    lines = result.stdout.strip().splitlines()
+    return elapsed, lines[-1] if lines else "", result.stderr
+
+
+def slowest_imports(stderr, count):
+    """(cumulative ms, module) of the slowest top-level imports in -X importtime output."""
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if cumulative.strip().isdigit() and not name.startswith("  "): # Indented names are nested imports
+            imports.append((int(cumulative) / 1000, name.strip()))
+    return sorted(imports, reverse=True)[:count]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--importtime", action="store_true", help="Also show the slowest imports of each entry point")
+    parser.add_argument("--top", type=int, default=8)
+    args = parser.parse_args()
+
+    # An empty working directory, so no config.ini or archives/ is found or created next to the sources
+    with tempfile.TemporaryDirectory() as cwd:
+        run_once("pass", cwd) # Warm the OS file cache so the first entry point isn't penalized
+        print(f"{'entry point':<13}{'median ms':>10}{'min ms':>8}{'max ms':>8}  heavy modules loaded")
+        for name, code in ENTRY_POINTS.items():
+            times = []
+            for _ in range(args.runs):
+                elapsed, loaded, _ = run_once(code, cwd)
+                times.append(elapsed * 1000)
+            print(f"{name:<13}{statistics.median(times):>10.0f}{min(times):>8.0f}{max(times):>8.0f}  {loaded or '-'}")
+            if args.importtime:
+                _, _, stderr = run_once(code, cwd, importtime=True)
+                for ms, module in slowest_imports(stderr, args.top):
+                    print(f"{'':<13}{ms:>10.1f}  {module}")
+        baseline = [run_once("pass", cwd)[0] * 1000 for _ in range(args.runs)]
+        print(f"{'(python)':<13}{statistics.median(baseline):>10.0f}{min(baseline):>8.0f}{max(baseline):>8.0f}  bare interpreter, for reference")
+
+
+if __name__ == "__main__":
+    main()
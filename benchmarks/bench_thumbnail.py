@@ -0,0 +1,89 @@
+"""Compares the Pillow reference thumbnail path with the NumPy fast path."""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+RESOLUTIONS = {"1080p": (1920, 1080), "1440p": (2560, 1440), "4K": (3840, 2160)}
+PATHS = ("pillow", "numpy", "numpy+smooth")
+
+
+def synthetic_frame(width, height):
+    """A BGRA frame with text-like horizontal structure and some noise, as an mss buffer would be."""
+    import numpy as np
+    rng = np.random.default_rng(1234)
+    # Fill the buffer in place so building it doesn't raise the peak RSS above one frame.
+    raw = bytearray(width * height * 4)
+    frame = np.frombuffer(raw, dtype=np.uint8).reshape(height, width, 4)
+    frame[:] = 235
+    columns = range(40, width - 40, 3)
+    for top in range(0, height - 16, 24):
+        frame[top + 6:top + 16, 40:width - 40:3, :3] = rng.integers(0, 120, size=(10, len(columns), 3), dtype=np.uint8)
+    return raw
+
+
+def peak_rss_kb():
+    try:
+        import resource
+    except ImportError: # Not available on Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def run_case(resolution, path, runs):
+    import frames
+    size = RESOLUTIONS[resolution]
+    raw = synthetic_frame(*size)
+    if path == "pillow":
+        convert = lambda: frames.thumbnail_pillow(raw, size)
+    else:
+        convert = lambda: frames.thumbnail_numpy(raw, size, smooth=path.endswith("smooth"))
+
+    before = peak_rss_kb()
+    convert()
+    after = peak_rss_kb()
+
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        convert()
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return {
+        "resolution": resolution,
+        "path": path,
+        "median_ms": timings[len(timings) // 2] * 1000,
+        "min_ms": timings[0] * 1000,
+        "peak_extra_mb": None if before is None else (after - before) / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--case", nargs=2, metavar=("RESOLUTION", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        print(json.dumps(run_case(args.case[0], args.case[1], args.runs)))
+        return
+
+    print(f"{'frame':<8}{'path':<14}{'median ms':>10}{'min ms':>10}{'peak +MB':>10}")
+    for resolution in RESOLUTIONS:
+        for path in PATHS:
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--runs", str(args.runs), "--case", resolution, path],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            result = json.loads(output)
+            peak = "n/a" if result["peak_extra_mb"] is None else f"{result['peak_extra_mb']:.1f}"
+            print(f"{resolution:<8}{path:<14}{result['median_ms']:>10.1f}{result['min_ms']:>10.1f}{peak:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Storage savings and reconstruction cost of the tile delta format."""
+import argparse
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from samples import load_session, synthetic_session
+from tiles import TileEncoder, decode_sequence
+
+
+def still_bytes(img, quality):
+    buffer = io.BytesIO()
+    img.save(buffer, 'webp', quality=quality)
+    return len(buffer.getvalue())
+
+
+def bench_segment(images, quality, keyframe_interval):
+    stills = sum(still_bytes(img, quality) for img in images)
+
+    encoder = TileEncoder(keyframe_interval)
+    entries = []
+    start = time.perf_counter()
+    for i, img in enumerate(images):
+        suffix, data = encoder.encode(img)
+        entries.append((f"ss_{i:08d}{suffix}", data))
+    encode_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    decoded = [img for _, img in decode_sequence(entries)]
+    decode_time = time.perf_counter() - start
+    exact = all(a.tobytes() == b.tobytes() for a, b in zip(images, decoded))
+
+    return {
+        "frames": len(images),
+        "stills": stills,
+        "tiles": sum(len(data) for _, data in entries),
+        "encode": encode_time,
+        "decode": decode_time,
+        "exact": exact,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("archives", nargs="*")
+    parser.add_argument("--quality", type=int, default=50, help="WebP quality of the stills baseline")
+    parser.add_argument("--keyframe-interval", type=int, default=30)
+    args = parser.parse_args()
+
+    sessions = [(path, load_session(path)) for path in args.archives] or [("synthetic", synthetic_session())]
+    print(f"{'session':<40}{'frames':>7}{'stills KB':>11}{'tiles KB':>10}{'saving':>8}{'enc ms/f':>10}{'dec ms/f':>10}  exact")
+    for path, segments in sessions:
+        totals = {"frames": 0, "stills": 0, "tiles": 0, "encode": 0.0, "decode": 0.0, "exact": True}
+        for images in segments.values():
+            if not images:
+                continue
+            result = bench_segment(images, args.quality, args.keyframe_interval)
+            for key in ("frames", "stills", "tiles", "encode", "decode"):
+                totals[key] += result[key]
+            totals["exact"] = totals["exact"] and result["exact"]
+        if not totals["frames"]:
+            print(f"{os.path.basename(path):<40} no frames found")
+            continue
+        frames = totals["frames"]
+        saving = 1 - totals["tiles"] / totals["stills"]
+        print(f"{os.path.basename(path)[:39]:<40}{frames:>7}{totals['stills'] / 1024:>11.0f}{totals['tiles'] / 1024:>10.0f}"
+              f"{saving:>8.0%}{totals['encode'] / frames * 1000:>10.2f}{totals['decode'] / frames * 1000:>10.2f}  {totals['exact']}")
+
+
+if __name__ == "__main__":
+    main()
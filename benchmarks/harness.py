@@ -0,0 +1,114 @@
+"""Display-free stand-ins for mss and pynput, driven by synthetic screen content."""
+import itertools
+import types
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+SCENES = ("static", "scrolling", "video")
+
+
+def _text_page(width, height, seed):
+    """Grayscale page of text-like lines."""
+    rng = np.random.default_rng(seed)
+    img = Image.new('L', (width, height), 240)
+    draw = ImageDraw.Draw(img)
+    words = ["ticket", "customer", "update", "status", "order", "the", "and", "error", "log", "resolved"]
+    for top in range(8, height - 16, 18):
+        draw.text((24, top), " ".join(rng.choice(words, size=max(4, width // 60))), fill=30)
+    return np.asarray(img)
+
+
+class SceneSource:
+    """Produces the gray levels of the whole virtual desktop for frame n of a scene."""
+    def __init__(self, scene, size, seed=1):
+        if scene not in SCENES:
+            raise ValueError(f"Unknown scene: {scene}")
+        self.scene = scene
+        self.width, self.height = size
+        self._rng = np.random.default_rng(seed)
+        self._desktop = _text_page(self.width, self.height, seed)
+        if scene == "scrolling":
+            self._document = _text_page(self.width, self.height * 4, seed + 1)
+
+    def frame(self, n):
+        if self.scene == "scrolling":
+            top = (n * 54) % (self._document.shape[0] - self.height) # Three lines per frame
+            gray = self._document[top:top + self.height].copy()
+        else:
+            gray = self._desktop.copy()
+        if self.scene == "video":
+            h, w = self.height // 2, self.width // 2
+            top, left = self.height // 4, self.width // 4
+            ys, xs = np.ogrid[:h, :w]
+            gray[top:top + h, left:left + w] = ((xs + ys + n * 7) % 256).astype(np.uint8) ^ self._rng.integers(0, 40, (h, w), dtype=np.uint8)
+        # Clock in the taskbar and a moving cursor, as on any real desktop
+        gray[-16:, -60:] = 90 + (n // 12) % 60
+        y, x = (n * 37) % (self.height - 20), (n * 53) % (self.width - 12)
+        gray[y:y + 16, x:x + 10] = 0
+        return gray
+
+
+def to_bgra(gray):
+    bgra = np.empty(gray.shape + (4,), dtype=np.uint8)
+    bgra[:, :, :3] = gray[:, :, None]
+    bgra[:, :, 3] = 255
+    return bgra
+
+
+class FakeScreenShot:
+    """The parts of mss.ScreenShot the app uses: size and a fresh BGRA buffer in raw."""
+    def __init__(self, bgra):
+        height, width = bgra.shape[:2]
+        self.size = (width, height)
+        self.width, self.height = width, height
+        self.raw = bytearray(bgra.tobytes())
+
+
+class FakeMss:
+    """mss.mss() replacement with monitors laid out side by side."""
+    def __init__(self, scene="static", monitor_size=(1920, 1080), monitors=1, frames=8, seed=1):
+        width, height = monitor_size
+        self.monitors = [{"left": 0, "top": 0, "width": width * monitors, "height": height}]
+        self.monitors += [{"left": i * width, "top": 0, "width": width, "height": height} for i in range(monitors)]
+        source = SceneSource(scene, (width * monitors, height), seed)
+        self._frames = [to_bgra(source.frame(n)) for n in range(frames)]
+        self.grabs = 0
+
+    def __call__(self):
+        return self # Lets an instance stand in for the mss.mss factory
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        pass
+
+    def grab(self, monitor):
+        bgra = self._frames[self.grabs % len(self._frames)]
+        self.grabs += 1
+        left, top = monitor["left"] - self.monitors[0]["left"], monitor["top"] - self.monitors[0]["top"]
+        return FakeScreenShot(bgra[top:top + monitor["height"], left:left + monitor["width"]])
+
+
+class FakeController:
+    """pynput.mouse.Controller replacement whose cursor visits the given positions in turn."""
+    def __init__(self, positions=((10, 10),)):
+        self._positions = itertools.cycle(positions)
+
+    @property
+    def position(self):
+        return next(self._positions)
+
+
+def fake_modules(sct, mouse_positions=((10, 10),)):
+    """{name: module} for sys.modules, so that mss.mss() returns sct and pynput.mouse.Controller() a FakeController."""
+    mss = types.ModuleType("mss")
+    mss.mss = sct
+    pynput = types.ModuleType("pynput")
+    pynput.mouse = types.ModuleType("pynput.mouse")
+    pynput.mouse.Controller = lambda: FakeController(mouse_positions)
+    return {"mss": mss, "pynput": pynput, "pynput.mouse": pynput.mouse}
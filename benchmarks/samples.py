@@ -0,0 +1,71 @@
+"""Sample sessions for the benchmarks: recorded archives or a synthetic desktop."""
+import io
+import os
+import random
+import zipfile
+
+from PIL import Image, ImageDraw
+
+FRAME_SUFFIXES = (".webp",)
+
+
+def _frames_in_zip(zipf):
+    """Yields (segment, name, image) from a segment ZIP or a master ZIP of segment ZIPs."""
+    for info in sorted(zipf.infolist(), key=lambda i: i.filename):
+        if info.filename.endswith(".zip"):
+            with zipfile.ZipFile(io.BytesIO(zipf.read(info))) as segment:
+                for _, name, img in _frames_in_zip(segment):
+                    yield info.filename, name, img
+        elif info.filename.endswith(FRAME_SUFFIXES) and not info.filename.endswith(".key.webp"):
+            with Image.open(io.BytesIO(zipf.read(info))) as img:
+                for n in range(getattr(img, "n_frames", 1)): # Filmstrips hold many frames
+                    img.seek(n)
+                    yield os.path.dirname(info.filename), os.path.basename(info.filename), img.convert('L')
+
+
+def load_session(path):
+    """Returns {segment: [images]} for a master/segment ZIP or a directory of .webp frames."""
+    segments = {}
+    if os.path.isdir(path):
+        for name in sorted(os.listdir(path)):
+            if name.endswith(FRAME_SUFFIXES):
+                with Image.open(os.path.join(path, name)) as img:
+                    segments.setdefault(path, []).append(img.convert('L'))
+    else:
+        with zipfile.ZipFile(path) as zipf:
+            for segment, _, img in _frames_in_zip(zipf):
+                segments.setdefault(segment, []).append(img)
+    return segments
+
+
+def synthetic_session(frames=240, size=(500, 310), seed=7):
+    """A desktop-like sequence: static windows, a ticking clock, a moving cursor and occasional window switches."""
+    rng = random.Random(seed)
+    width, height = size
+
+    def desktop():
+        img = Image.new('L', size, 200)
+        draw = ImageDraw.Draw(img)
+        for _ in range(rng.randint(2, 4)):
+            left, top = rng.randint(0, width // 2), rng.randint(0, height // 2)
+            right, bottom = left + rng.randint(120, width // 2), top + rng.randint(80, height // 2)
+            draw.rectangle((left, top, right, bottom), fill=245, outline=60)
+            for line in range(top + 8, bottom - 8, 9):
+                draw.text((left + 6, line), "".join(rng.choice("abcdefghij klmnop") for _ in range(30)), fill=40)
+        draw.rectangle((0, height - 14, width, height), fill=90)
+        return img
+
+    background = desktop()
+    images = []
+    for i in range(frames):
+        if rng.random() < 0.03:
+            background = desktop()
+        img = background.copy()
+        draw = ImageDraw.Draw(img)
+        draw.text((width - 40, height - 12), f"{9 + i // 720:02d}:{(i // 12) % 60:02d}", fill=255)
+        x, y = rng.randint(0, width - 10), rng.randint(0, height - 24)
+        draw.polygon([(x, y), (x, y + 12), (x + 8, y + 9)], fill=0)
+        if rng.random() < 0.3:
+            draw.text((rng.randint(10, width - 100), rng.randint(10, height - 30)), "typing...", fill=30)
+        images.append(img)
+    return {"synthetic": images}
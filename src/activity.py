@@ -0,0 +1,113 @@
+import math
+import threading
+import time
+from datetime import datetime, timedelta
+
+DEFAULT_IDLE_AFTER = 30.0 # Seconds without input or screen change before the interval backs off
+SPEED_UP = 0.5 # Interval factor per tick while input or screen changes keep coming
+BACK_OFF = 2.0 # Interval factor per tick once idle
+MAX_RATE_LINES = 60 # The readme's rate table merges minutes so it never gets longer than this
+
+
+class AdaptiveRate:
+    """Capture interval that follows user activity, bounded by min_interval and max_interval."""
+    def __init__(self, base, min_interval, max_interval, idle_after=DEFAULT_IDLE_AFTER, clock=time.monotonic):
+        self.min_interval = float(min_interval)
+        self.max_interval = max(float(max_interval), self.min_interval)
+        self.base = min(max(float(base), self.min_interval), self.max_interval)
+        self.idle_after = idle_after
+        self.clock = clock
+        self.interval = self.base
+        self.inputs = 0
+        self._lock = threading.Lock()
+        self._last_activity = clock()
+        self._input_since_tick = False
+        self._minutes = {} # Wall-clock minute -> captured ticks
+
+    def record_input(self):
+        """Called from the input listener threads. Returns True if the pending capture should be brought forward."""
+        with self._lock:
+            self.inputs += 1
+            self._last_activity = self.clock()
+            first = not self._input_since_tick
+            self._input_since_tick = True
+            return first and self.interval > self.base
+
+    def next_interval(self, screen_changed):
+        """Called on the capture thread after every tick; returns the interval until the next one."""
+        now = self.clock()
+        with self._lock:
+            active = self._input_since_tick or screen_changed
+            self._input_since_tick = False
+            if active:
+                self._last_activity = now
+                self.interval = max(self.min_interval, min(self.interval, self.base) * SPEED_UP)
+            elif now - self._last_activity >= self.idle_after:
+                self.interval = min(self.max_interval, max(self.interval, self.base) * BACK_OFF)
+            else:
+                self.interval = self.base
+            minute = datetime.now().replace(second=0, microsecond=0)
+            self._minutes[minute] = self._minutes.get(minute, 0) + 1
+            return self.interval
+
+    def rate_over_time(self):
+        """[(start of period, minutes in the period, captures per minute)], at most MAX_RATE_LINES periods."""
+        if not self._minutes:
+            return []
+        first, last = min(self._minutes), max(self._minutes)
+        total_minutes = int((last - first).total_seconds() // 60) + 1
+        period = max(1, math.ceil(total_minutes / MAX_RATE_LINES))
+        rows = {}
+        for minute, ticks in self._minutes.items():
+            index = int((minute - first).total_seconds() // 60) // period
+            rows[index] = rows.get(index, 0) + ticks
+        return [(first + timedelta(minutes=index * period), period, ticks / period) for index, ticks in sorted(rows.items())]
+
+
+class ActivityListeners:
+    """Mouse and keyboard listeners that report every input event to callback."""
+    def __init__(self, callback):
+        self.callback = callback
+        self._listeners = []
+
+    def _on_event(self, *args):
+        self.callback() # Must not return False, which would stop the pynput listener
+
+    def start(self):
+        from pynput import keyboard, mouse
+        self._listeners = [
+            mouse.Listener(on_move=self._on_event, on_click=self._on_event, on_scroll=self._on_event),
+            keyboard.Listener(on_press=self._on_event),
+        ]
+        for listener in self._listeners:
+            listener.daemon = True
+            listener.start()
+        return self
+
+    def stop(self):
+        for listener in self._listeners:
+            listener.stop()
+        self._listeners = []
+
+
+class Hotkey:
+    """Global keyboard shortcut in pynput's format (e.g. "<ctrl>+<alt>+b") that calls callback whenever it is pressed."""
+    def __init__(self, combination, callback):
+        self.combination = combination
+        self.callback = callback
+        self._listener = None
+
+    def _on_activate(self):
+        self.callback()
+
+    def start(self):
+        from pynput import keyboard
+        self._listener = keyboard.GlobalHotKeys({self.combination: self._on_activate})
+        self._listener.daemon = True
+        self._listener.start()
+        return self
+
+    def stop(self):
+        if self._listener:
+            self._listener.stop()
+            self._listener = None
@@ -0,0 +1,373 @@
+"""Time-indexed frame catalog stored inside flat master archives."""
+import io
+import json
+import shutil
+import struct
+import tempfile
+import threading
+import zipfile
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+from PIL import Image
+
+from tiles import KEYFRAME_SUFFIX, DELTA_SUFFIX, TileDecoder
+from segments import frame_timestamp, FRAME_METADATA_ENTRY, FRAME_PREFIX, FRAME_TIMESTAMP_FORMAT
+from filmstrip import StripReader, is_filmstrip, strip_frames, strip_image, strip_offset
+
+CATALOG_ENTRY = "frames.idx"
+
+KIND_STILL = 0
+KIND_KEYFRAME = 1
+KIND_DELTA = 2
+KIND_FILMSTRIP = 3
+
+_MAGIC = b"CCFI"
+_VERSION = 1
+_HEADER = struct.Struct("<4sHII")
+_RECORD = struct.Struct("<qQIHBBQ")
+_EPOCH = datetime(1970, 1, 1)
+
+FrameRecord = namedtuple("FrameRecord", ["timestamp", "offset", "size", "segment", "monitor", "kind", "hash"])
+
+
+def frame_kind(name):
+    if name.endswith(KEYFRAME_SUFFIX):
+        return KIND_KEYFRAME
+    if name.endswith(DELTA_SUFFIX):
+        return KIND_DELTA
+    if is_filmstrip(name):
+        return KIND_FILMSTRIP
+    return KIND_STILL
+
+
+def _to_micros(dt):
+    return (dt - _EPOCH) // timedelta(microseconds=1)
+
+
+def _from_micros(micros):
+    return _EPOCH + timedelta(microseconds=micros)
+
+
+def decode_frame(source, i):
+    """Decodes frame i of any source with record(i) and read(i), replaying tile deltas from their keyframe."""
+    record = source.record(i)
+    if record.kind == KIND_STILL:
+        img = Image.open(io.BytesIO(source.read(i)))
+        img.load()
+        return img.convert('L')
+    if record.kind == KIND_FILMSTRIP:
+        # Find the strip's first frame; the strips of several monitors interleave, so stop at this monitor's previous strip
+        start = record.timestamp
+        j = i - 1
+        while j >= 0:
+            other = source.record(j)
+            if other.segment != record.segment:
+                break
+            if other.kind == KIND_FILMSTRIP and other.monitor == record.monitor and other.offset != record.offset:
+                break
+            if other.offset == record.offset:
+                start = other.timestamp
+            j -= 1
+        return strip_image(source.read(i), strip_offset(start, record.timestamp))
+
+    # Walk back to the keyframe of this frame's stream (segment + monitor), then replay the deltas.
+    # Stills in between (burst frames) are not part of the stream.
+    same_stream = lambda other: (other.segment == record.segment and other.monitor == record.monitor
+                                 and other.kind in (KIND_KEYFRAME, KIND_DELTA))
+    start = i
+    while True:
+        other = source.record(start)
+        if same_stream(other) and other.kind == KIND_KEYFRAME:
+            break
+        start -= 1
+        if start < 0 or source.record(start).segment != record.segment:
+            raise ValueError(f"Delta frame {i} has no keyframe")
+    decoder = TileDecoder()
+    img = None
+    for j in range(start, i + 1):
+        other = source.record(j)
+        if same_stream(other):
+            suffix = KEYFRAME_SUFFIX if other.kind == KIND_KEYFRAME else DELTA_SUFFIX
+            img = decoder.decode(suffix, source.read(j))
+    return img
+
+
+class CatalogWriter:
+    """Collects frame records while a master archive is assembled."""
+    def __init__(self):
+        self.segments = []
+        self._records = []
+
+    def add_segment(self, name):
+        self.segments.append(name)
+        return len(self.segments) - 1
+
+    def add_frame(self, timestamp, offset, size, segment, monitor=0, kind=KIND_STILL, frame_hash=0):
+        self._records.append((_to_micros(timestamp), offset, size, segment, monitor, kind, frame_hash))
+
+    def to_bytes(self):
+        segment_table = json.dumps(self.segments).encode('utf-8')
+        records = sorted(self._records)
+        parts = [_HEADER.pack(_MAGIC, _VERSION, len(records), len(segment_table)), segment_table]
+        parts.extend(_RECORD.pack(*record) for record in records)
+        return b"".join(parts)
+
+
+def _segment_name(name):
+    """Plain segment name from a catalog's segment (flat), its directory or its ZIP entry (nested)."""
+    name = name.rstrip("/").rsplit("/", 1)[-1]
+    return name[:-4] if name.endswith(".zip") else name
+
+
+def write_stills(out, segment_names, frames, encode, extension=".webp"):
+    """Writes (record, image) frames as encoded stills into segments/<name>/ of out with frames.json and a catalog; returns the manifest's segments."""
+    catalog = CatalogWriter()
+    segments = {} # Source segment index -> manifest entry, catalog index and frame metadata
+    for record, img in frames:
+        if record.segment not in segments:
+            segment_name = _segment_name(segment_names[record.segment])
+            segments[record.segment] = {"entry": {"name": segment_name, "path": f"segments/{segment_name}/", "start": None, "end": None,
+                                                  "frames": 0, "bytes": 0},
+                                        "index": catalog.add_segment(segment_name), "metadata": {}}
+        segment = segments[record.segment]
+        data = encode(img)
+        name = f"{FRAME_PREFIX}{record.timestamp.strftime(FRAME_TIMESTAMP_FORMAT)}_m{record.monitor}{extension}"
+        info = zipfile.ZipInfo(segment["entry"]["path"] + name, date_time=record.timestamp.timetuple()[:6])
+        info.compress_type = zipfile.ZIP_STORED
+        out.writestr(info, data)
+        catalog.add_frame(record.timestamp, info.header_offset + len(info.FileHeader()), len(data), segment["index"],
+                          record.monitor, KIND_STILL, record.hash)
+        segment["metadata"][name] = {"monitor": record.monitor, "hash": f"{record.hash:016x}"}
+        entry = segment["entry"]
+        entry["start"] = entry["start"] or record.timestamp.isoformat()
+        entry["end"] = record.timestamp.isoformat()
+        entry["frames"] += 1
+        entry["bytes"] += len(data)
+    for segment in segments.values():
+        out.writestr(segment["entry"]["path"] + FRAME_METADATA_ENTRY, json.dumps(segment["metadata"]))
+    out.writestr(CATALOG_ENTRY, catalog.to_bytes(), compress_type=zipfile.ZIP_STORED)
+    return [segment["entry"] for segment in segments.values()]
+
+
+class FrameCatalog:
+    """Reads frames of a flat master archive through its frames.idx entry."""
+    def __init__(self, master_path):
+        self.master_path = master_path
+        with zipfile.ZipFile(master_path) as zipf:
+            if CATALOG_ENTRY not in zipf.NameToInfo:
+                raise KeyError(f"{master_path} has no {CATALOG_ENTRY}")
+            self._data = zipf.read(CATALOG_ENTRY)
+        magic, version, self._count, table_len = _HEADER.unpack_from(self._data)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError(f"Unsupported frame catalog in {master_path}")
+        self.segments = json.loads(self._data[_HEADER.size:_HEADER.size + table_len].decode('utf-8'))
+        self._records_start = _HEADER.size + table_len
+        self._file = open(master_path, 'rb')
+        self._lock = threading.Lock()
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self._count
+
+    def _timestamp(self, i):
+        return struct.unpack_from("<q", self._data, self._records_start + i * _RECORD.size)[0]
+
+    def record(self, i):
+        micros, offset, size, segment, monitor, kind, frame_hash = _RECORD.unpack_from(self._data, self._records_start + i * _RECORD.size)
+        return FrameRecord(_from_micros(micros), offset, size, segment, monitor, kind, frame_hash)
+
+    def find(self, dt):
+        """Index of the frame that was on screen at dt (the last one captured at or before it), or None."""
+        target = _to_micros(dt)
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._timestamp(mid) <= target:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo - 1 if lo else None
+
+    def read(self, i):
+        """Raw bytes of one frame, read straight from the master file."""
+        record = self.record(i)
+        with self._lock:
+            self._file.seek(record.offset)
+            return self._file.read(record.size)
+
+    def image(self, i):
+        """Decoded grayscale image of frame i; tile deltas are rebuilt from their keyframe."""
+        return decode_frame(self, i)
+
+    def at(self, dt):
+        """(record, image) of the frame on screen at dt, or None if dt is before the first frame."""
+        i = self.find(dt)
+        if i is None:
+            return None
+        return self.record(i), self.image(i)
+
+
+class ArchiveFrameSource:
+    """Frame source for master archives without a catalog (nested layout or older sessions)."""
+    def __init__(self, master_path):
+        self.master_path = master_path
+        self._zipf = zipfile.ZipFile(master_path)
+        self._lock = threading.Lock()
+        self._inner = [] # (ZipFile, temporary file) of each nested segment
+        self.segments = []
+        self._entries = [] # (record, zip file holding the frame, entry name)
+        try:
+            # Records carry the entry's header offset, so the frames of one filmstrip can be told apart from the next
+            for info in self._zipf.infolist():
+                if info.filename.endswith(".zip"):
+                    inner = self._open_nested(info)
+                    self._add_frames(inner, info.filename, inner.infolist())
+            self._add_frames(self._zipf, None, self._zipf.infolist())
+        except BaseException:
+            self.close()
+            raise
+        self._entries.sort(key=lambda entry: entry[0].timestamp)
+
+    def _open_nested(self, info):
+        tmp = tempfile.TemporaryFile()
+        try:
+            with self._zipf.open(info) as src:
+                shutil.copyfileobj(src, tmp)
+            inner = zipfile.ZipFile(tmp)
+        except BaseException:
+            tmp.close()
+            raise
+        self._inner.append((inner, tmp))
+        return inner
+
+    def _frame_metadata(self, zipf, directory):
+        name = f"{directory}/{FRAME_METADATA_ENTRY}" if directory else FRAME_METADATA_ENTRY
+        if name not in zipf.NameToInfo:
+            return {}
+        metadata = json.loads(zipf.read(name))
+        return {f"{directory}/{entry}" if directory else entry: meta for entry, meta in metadata.items()}
+
+    def _add_frames(self, zipf, segment_name, infos):
+        segment_index = {}
+        metadata = {}
+        for info in infos:
+            dt = frame_timestamp(info.filename)
+            if not dt:
+                continue
+            directory = info.filename.rsplit("/", 1)[0] if "/" in info.filename else ""
+            name = segment_name or directory
+            if name not in segment_index:
+                self.segments.append(name)
+                segment_index[name] = len(self.segments) - 1
+                metadata.update(self._frame_metadata(zipf, directory))
+            kind = frame_kind(info.filename)
+            if kind == KIND_FILMSTRIP:
+                frame_meta = metadata.get(info.filename)
+                frames = strip_frames(info.filename, frame_meta, None if frame_meta else zipf.read(info))
+            else:
+                frames = [(dt, metadata.get(info.filename, {}))]
+            for frame_dt, meta in frames:
+                record = FrameRecord(frame_dt, info.header_offset, info.file_size, segment_index[name],
+                                     meta.get("monitor", 0), kind, int(meta.get("hash", "0"), 16))
+                self._entries.append((record, zipf, info.filename))
+
+    def close(self):
+        for inner, tmp in self._inner:
+            inner.close()
+            tmp.close()
+        self._inner = []
+        self._zipf.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def record(self, i):
+        return self._entries[i][0]
+
+    def find(self, dt):
+        lo, hi = 0, len(self._entries)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._entries[mid][0].timestamp <= dt:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo - 1 if lo else None
+
+    def read(self, i):
+        _, zipf, name = self._entries[i]
+        with self._lock:
+            return zipf.read(name)
+
+    def image(self, i):
+        return decode_frame(self, i)
+
+
+def iter_images(source):
+    """Yields (record, image) of every frame of source in order, decoding each tile stream and filmstrip only once."""
+    decoders = {} # (segment, monitor) -> TileDecoder of that stream
+    strips = {} # (segment, strip offset) -> (StripReader, time of the strip's first frame, monitor)
+    try:
+        for i in range(len(source)):
+            record = source.record(i)
+            if record.kind in (KIND_KEYFRAME, KIND_DELTA):
+                decoder = decoders.setdefault((record.segment, record.monitor), TileDecoder())
+                suffix = KEYFRAME_SUFFIX if record.kind == KIND_KEYFRAME else DELTA_SUFFIX
+                yield record, decoder.decode(suffix, source.read(i))
+            elif record.kind == KIND_FILMSTRIP:
+                key = (record.segment, record.offset)
+                if key not in strips:
+                    for other in [other for other in strips if other[0] == record.segment and strips[other][2] == record.monitor]:
+                        strips.pop(other)[0].close() # This monitor has moved on to its next strip
+                    strips[key] = (StripReader(source.read(i)), record.timestamp, record.monitor)
+                reader, start, _ = strips[key]
+                yield record, reader.at(strip_offset(start, record.timestamp))
+            else:
+                yield record, decode_frame(source, i)
+    finally:
+        for reader, _, _ in strips.values():
+            reader.close()
+
+
+def open_frame_source(master_path):
+    """FrameCatalog for archives with a frames.idx entry, ArchiveFrameSource for the rest."""
+    try:
+        return FrameCatalog(master_path)
+    except KeyError:
+        return ArchiveFrameSource(master_path)
+
+
+def read_timeline(master_path):
+    """Session timeline [(event, datetime, comment)] from manifest.json, or parsed from readme.txt."""
+    with zipfile.ZipFile(master_path) as zipf:
+        names = zipf.NameToInfo
+        if "manifest.json" in names:
+            manifest = json.loads(zipf.read("manifest.json"))
+            return [(e["event"], datetime.fromisoformat(e["time"]), e["comment"]) for e in manifest.get("timeline", [])]
+        if "readme.txt" not in names:
+            return []
+        readme = zipf.read("readme.txt").decode('utf-8', errors='replace')
+    timeline = []
+    for line in readme.split("--- Session Timeline ---", 1)[-1].splitlines():
+        stamp, _, rest = line.partition(" - ")
+        event, _, comment = rest.partition(": ")
+        try:
+            timeline.append((event, datetime.strptime(stamp, '%Y-%m-%d %H:%M:%S'), comment))
+        except ValueError:
+            continue
+    return timeline
@@ -0,0 +1,40 @@
+from PIL import Image, ImageChops, ImageStat
+
+
+def dhash(img):
+    """64-bit difference hash of a grayscale image, for finding similar screens."""
+    small = img.resize((9, 8), Image.Resampling.BILINEAR).tobytes()
+    value = 0
+    for row in range(8):
+        for col in range(8):
+            value = (value << 1) | (small[row * 9 + col] > small[row * 9 + col + 1])
+    return value
+
+
+class ChangeDetector:
+    """Skips frames whose thumbnail barely differs from the last kept frame."""
+    def __init__(self, threshold):
+        self.threshold = threshold
+        self.kept = 0
+        self.skipped = 0
+        self._last = {} # stream -> (last kept image, its name)
+        self._unchanged = {} # kept frame name -> timestamp of the last frame identical to it
+
+    def check(self, img, timestamp, name, stream=0):
+        """Returns True if the frame should be stored under name, False if it is unchanged."""
+        last = self._last.get(stream)
+        if last is not None and self.threshold > 0 and last[0].size == img.size:
+            score = ImageStat.Stat(ImageChops.difference(img, last[0])).mean[0]
+            if score < self.threshold:
+                self.skipped += 1
+                self._unchanged[last[1]] = timestamp
+                return False
+        self.kept += 1
+        self._last[stream] = (img, name)
+        return True
+
+    def start_segment(self):
+        """Returns the "unchanged until" runs of the finished segment and starts a fresh one."""
+        runs, self._unchanged = self._unchanged, {}
+        self._last = {}
+        return runs
@@ -0,0 +1,357 @@
+"""Headless ChronoCapture: records sessions without the GUI, controlled from another terminal."""
+import argparse
+import configparser
+import json
+import os
+import signal
+import socket
+import socketserver
+import sys
+import threading
+import time
+from datetime import datetime
+
+CONFIG_FILE = "config.ini" # Shared with the GUI, which also keeps the user name and company in it
+CONTROL_HOST = "127.0.0.1" # The control socket never listens beyond this machine
+DEFAULT_CONTROL_PORT = 47615 # Overridable with ControlPort in the [Capture] section of config.ini
+CONTROL_TIMEOUT = 120.0 # Pausing and stopping wait for in-flight frames and the segment archive
+SEARCH_INDEX_PATH = os.path.join("archives", "search.db") # The same index the GUI and the daemon add sessions to
+WAIT_SLICE = 0.5 # The main thread wakes this often so signal handlers run promptly
+
+DEFAULT_COMMENTS = {
+    "start": "Starting work",
+    "pause": "Pausing to take note or a break.",
+    "resume": "Continuing work.",
+    "stop": "Pending further action or completed task",
+}
+
+
+class ControlHandler(socketserver.StreamRequestHandler):
+    """One JSON request line in, one JSON reply line out."""
+    def handle(self):
+        try:
+            request = json.loads(self.rfile.readline())
+            reply = self.server.capture_daemon.command(request.get("command"), request.get("comment"))
+        except Exception as e:
+            reply = {"ok": False, "error": str(e)}
+        self.wfile.write((json.dumps(reply) + "\n").encode('utf-8'))
+
+
+class ControlServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = sys.platform != "win32" # On Windows this would let a second daemon bind the same port
+
+    def __init__(self, port, capture_daemon):
+        self.capture_daemon = capture_daemon
+        super().__init__((CONTROL_HOST, port), ControlHandler)
+
+
+class CaptureDaemon:
+    """Runs one capture session and applies control commands to it."""
+    def __init__(self, config):
+        from engine import CaptureEngine # Deferred so that the control commands start instantly
+        self.engine = CaptureEngine(config, on_status=self.on_status, on_session_end=self.on_session_end)
+        self.last_status = ""
+        self.master_zip_filepath = None
+
+    def on_status(self, text):
+        self.last_status = text
+        print(f"{datetime.now().strftime('%H:%M:%S')} {text}", flush=True)
+
+    def on_session_end(self, master_zip_filepath):
+        self.master_zip_filepath = master_zip_filepath
+
+    def command(self, name, comment=None):
+        """Applies pause, resume or stop, or reports the status. Returns the reply for the client."""
+        engine = self.engine
+        if name == "status":
+            return {
+                "ok": True,
+                "state": engine.state,
+                "since": engine.time_log[0][1].isoformat() if engine.time_log else None,
+                "frames": engine.change_detector.kept if engine.change_detector else 0,
+                "status": self.last_status,
+            }
+        if name == "burst":
+            if not engine.burst():
+                return {"ok": False, "state": engine.state, "error": "Bursts are off (Burst in config.ini) or nothing is being recorded"}
+            return {"ok": True, "state": engine.state}
+        actions = {"pause": engine.pause, "resume": engine.resume, "stop": engine.stop}
+        if name not in actions:
+            return {"ok": False, "error": f"Unknown command: {name}"}
+        if not actions[name](comment or DEFAULT_COMMENTS[name]):
+            return {"ok": False, "state": engine.state, "error": f"Cannot {name} while {engine.state}"}
+        return {"ok": True, "state": engine.state}
+
+    def install_signal_handlers(self):
+        handlers = {"SIGINT": "stop", "SIGTERM": "stop", "SIGBREAK": "stop", "SIGUSR1": "pause", "SIGUSR2": "resume"}
+        for signal_name, name in handlers.items():
+            if hasattr(signal, signal_name):
+                signal.signal(getattr(signal, signal_name), lambda signum, frame, name=name: self.command(name, f"{DEFAULT_COMMENTS[name]} (signal)"))
+
+
+def read_config():
+    config = configparser.ConfigParser()
+    config.read(CONFIG_FILE)
+    return config
+
+
+def control_port(config, args):
+    return args.port or config.getint('Capture', 'ControlPort', fallback=DEFAULT_CONTROL_PORT)
+
+
+def run_daemon(args, config):
+    """Recovers unfinished sessions, then records one session until it is stopped. Returns the exit code."""
+    capture_daemon = CaptureDaemon(config)
+    from profiles import load_profiles # Already loaded by the engine
+    try:
+        profiles = load_profiles(config)
+    except ValueError as e:
+        print(f"Invalid encoder profile in {CONFIG_FILE}: {e}", file=sys.stderr)
+        return 2
+    quality = args.quality or capture_daemon.engine.capture_config()['default_profile']
+    if quality not in profiles:
+        print(f"Unknown quality {quality!r}, choose from {', '.join(profiles)}", file=sys.stderr)
+        return 2
+
+    engine = capture_daemon.engine
+    os.makedirs(args.save_dir, exist_ok=True)
+    engine.master_save_dir = args.save_dir
+    try:
+        server = ControlServer(control_port(config, args), capture_daemon)
+    except OSError as e:
+        print(f"Cannot listen on {CONTROL_HOST}:{control_port(config, args)} (is another capture running?): {e}", file=sys.stderr)
+        return 1
+
+    for master_zip_filepath in engine.recover_unfinished_sessions():
+        print(f"Recovered unfinished session: {master_zip_filepath}", flush=True)
+
+    details = {
+        "name": config.get('User', 'Name', fallback='Anonymous'),
+        "company": config.get('User', 'Company', fallback='None'),
+        "description": args.description,
+        "ticket_id": args.ticket_id,
+        "ticket_link": args.ticket_link,
+    }
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    capture_daemon.install_signal_handlers()
+    try:
+        engine.start(details, args.interval, quality, args.comment or DEFAULT_COMMENTS["start"])
+        while not engine.wait(WAIT_SLICE):
+            pass
+        while not engine.wait_for_summaries(WAIT_SLICE): # The master is done; let a pending AI summary finish (it has its own timeout)
+            pass
+    finally:
+        server.shutdown()
+        server.server_close()
+    if capture_daemon.master_zip_filepath:
+        print(f"Master archive: {capture_daemon.master_zip_filepath}", flush=True)
+        return 0
+    return 1
+
+
+def run_compaction(args, config):
+    """Compacts the master archives in the save folder (and archives/) as the retention settings ask. Returns the exit code."""
+    from engine import CaptureEngine, ARCHIVE_DIR
+    from retention import RetentionManager
+    policy = CaptureEngine(config).retention_policy()
+    manager = RetentionManager([args.save_dir, ARCHIVE_DIR], policy, on_status=lambda text: print(text, flush=True))
+    if not args.dry_run:
+        manager.run()
+        return 0
+    for path, tier in manager.plan():
+        print(f"{os.path.basename(path)}: to {tier} (age)")
+    over = manager.over_budget()
+    if over:
+        print(f"{over / 1024 / 1024:.1f} MB over the disk budget; the oldest archives would then be compacted further")
+    return 0
+
+
+def run_calibrate(args, config):
+    """Measures candidate encoder profiles on this machine and stores the chosen one as the default. Returns the exit code."""
+    from profiles import (CALIBRATED_PROFILE, CANDIDATE_SCALES, archive_samples, calibrate, describe, save_profile,
+                          scaled_size, screen_samples)
+    size = scaled_size(max(CANDIDATE_SCALES))
+    try:
+        samples = archive_samples(args.sample_from, args.samples, size) if args.sample_from else screen_samples(args.samples, size)
+    except Exception as e:
+        print(f"Cannot get sample frames ({e}); use --from MASTER.zip on a machine without a screen", file=sys.stderr)
+        return 1
+    if not samples:
+        print("No sample frames", file=sys.stderr)
+        return 1
+    print(f"⏱️ Calibrating on {len(samples)} sample frame(s) at {size[0]}x{size[1]}", flush=True)
+    target_bytes = args.target_kb * 1024
+    best, results = calibrate(samples, target_bytes, args.min_legibility, on_status=lambda text: print(text, flush=True))
+
+    print(f"{'profile':<28}{'CPU ms':>8}{'KB':>8}{'dB':>7}")
+    fitting = sorted((r for r in results if r.bytes <= target_bytes and r.legibility >= args.min_legibility), key=lambda r: r.cpu_ms)
+    for result in fitting[:10] if best in fitting[:10] else fitting[:9] + [best]:
+        mark = " <-" if result is best else ""
+        print(f"{describe(result.profile):<28}{result.cpu_ms:>8.2f}{result.bytes / 1024:>8.1f}{result.legibility:>7.1f}{mark}")
+    if best not in fitting:
+        print(f"⚠️ No profile is within {args.target_kb:g} KB and {args.min_legibility:g} dB; closest: {describe(best.profile)}")
+    if args.dry_run:
+        return 0
+
+    save_profile(config, CALIBRATED_PROFILE, best.profile, CPUms=f"{best.cpu_ms:.2f}", BytesPerFrame=round(best.bytes),
+                 Legibility=f"{best.legibility:.1f}", CalibratedAt=datetime.now().isoformat(timespec='seconds'))
+    if 'Capture' not in config:
+        config['Capture'] = {}
+    config['Capture']['Profile'] = CALIBRATED_PROFILE
+    with open(CONFIG_FILE, 'w') as configfile:
+        config.write(configfile)
+    print(f"✅ Saved [Profile {CALIBRATED_PROFILE}] ({describe(best.profile)}) to {CONFIG_FILE} as the default quality")
+    return 0
+
+
+def run_reencode(args):
+    """Re-encodes the master archives under the save folder to the requested settings. Returns the exit code."""
+    from reencode import BatchReencoder, make_target
+    from profiles import parse_size
+    try:
+        target = make_target(args.format, args.quality, parse_size(args.max_size) if args.max_size else None)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 2
+    reencoder = BatchReencoder(args.save_dir, target, args.workers, on_status=lambda text: print(text, flush=True))
+    if args.dry_run:
+        pending = reencoder.pending()
+        for path in pending:
+            print(os.path.relpath(path, args.save_dir))
+        print(f"{len(pending)} archive(s) to re-encode")
+        return 0
+    try:
+        reencoder.run()
+    except KeyboardInterrupt:
+        return 130
+    return 1 if reencoder.failed else 0
+
+
+def run_index(args):
+    """Brings the search index up to date with the master archives under the save folder. Returns the exit code."""
+    from search import SearchIndex
+    with SearchIndex(args.index) as index:
+        index.update([args.save_dir], args.workers, on_status=lambda text: print(text, flush=True))
+        print(f"{len(index.sessions())} session(s) in {args.index}")
+    return 0
+
+
+def run_search(args):
+    """Prints the sessions or frames matching the query. Returns the exit code."""
+    from search import SearchIndex, frame_hash, image_hash
+    if not (args.text or args.ticket or args.similar):
+        print("Give words to search for, --ticket or --similar", file=sys.stderr)
+        return 2
+    if not os.path.exists(args.index):
+        print(f"No search index at {args.index}; build it with `index --save-dir DIR`", file=sys.stderr)
+        return 1
+    with SearchIndex(args.index) as index:
+        start = time.perf_counter()
+        if args.similar:
+            try:
+                if args.similar.lower().endswith(".zip"):
+                    query_hash = frame_hash(args.similar, datetime.fromisoformat(args.at or ""))
+                else:
+                    query_hash = image_hash(args.similar)
+            except (OSError, ValueError) as e:
+                print(f"Cannot hash {args.similar}: {e} (a master archive needs --at YYYY-MM-DDTHH:MM:SS)", file=sys.stderr)
+                return 2
+            results = index.similar(query_hash, args.distance, args.limit)
+            lines = [f"{hit.distance:>2} bits  {hit.first_seen:%Y-%m-%d %H:%M:%S} - {hit.last_seen:%H:%M:%S}  {hit.frames:>4} frame(s)  {hit.path}"
+                     for hit in results]
+        elif args.ticket:
+            results = index.ticket(args.ticket)
+            lines = [f"{session.start or '?':<26}  {session.ticket_id or '-':<12}  {session.description or '-'}  {session.path}" for session in results]
+        else:
+            results = index.search(" ".join(args.text), args.limit)
+            lines = [f"{hit.field:<14}  {hit.time or '':<26}  {hit.snippet}  {hit.path}" for hit in results]
+        elapsed = time.perf_counter() - start
+    for line in lines:
+        print(line)
+    print(f"{len(results)} result(s) in {elapsed * 1000:.1f} ms")
+    return 0 if results else 1
+
+
+def send_command(port, name, comment=None):
+    """Sends one command to a running daemon and returns its reply."""
+    with socket.create_connection((CONTROL_HOST, port), timeout=CONTROL_TIMEOUT) as conn:
+        conn.sendall((json.dumps({"command": name, "comment": comment}) + "\n").encode('utf-8'))
+        return json.loads(conn.makefile(encoding='utf-8').readline())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, help=f"Control port (default: ControlPort from config.ini, else {DEFAULT_CONTROL_PORT})")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    start = commands.add_parser("start", help="Record a session in the foreground until it is stopped")
+    start.add_argument("--save-dir", required=True, help="Folder for the master archive")
+    start.add_argument("--interval", type=float, default=5.0, help="Seconds between screenshots")
+    start.add_argument("--quality", help="Encoder profile: Low, Medium, High or one from config.ini (default: Profile from config.ini, else Medium)")
+    start.add_argument("--description", default="")
+    start.add_argument("--ticket-id", default="")
+    start.add_argument("--ticket-link", default="")
+    start.add_argument("--comment", help="Comment for the Session Start event")
+    for name in ("pause", "resume", "stop"):
+        command = commands.add_parser(name, help=f"{name.capitalize()} the running session")
+        command.add_argument("--comment", help=f"Comment for the {name} event")
+    commands.add_parser("burst", help="Store the pre-roll and capture at the burst rate for a while")
+    commands.add_parser("status", help="Show the state of the running session")
+    compact = commands.add_parser("compact", help="Apply the retention tiers and disk budget to the master archives")
+    compact.add_argument("--save-dir", required=True, help="Folder holding the master archives")
+    compact.add_argument("--dry-run", action="store_true", help="Only list what would be compacted")
+    calibrate = commands.add_parser("calibrate", help="Pick the cheapest encoder profile for this machine and save it in config.ini")
+    calibrate.add_argument("--samples", type=int, default=5, help="Screen grabs (one per second, of every monitor) or archive frames to measure")
+    calibrate.add_argument("--from", dest="sample_from", help="Take the sample frames from this master archive instead of the screen")
+    calibrate.add_argument("--target-kb", type=float, default=16, help="Most KB per frame")
+    calibrate.add_argument("--min-legibility", type=float, default=27, help="Least legibility score (PSNR in dB, see profiles.py)")
+    calibrate.add_argument("--dry-run", action="store_true", help="Only show the measurements")
+    reencode = commands.add_parser("reencode", help="Re-encode the master archives at new encoder settings")
+    reencode.add_argument("--save-dir", required=True, help="Folder holding the master archives (searched recursively)")
+    reencode.add_argument("--format", default="webp", help="webp, png or jpeg")
+    reencode.add_argument("--quality", type=int, default=50, help="Encoder quality, 0-100")
+    reencode.add_argument("--max-size", help="Shrink frames to fit WIDTHxHEIGHT, e.g. 400x248")
+    reencode.add_argument("--workers", type=int, help="Worker processes (default: one per CPU)")
+    reencode.add_argument("--dry-run", action="store_true", help="Only list the archives that would be re-encoded")
+    index = commands.add_parser("index", help="Add new and changed master archives to the search index")
+    index.add_argument("--save-dir", required=True, help="Folder holding the master archives (searched recursively)")
+    index.add_argument("--workers", type=int, help="Worker processes (default: one per CPU)")
+    search = commands.add_parser("search", help="Search the indexed sessions")
+    search.add_argument("text", nargs="*", help="Words in the session details, comments or AI summary")
+    search.add_argument("--ticket", help="Sessions recorded for or mentioning this ticket")
+    search.add_argument("--similar", help="Sessions that showed a screen like this image, or like a frame of this master archive")
+    search.add_argument("--at", help="With a master archive for --similar: the time of its frame, e.g. 2025-09-03T14:32:00")
+    search.add_argument("--distance", type=int, default=10, help="Most differing hash bits (of 64) for --similar")
+    search.add_argument("--limit", type=int, default=20)
+    for command in (index, search):
+        command.add_argument("--index", default=SEARCH_INDEX_PATH, help="Search index database")
+    args = parser.parse_args(argv)
+
+    if hasattr(sys.stdout, "reconfigure"):
+        sys.stdout.reconfigure(errors="replace") # Status lines carry emoji that some consoles can't print
+    config = read_config()
+    if args.command == "start":
+        return run_daemon(args, config)
+    if args.command == "compact":
+        return run_compaction(args, config)
+    if args.command == "calibrate":
+        return run_calibrate(args, config)
+    if args.command == "reencode":
+        return run_reencode(args)
+    if args.command == "index":
+        return run_index(args)
+    if args.command == "search":
+        return run_search(args)
+
+    try:
+        reply = send_command(control_port(config, args), args.command, getattr(args, "comment", None))
+    except OSError as e:
+        print(f"No capture daemon is running ({e})", file=sys.stderr)
+        return 1
+    print(json.dumps(reply, indent=2))
+    return 0 if reply.get("ok") else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
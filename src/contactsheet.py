@@ -0,0 +1,107 @@
+"""Contact sheets and preview strips of segments, built while they are recorded."""
+import io
+
+from PIL import Image, ImageDraw, ImageFont
+
+CONTACT_PREFIX = "contact_"
+PREVIEW_PREFIX = "preview_"
+SHEET_SUFFIX = ".webp"
+DEFAULT_CELLS = 36
+DEFAULT_PREVIEW_FRAMES = 96
+COLUMNS = 6
+CELL_WIDTH = 160
+PREVIEW_WIDTH = 64
+LABEL_HEIGHT = 12
+HEADER_HEIGHT = 16
+SHEET_QUALITY = 75
+
+
+def is_sheet_entry(name):
+    """Whether a master archive entry is a contact sheet or preview strip."""
+    return "/" not in name and name.startswith((CONTACT_PREFIX, PREVIEW_PREFIX)) and name.endswith(SHEET_SUFFIX)
+
+
+def sheet_names(segment_name, tag=""):
+    """(contact sheet, preview strip) entry names of a segment's stream."""
+    return f"{CONTACT_PREFIX}{segment_name}{tag}{SHEET_SUFFIX}", f"{PREVIEW_PREFIX}{segment_name}{tag}{SHEET_SUFFIX}"
+
+
+class _EvenSample:
+    """At most capacity items, spread evenly over everything offered so far."""
+    def __init__(self, capacity):
+        self.capacity = max(2, capacity)
+        self.items = []
+        self.stride = 1
+        self.offered = 0
+
+    def wants_next(self):
+        return self.offered % self.stride == 0
+
+    def offer(self, make_item):
+        """Keeps make_item() if the next item is due; make_item is only called then."""
+        if self.wants_next():
+            self.items.append(make_item())
+            if len(self.items) > self.capacity:
+                self.items = self.items[::2]
+                self.stride *= 2
+        self.offered += 1
+
+
+def _scaled(img, width):
+    height = max(1, round(img.height * width / img.width))
+    return img.resize((width, height), Image.Resampling.BILINEAR)
+
+
+class SegmentSheet:
+    """Contact sheet and preview strip of one stream of a segment, built as its frames are kept."""
+    def __init__(self, tag="", cells=DEFAULT_CELLS, preview_frames=DEFAULT_PREVIEW_FRAMES):
+        self.tag = tag
+        self.frames = 0
+        self.first = None
+        self.last = None
+        self._cells = _EvenSample(cells)
+        self._preview = _EvenSample(preview_frames)
+
+    def add(self, img, timestamp):
+        """Adds a kept frame's thumbnail. Only the small copies that are due are made."""
+        self._cells.offer(lambda: (timestamp, _scaled(img, CELL_WIDTH)))
+        self._preview.offer(lambda: _scaled(img, PREVIEW_WIDTH))
+        self.frames += 1
+        self.first = self.first or timestamp
+        self.last = timestamp
+
+    def render(self, title):
+        """(contact sheet, preview strip) as WebP bytes, or None if no frame was added."""
+        if not self.frames:
+            return None
+        return self._render_contact(title), self._render_preview()
+
+    def _render_contact(self, title):
+        cells = self._cells.items
+        cell_w, cell_h = CELL_WIDTH, max(img.height for _, img in cells)
+        columns = min(COLUMNS, len(cells))
+        rows = -(-len(cells) // columns)
+        sheet = Image.new('L', (columns * cell_w, HEADER_HEIGHT + rows * (cell_h + LABEL_HEIGHT)), 255)
+        draw = ImageDraw.Draw(sheet)
+        font = ImageFont.load_default()
+        span = f"{self.first:%Y-%m-%d %H:%M:%S} - {self.last:%H:%M:%S}"
+        draw.text((4, 2), f"{title}  {span}  {self.frames} frames", fill=0, font=font)
+        for n, (timestamp, img) in enumerate(cells):
+            left = (n % columns) * cell_w
+            top = HEADER_HEIGHT + (n // columns) * (cell_h + LABEL_HEIGHT)
+            sheet.paste(img, (left, top))
+            draw.text((left + 2, top + cell_h), timestamp.strftime('%H:%M:%S'), fill=0, font=font)
+        return _encode(sheet)
+
+    def _render_preview(self):
+        frames = self._preview.items
+        strip = Image.new('L', (len(frames) * PREVIEW_WIDTH, max(img.height for img in frames)), 0)
+        for n, img in enumerate(frames):
+            strip.paste(img, (n * PREVIEW_WIDTH, 0))
+        return _encode(strip)
+
+
+def _encode(img):
+    buffer = io.BytesIO()
+    img.save(buffer, 'webp', quality=SHEET_QUALITY)
+    return buffer.getvalue()
@@ -0,0 +1,1177 @@
+import os
+import json
+import math
+import zipfile
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+from pipeline import CapturePipeline, Frame
+from segments import SegmentWriter, SegmentArchiver, copy_entry_raw, frame_timestamp, rebuild_segment, FRAME_METADATA_ENTRY
+from journal import SessionJournal, JOURNAL_SUFFIX, read_journal, find_unfinished_journals
+from scheduler import CaptureScheduler
+from activity import AdaptiveRate, ActivityListeners, Hotkey
+from timings import StageTimings, TIMINGS_ENTRY
+from summary import SummaryWorker, make_backend
+
+# Modules that load PIL or NumPy (and mss, pynput, dotenv, google.genai) are imported where they are first
+# needed, so importing the engine (and starting the GUI or the CLI) doesn't pay for them.
+
+# Live totals of the current session, see CaptureEngine.counters()
+CaptureCounters = namedtuple("CaptureCounters", ["frames", "queue", "bytes"])
+
+# --- Default Configuration ---
+DEFAULT_SS_INTERVAL = 5
+MIN_SS_INTERVAL = 0.1
+DEFAULT_QUALITY = "Medium" # Encoder profile used unless Profile in config.ini (or the GUI/CLI) names another
+CONFIG_FILE = "config.ini"
+
+# --- Capture Pipeline Defaults (overridable in the [Capture] section of config.ini) ---
+DEFAULT_WORKERS = 2
+DEFAULT_POOL = "thread" # "thread" or "process"
+DEFAULT_QUEUE_SIZE = 8
+DEFAULT_BACKPRESSURE = "drop-oldest" # "drop-oldest" or "block"
+DEFAULT_OVERRUN_POLICY = "skip" # "skip", "catch-up" or "coalesce" when a capture runs past its next deadline
+DEFAULT_ADAPTIVE = False # Speed up on input/screen activity and back off when idle, within the bounds below
+DEFAULT_MIN_INTERVAL = 1.0
+DEFAULT_MAX_INTERVAL = 60.0
+DEFAULT_IDLE_AFTER = 30.0 # Seconds without input or screen change before backing off
+ADAPTIVE_WAKE_CHECK = 0.25 # How often a long idle wait checks whether input brought the next capture forward
+DEFAULT_BURST = False # Keep a pre-roll of recent frames at the burst rate and store it (and a burst) on the hotkey
+DEFAULT_BURST_HOTKEY = "<ctrl>+<alt>+b" # pynput format; empty for no hotkey (`cli.py burst` still works)
+DEFAULT_BURST_RATE = 4.0 # Frames per second of the pre-roll and of a burst
+DEFAULT_PREROLL_SECONDS = 10.0
+DEFAULT_BURST_SECONDS = 10.0
+DEFAULT_MONITORS = "active" # "active" (the monitor under the cursor) or "all" (every monitor from one grab)
+DEFAULT_MONITOR_LAYOUT = "per-monitor" # With all monitors: "per-monitor" (one frame each) or "composite" (one frame of the desktop)
+DEFAULT_FAST_PATH = True # NumPy grayscale/downscale kernel, falls back to Pillow if NumPy is missing
+DEFAULT_SMOOTH = False
+DEFAULT_CHANGE_THRESHOLD = 0.5 # Mean gray-level difference below which a frame counts as unchanged (0 keeps all)
+DEFAULT_FORMAT = "webp" # "webp" (one still per frame), "tiles" (keyframes plus changed-tile deltas) or "filmstrip" (animated WebP)
+DEFAULT_KEYFRAME_INTERVAL = 30
+DEFAULT_TILE_GRID = "10x10"
+DEFAULT_STRIP_FRAMES = 60 # Frames per animated WebP in the filmstrip format
+DEFAULT_SEGMENT_MINUTES = 10 # Start a new segment after this long, or after SegmentMB of frames (0 turns either off)
+DEFAULT_SEGMENT_MB = 64
+DEFAULT_CONTACT_SHEETS = True # A contact sheet and preview strip per segment, built from the thumbnails as frames are kept
+DEFAULT_CONTACT_CELLS = 36
+DEFAULT_PREVIEW_FRAMES = 96
+DEFAULT_MASTER_LAYOUT = "flat" # "flat" (segment entries copied as-is plus manifest.json) or "nested" (a ZIP of segment ZIPs)
+MANIFEST_VERSION = 1
+DEFAULT_JOURNAL = True # Crash-safe session journal, used to rebuild unfinished sessions on the next start
+DEFAULT_JOURNAL_BATCH = 32 # Frame records per fsync
+DEFAULT_JOURNAL_INTERVAL = 1.0 # Maximum seconds between fsyncs
+DEFAULT_REPLAY_CACHE_MB = 64 # Memory for decoded frames in the replay viewer
+DEFAULT_SUMMARY = "gemini" # AI summary backend: "gemini", "stub" (local, for testing) or "off"
+DEFAULT_SUMMARY_TIMEOUT = 30.0 # Seconds per summary request before it is abandoned
+DEFAULT_SUMMARY_RETRIES = 2
+DEFAULT_RETENTION = False # Compact old master archives by age and disk budget, see retention.py
+DEFAULT_RETENTION_FULL_DAYS = 7 # Keep every frame this long
+DEFAULT_RETENTION_REDUCED_DAYS = 30 # Then one frame per RetentionInterval seconds until this age, then readme/manifest only
+DEFAULT_RETENTION_INTERVAL = 60
+DEFAULT_RETENTION_QUALITY = 30
+DEFAULT_DISK_BUDGET_MB = 0 # 0 is no budget
+DEFAULT_SEARCH_INDEX = True # Add finished sessions to the search index used by `cli.py search`
+
+# --- Folder Setup ---
+ARCHIVE_DIR = "archives" # Created when a session starts or is recovered, not on import
+SUMMARY_CACHE_DIR = os.path.join(ARCHIVE_DIR, "summaries")
+SEARCH_INDEX_PATH = os.path.join(ARCHIVE_DIR, "search.db")
+
+
+def session_durations(time_log):
+    """(total, active, paused) timedeltas of a session timeline."""
+    total_duration = timedelta()
+    active_duration = timedelta()
+    paused_duration = timedelta()
+    last_time = None
+    last_event = None
+
+    if len(time_log) > 1:
+        total_duration = time_log[-1][1] - time_log[0][1]
+
+        for event, dt, _ in time_log:
+            if last_time:
+                delta = dt - last_time
+                if last_event in ("Session Start", "Resume"):
+                    active_duration += delta
+                elif last_event == "Pause":
+                    paused_duration += delta
+            last_time = dt
+            last_event = event
+    return total_duration, active_duration, paused_duration
+
+
+class CaptureEngine:
+    """Capture, segment and archive logic of a session, without any GUI. Callbacks run on whichever thread made the progress."""
+    def __init__(self, config, on_status=None, on_state=None, on_session_end=None, on_counters=None, summary_backend=None):
+        self.config = config
+        self.on_status = on_status or (lambda text: None)
+        self.on_state = on_state or (lambda state: None)
+        self.on_session_end = on_session_end or (lambda master_zip_filepath: None)
+        self.on_counters = on_counters or (lambda counters: None)
+
+        # --- State Variables ---
+        self.state = "stopped" # "stopped", "running", "paused"
+        self._control_lock = threading.RLock() # Serializes start/pause/resume/stop from the GUI, signals and the control socket
+        self.worker_thread = None
+        self.stop_event = threading.Event()
+        self.pause_event = threading.Event()
+        self.time_log = []
+        self.session_archives = []
+        self.session_details = {}
+        self.journal = None
+        self.segment = None
+        self._generation = 0 # Bumped whenever a segment opens or closes, under _segment_lock; frames carry the one they were grabbed in
+        self._segment_lock = threading.Lock()
+        self.archiver = SegmentArchiver(self._archive_and_cleanup) # Closes and names finished segments in the background
+        self.pipeline = None
+        self.change_detector = None
+        self.tile_encoders = {} # Per monitor
+        self.filmstrips = {} # Per frame stream, see _process_frame
+        self.sheets = {} # SegmentSheet per frame stream of the current segment
+        self.monitor_layout = None
+        self.adaptive_rate = None
+        self.scheduler = None
+        self.encoder_profile = None # (name, profiles.EncoderProfile) of the current session
+        self.thumb_size = None # Frame size of the current session's encoder profile
+        self.preroll = None # PrerollBuffer of the current session, if bursts are on
+        self._burst_requested = threading.Event()
+        self._burst_until = 0.0 # time.monotonic() at which the current burst ends
+        self.bursts = 0
+        self.burst_frames = 0
+        self._bytes_archived = 0 # Bytes of the session's finished segments; the current one adds its own, see counters()
+        self.timings = None # Per-stage timing histograms of the current session
+        self.preroll_timings = None # Kept apart, so the pre-roll's grabs don't skew the capture stages
+        self.master_save_dir = None
+        self.current_archive_start_time = None
+        self.summary_backend = summary_backend
+        self.summaries = None # SummaryWorker, created for the first finished master archive
+        self.retention = None # RetentionManager of the last compaction run
+
+    def status(self, text):
+        self.on_status(text)
+
+    def _set_state(self, state):
+        self.state = state
+        self.on_state(state)
+
+    def counters(self):
+        """CaptureCounters of the current session: frames kept (burst frames included), queue depth and bytes written."""
+        detector, pipeline, segment = self.change_detector, self.pipeline, self.segment
+        return CaptureCounters(
+            (detector.kept if detector else 0) + self.burst_frames,
+            pipeline.depth() if pipeline else 0,
+            self._bytes_archived + (segment.bytes_written if segment else 0),
+        )
+
+    def capture_config(self):
+        """Reads the advanced capture settings from the [Capture] section of config.ini."""
+        return {
+            "workers": self.config.getint('Capture', 'Workers', fallback=DEFAULT_WORKERS),
+            "pool": self.config.get('Capture', 'Pool', fallback=DEFAULT_POOL),
+            "queue_size": self.config.getint('Capture', 'QueueSize', fallback=DEFAULT_QUEUE_SIZE),
+            "backpressure": self.config.get('Capture', 'Backpressure', fallback=DEFAULT_BACKPRESSURE),
+            "overrun_policy": self.config.get('Capture', 'OverrunPolicy', fallback=DEFAULT_OVERRUN_POLICY),
+            "adaptive": self.config.getboolean('Capture', 'Adaptive', fallback=DEFAULT_ADAPTIVE),
+            "min_interval": max(MIN_SS_INTERVAL, self.config.getfloat('Capture', 'MinInterval', fallback=DEFAULT_MIN_INTERVAL)),
+            "max_interval": self.config.getfloat('Capture', 'MaxInterval', fallback=DEFAULT_MAX_INTERVAL),
+            "idle_after": self.config.getfloat('Capture', 'IdleAfter', fallback=DEFAULT_IDLE_AFTER),
+            "burst": self.config.getboolean('Capture', 'Burst', fallback=DEFAULT_BURST),
+            "burst_hotkey": self.config.get('Capture', 'BurstHotkey', fallback=DEFAULT_BURST_HOTKEY).strip(),
+            "burst_rate": max(0.1, self.config.getfloat('Capture', 'BurstRate', fallback=DEFAULT_BURST_RATE)),
+            "preroll_seconds": self.config.getfloat('Capture', 'PrerollSeconds', fallback=DEFAULT_PREROLL_SECONDS),
+            "burst_seconds": self.config.getfloat('Capture', 'BurstSeconds', fallback=DEFAULT_BURST_SECONDS),
+            "monitors": self.config.get('Capture', 'Monitors', fallback=DEFAULT_MONITORS),
+            "monitor_layout": self.config.get('Capture', 'MonitorLayout', fallback=DEFAULT_MONITOR_LAYOUT),
+            "fast_path": self.config.getboolean('Capture', 'FastPath', fallback=DEFAULT_FAST_PATH),
+            "smooth": self.config.getboolean('Capture', 'Smooth', fallback=DEFAULT_SMOOTH),
+            "change_threshold": self.config.getfloat('Capture', 'ChangeThreshold', fallback=DEFAULT_CHANGE_THRESHOLD),
+            "format": self.config.get('Capture', 'Format', fallback=DEFAULT_FORMAT),
+            "keyframe_interval": self.config.getint('Capture', 'KeyframeInterval', fallback=DEFAULT_KEYFRAME_INTERVAL),
+            "strip_frames": self.config.getint('Capture', 'StripFrames', fallback=DEFAULT_STRIP_FRAMES),
+            "tile_grid": tuple(int(n) for n in self.config.get('Capture', 'TileGrid', fallback=DEFAULT_TILE_GRID).split('x')),
+            "segment_minutes": self.config.getfloat('Capture', 'SegmentMinutes', fallback=DEFAULT_SEGMENT_MINUTES),
+            "segment_mb": self.config.getfloat('Capture', 'SegmentMB', fallback=DEFAULT_SEGMENT_MB),
+            "contact_sheets": self.config.getboolean('Capture', 'ContactSheets', fallback=DEFAULT_CONTACT_SHEETS),
+            "contact_cells": self.config.getint('Capture', 'ContactCells', fallback=DEFAULT_CONTACT_CELLS),
+            "preview_frames": self.config.getint('Capture', 'PreviewFrames', fallback=DEFAULT_PREVIEW_FRAMES),
+            "master_layout": self.config.get('Capture', 'MasterLayout', fallback=DEFAULT_MASTER_LAYOUT),
+            "journal": self.config.getboolean('Capture', 'Journal', fallback=DEFAULT_JOURNAL),
+            "journal_batch": self.config.getint('Capture', 'JournalBatch', fallback=DEFAULT_JOURNAL_BATCH),
+            "journal_interval": self.config.getfloat('Capture', 'JournalInterval', fallback=DEFAULT_JOURNAL_INTERVAL),
+            "replay_cache_mb": self.config.getint('Capture', 'ReplayCacheMB', fallback=DEFAULT_REPLAY_CACHE_MB),
+            "summary": self.config.get('Capture', 'Summary', fallback=DEFAULT_SUMMARY),
+            "summary_timeout": self.config.getfloat('Capture', 'SummaryTimeout', fallback=DEFAULT_SUMMARY_TIMEOUT),
+            "summary_retries": self.config.getint('Capture', 'SummaryRetries', fallback=DEFAULT_SUMMARY_RETRIES),
+            "retention": self.config.getboolean('Capture', 'Retention', fallback=DEFAULT_RETENTION),
+            "retention_full_days": self.config.getfloat('Capture', 'RetentionFullDays', fallback=DEFAULT_RETENTION_FULL_DAYS),
+            "retention_reduced_days": self.config.getfloat('Capture', 'RetentionReducedDays', fallback=DEFAULT_RETENTION_REDUCED_DAYS),
+            "retention_interval": self.config.getint('Capture', 'RetentionInterval', fallback=DEFAULT_RETENTION_INTERVAL),
+            "retention_quality": self.config.getint('Capture', 'RetentionQuality', fallback=DEFAULT_RETENTION_QUALITY),
+            "disk_budget_mb": self.config.getfloat('Capture', 'DiskBudgetMB', fallback=DEFAULT_DISK_BUDGET_MB),
+            "search_index": self.config.getboolean('Capture', 'SearchIndex', fallback=DEFAULT_SEARCH_INDEX),
+            "default_profile": self.config.get('Capture', 'Profile', fallback=DEFAULT_QUALITY),
+        }
+
+    # --- Session Control ---
+
+    def start(self, details, interval, quality, comment):
+        """Starts a session with details (name, company, description, ticket_id, ticket_link) and encoder profile quality; False if one is running."""
+        from profiles import load_profiles
+        with self._control_lock:
+            if self.state != "stopped":
+                return False
+            if not self.master_save_dir:
+                raise ValueError("No save location selected for the master archive.")
+            profiles = load_profiles(self.config)
+            if quality not in profiles:
+                raise ValueError(f"Unknown quality {quality!r}, choose from {', '.join(profiles)}")
+            os.makedirs(ARCHIVE_DIR, exist_ok=True)
+
+            self._set_state("running")
+            self.status("🚀 Starting capture...")
+            self.stop_event.clear()
+            self.pause_event.set() # Set the event to allow the loop to run
+
+            settings = {
+                "ss_interval": max(MIN_SS_INTERVAL, interval),
+                "profile": profiles[quality],
+                "description": (details.get("description") or "").strip(),
+                **self.capture_config()
+            }
+            self.encoder_profile = (quality, profiles[quality])
+            self.thumb_size = profiles[quality].size
+            self.session_details = dict(details)
+
+            self.time_log = []
+            self.session_archives = []
+            self.bursts = 0
+            self.burst_frames = 0
+            self._bytes_archived = 0
+            self._burst_until = 0.0
+            self._burst_requested.clear()
+            self.timings = StageTimings()
+            self.preroll_timings = StageTimings()
+            self._start_journal(settings)
+            self.current_archive_start_time = self._log_event("Session Start", comment)
+            self._open_segment()
+
+            self.worker_thread = threading.Thread(
+                target=self.capture_loop,
+                args=(settings,),
+                daemon=True
+            )
+            self.worker_thread.start()
+            return True
+
+    def stop(self, comment):
+        """Asks the worker to finish the session; returns False if there is nothing to stop."""
+        with self._control_lock:
+            if self.state == "stopped" or self.stop_event.is_set():
+                return False
+
+            self.status("🛑 Stopping... please wait for final archive.")
+
+            self._log_event("Session Stop", comment)
+            self.stop_event.set()
+            self.pause_event.set() # Ensure paused thread continues to exit
+            # The worker thread drains the pipeline, closes the current segment and builds the master archive.
+            return True
+
+    def pause(self, comment):
+        with self._control_lock:
+            if self.state != "running" or self.stop_event.is_set():
+                return False
+
+            self.pause_event.clear() # Clear the event to pause the loop
+            self.status("🗜️ Archiving before pause...")
+            self._finish_segment(wait=False)
+
+            self._set_state("paused")
+            self._log_event("Pause", comment)
+            self.status("⏸️ Capture paused.")
+            return True
+
+    def resume(self, comment):
+        with self._control_lock:
+            if self.state != "paused" or self.stop_event.is_set():
+                return False
+
+            self._set_state("running")
+            self.current_archive_start_time = self._log_event("Resume", comment)
+            self._open_segment()
+            self.pause_event.set() # Set the event to resume the loop
+            self.status("▶️ Capture resumed.")
+            return True
+
+    def burst(self):
+        """Stores the pre-roll in the current segment and captures at the burst rate for BurstSeconds; False if bursts are off or nothing is recorded."""
+        with self._control_lock:
+            if self.state != "running" or self.stop_event.is_set() or self.preroll is None:
+                return False
+            self._burst_requested.set() # Handled on the pre-roll thread's next tick
+            return True
+
+    def wait(self, timeout=None):
+        """Waits for the worker of the current session to finish. Returns True once it has."""
+        worker = self.worker_thread
+        if worker:
+            worker.join(timeout)
+        return not (worker and worker.is_alive())
+
+    def _log_event(self, event, comment):
+        """Adds an event to the session timeline and journals it. Returns the event time."""
+        dt = datetime.now()
+        self.time_log.append((event, dt, comment))
+        if self.journal:
+            self.journal.append({"type": "event", "event": event, "time": dt.isoformat(), "comment": comment}, sync=True)
+        return dt
+
+    def _start_journal(self, settings):
+        """Opens the crash-safe journal for a new session."""
+        self.journal = None
+        if not settings['journal']:
+            return
+        path = os.path.join(ARCHIVE_DIR, f"session_{datetime.now().strftime('%Y-%m-%d-%H%M%S')}{JOURNAL_SUFFIX}")
+        self.journal = SessionJournal(path, settings['journal_batch'], settings['journal_interval'])
+        self.journal.append({
+            "type": "session_start",
+            "time": datetime.now().isoformat(),
+            "details": self.session_details,
+            "master_save_dir": self.master_save_dir,
+            "master_layout": settings['master_layout'],
+        }, sync=True)
+
+    def _finish_journal(self, master_zip_filepath):
+        """Marks the session as finished. The journal is only kept if the master archive failed."""
+        if not self.journal:
+            return
+        if master_zip_filepath:
+            self.journal.append({"type": "session_end", "master": master_zip_filepath}, sync=True)
+        self.journal.close(remove=bool(master_zip_filepath))
+        self.journal = None
+
+    # --- Capture ---
+
+    def capture_loop(self, settings):
+        """The main worker function that runs in a separate thread."""
+        import mss
+        from changes import ChangeDetector
+        mouse = None
+        if settings['monitors'] != "all":
+            from pynput.mouse import Controller
+            mouse = Controller()
+        self.change_detector = ChangeDetector(settings['change_threshold'])
+        self.pipeline = CapturePipeline(
+            lambda frame: self._process_screenshot(frame, settings),
+            workers=settings['workers'],
+            pool=settings['pool'],
+            max_queue=settings['queue_size'],
+            policy=settings['backpressure'],
+            on_error=lambda e: self.status(f"❌ Error: {e}"),
+        ).start()
+        self.scheduler = CaptureScheduler(settings['ss_interval'], settings['overrun_policy'])
+        self.adaptive_rate = None
+        listeners = self._start_adaptive_rate(settings) if settings['adaptive'] else None
+        preroll_thread = None
+        hotkey = None
+        if settings['burst']:
+            preroll_thread = threading.Thread(target=self.preroll_loop, args=(settings,), daemon=True)
+            preroll_thread.start()
+            hotkey = self._start_burst_hotkey(settings)
+        last_kept = 0
+        with mss.mss() as sct:
+            while not self.stop_event.is_set():
+                # Block here if paused. The event is cleared on pause and set on resume/start.
+                if not self.pause_event.is_set():
+                    self.pause_event.wait()
+                    self.scheduler.reset() # Time spent paused doesn't count as missed ticks
+
+                # If stop was called while paused, exit the loop immediately.
+                if self.stop_event.is_set():
+                    break
+
+                # Sleep until the next deadline on the monotonic grid (the first one is immediate)
+                if not self.scheduler.wait(self.stop_event):
+                    break
+                if not self.pause_event.is_set():
+                    continue # Paused while waiting
+
+                # Take screenshot; conversion and encoding happen on the pipeline workers
+                if settings['monitors'] == "all":
+                    frames = self._grab_all_monitors(sct, settings['monitor_layout'], self.timings)
+                else:
+                    frame = self._grab_frame(sct, self._get_active_monitor(sct, mouse), self.timings)
+                    frames = [frame] if frame else []
+                for frame in frames:
+                    if not self.pipeline.submit(frame):
+                        self.status(f"⚠️ Encoder busy, dropped oldest frame (queue {self.pipeline.depth()}/{self.pipeline.max_queue})")
+
+                if self.adaptive_rate:
+                    # A frame kept since the last tick means the screen changed (known one tick late, as frames are processed asynchronously)
+                    kept = self.change_detector.kept
+                    self.scheduler.set_interval(self.adaptive_rate.next_interval(kept != last_kept))
+                    last_kept = kept
+                self.scheduler.advance()
+                if self._segment_due(settings):
+                    self._rotate_segment()
+
+        # Final cleanup when loop is stopped
+        if listeners:
+            listeners.stop()
+        if hotkey:
+            hotkey.stop()
+        if preroll_thread:
+            preroll_thread.join()
+        self.status("🗜️ Archiving remaining screenshots...")
+        self._finish_segment()
+        self.pipeline.stop()
+        self.archiver.join()
+        self.status("📦 Creating master archive...")
+        master_zip_filepath = self._create_master_archive(settings['description'], settings['master_layout'], self.journal)
+        self._finish_journal(master_zip_filepath)
+        self.start_retention()
+        self.start_indexing()
+        self.status("✅ Capture stopped. Ready to start again.")
+        self.on_session_end(master_zip_filepath)
+        self._set_state("stopped")
+
+    def _start_adaptive_rate(self, settings):
+        """Sets up the activity-adaptive interval. Returns the input listeners, or None if they are unavailable."""
+        self.adaptive_rate = AdaptiveRate(settings['ss_interval'], settings['min_interval'], settings['max_interval'], settings['idle_after'])
+        self.scheduler.set_interval(self.adaptive_rate.interval)
+        self.scheduler.max_sleep = ADAPTIVE_WAKE_CHECK
+        try:
+            return ActivityListeners(self._on_input).start()
+        except Exception as e: # No input hooks on this system; adapt to screen changes only
+            self.status(f"⚠️ Input listeners unavailable, adapting to screen changes only: {e}")
+            return None
+
+    def _start_burst_hotkey(self, settings):
+        """Registers the burst hotkey. Returns the listener, or None if there is no hotkey or no keyboard hook."""
+        if not settings['burst_hotkey']:
+            return None
+        try:
+            return Hotkey(settings['burst_hotkey'], self.burst).start()
+        except Exception as e:
+            self.status(f"⚠️ Burst hotkey unavailable, use `cli.py burst` instead: {e}")
+            return None
+
+    def preroll_loop(self, settings):
+        """Grabs at the burst rate into the pre-roll ring, or straight into the segment during a burst."""
+        import mss
+        mouse = None
+        if settings['monitors'] != "all":
+            from pynput.mouse import Controller
+            mouse = Controller()
+        scheduler = CaptureScheduler(1 / settings['burst_rate'], "skip")
+        with mss.mss() as sct:
+            self.preroll = self._make_preroll(sct, settings)
+            self.status(f"⏺️ Pre-roll: last {settings['preroll_seconds']:g}s at {settings['burst_rate']:g} fps "
+                        f"({self.preroll.nbytes / 1024 / 1024:.1f} MB)")
+            while not self.stop_event.is_set():
+                if not self.pause_event.is_set():
+                    self.pause_event.wait()
+                    scheduler.reset()
+                    continue
+                if not scheduler.wait(self.stop_event):
+                    break
+                if self._burst_requested.is_set():
+                    self._burst_requested.clear()
+                    self._start_burst(settings)
+                if self.pause_event.is_set():
+                    if settings['monitors'] == "all":
+                        frames = self._grab_all_monitors(sct, settings['monitor_layout'], self.preroll_timings)
+                    else:
+                        frame = self._grab_frame(sct, self._get_active_monitor(sct, mouse), self.preroll_timings)
+                        frames = [frame] if frame else []
+                    for frame in frames:
+                        self._preroll_frame(frame, settings)
+                scheduler.advance()
+        self.preroll = None
+
+    def _make_preroll(self, sct, settings):
+        """Ring for PrerollSeconds of frames of every stream, with slots the size of its thumbnails."""
+        from monitors import MonitorLayout
+        from preroll import PrerollBuffer
+        streams = 1
+        slot_size = self.thumb_size
+        if settings['monitors'] == "all":
+            monitor_layout = MonitorLayout(sct.monitors, self.thumb_size)
+            if settings['monitor_layout'] == "composite":
+                slot_size = (max(slot_size[0], monitor_layout.composite_size[0]), max(slot_size[1], monitor_layout.composite_size[1]))
+            else:
+                streams = len(monitor_layout.regions)
+        return PrerollBuffer(math.ceil(settings['preroll_seconds'] * settings['burst_rate']) * streams, slot_size)
+
+    def _preroll_frame(self, frame, settings):
+        try:
+            with self.preroll_timings.time("thumbnail"):
+                img = self._thumbnail(frame, settings, self.preroll_timings)
+            if time.monotonic() < self._burst_until:
+                self._store_burst_frame(img, frame.timestamp, frame.monitor, settings)
+            else:
+                self.preroll.add(img, frame.timestamp, frame.monitor) # A frame too large (the desktop grew) is left out
+        except Exception as e:
+            self.status(f"❌ Error: {e}")
+
+    def _start_burst(self, settings):
+        """Stores the pre-roll of the current segment and starts (or extends) a burst."""
+        self.bursts += 1
+        self._burst_until = time.monotonic() + settings['burst_seconds']
+        stored = sum(self._store_burst_frame(img, timestamp, monitor, settings) for timestamp, monitor, img in self.preroll.drain())
+        self.status(f"⏺️ Burst: stored {stored} pre-roll frames, capturing at {settings['burst_rate']:g} fps for {settings['burst_seconds']:g}s")
+
+    def _store_burst_frame(self, img, timestamp, monitor, settings):
+        """Encodes a pre-roll or burst frame as a still, whatever the format, and adds it to the current segment."""
+        from changes import dhash
+        from profiles import CODECS, encode_frame
+        segment = self.segment
+        if segment is None or timestamp < self.current_archive_start_time:
+            return False
+        tag = f"_m{monitor}" if settings['monitors'] == "all" and settings['monitor_layout'] != "composite" else ""
+        filename = f"ss_{timestamp.strftime('%Y%m%d_%H%M%S_%f')}{tag}{CODECS[settings['profile'].codec]}"
+        data = self.pipeline.offload(encode_frame, img, settings['profile'])
+        if not segment.add_frame(filename, data, timestamp, {"monitor": monitor, "hash": f"{dhash(img):016x}", "burst": True}):
+            return False
+        self.burst_frames += 1
+        return True
+
+    def _on_input(self):
+        """Mouse/keyboard event from a pynput listener thread."""
+        if self.adaptive_rate.record_input():
+            self.scheduler.bring_forward(self.adaptive_rate.min_interval)
+
+    def _get_active_monitor(self, sct, mouse):
+        mouse_pos = mouse.position
+        for monitor in sct.monitors[1:]:
+            if (monitor["left"] <= mouse_pos[0] < monitor["left"] + monitor["width"] and
+                    monitor["top"] <= mouse_pos[1] < monitor["top"] + monitor["height"]):
+                return monitor
+        return sct.monitors[1]
+
+    def _grab_frame(self, sct, monitor, timings):
+        """Grabs the raw screen buffer and timestamps it. Runs on the capture (or pre-roll) thread."""
+        generation = self._generation
+        try:
+            with timings.time("grab"):
+                sct_img = sct.grab(monitor)
+            return Frame(None, datetime.now(), sct_img.size, sct_img.raw, sct.monitors.index(monitor), generation=generation)
+        except Exception as e:
+            self.status(f"❌ Error: {e}")
+            return None
+
+    def _grab_all_monitors(self, sct, layout, timings):
+        """Grabs the whole desktop once and returns one frame per monitor, or one composite frame."""
+        generation = self._generation
+        try:
+            monitor_layout = self._current_monitor_layout(sct)
+            with timings.time("grab"):
+                sct_img = sct.grab(monitor_layout.desktop)
+        except Exception as e:
+            self.monitor_layout = None # Re-read the monitors on the next tick
+            self.status(f"❌ Error: {e}")
+            return []
+        now = datetime.now()
+        if layout == "composite":
+            return [Frame(None, now, sct_img.size, sct_img.raw, 0, generation=generation)]
+        return [Frame(None, now, sct_img.size, sct_img.raw, index, region, generation) for index, region in monitor_layout.regions]
+
+    def _current_monitor_layout(self, sct):
+        """Cached monitor geometry, re-read every few seconds and rebuilt only if the arrangement changed."""
+        from monitors import MonitorLayout, read_monitors
+        if self.monitor_layout is None:
+            self.monitor_layout = MonitorLayout(sct.monitors, self.thumb_size)
+        elif self.monitor_layout.check_due() and not self.monitor_layout.matches(read_monitors()):
+            self.monitor_layout = MonitorLayout(read_monitors(), self.thumb_size)
+            self.status(f"🖥️ Monitor layout changed: {len(self.monitor_layout.regions)} monitor(s)")
+        return self.monitor_layout
+
+    def _thumbnail(self, frame, settings, timings):
+        from frames import composite_thumbnail, crop_raw, to_thumbnail
+        monitor_layout = self.monitor_layout
+        desktop = monitor_layout and (monitor_layout.desktop["width"], monitor_layout.desktop["height"])
+        timer = timings if self.pipeline.pool == "thread" else None # Sub-step timings can't come back from a process
+        if settings['monitors'] == "all" and settings['monitor_layout'] == "composite" and frame.size == desktop:
+            return self.pipeline.offload(composite_thumbnail, frame.raw, frame.size, monitor_layout.placements,
+                                         monitor_layout.composite_size, settings['fast_path'], settings['smooth'], timer)
+        raw, size, region = frame.raw, frame.size, frame.region
+        if region and self.pipeline.pool == "process":
+            raw, size = crop_raw(raw, size, region) # Only this monitor's pixels are sent to the worker process
+            region = None
+        return self.pipeline.offload(to_thumbnail, raw, size, settings['fast_path'], settings['smooth'], self.thumb_size, region, timer)
+
+    def _stream_encoders(self, frame, stream, settings):
+        """Tile encoder and filmstrip writer for a frame, created on first use (None if the format doesn't use them)."""
+        from filmstrip import FilmstripWriter
+        from tiles import TileEncoder
+        if settings['format'] == "tiles" and frame.monitor not in self.tile_encoders:
+            self.tile_encoders[frame.monitor] = TileEncoder(settings['keyframe_interval'], settings['tile_grid'])
+        if settings['format'] == "filmstrip" and stream not in self.filmstrips:
+            tag = f"_m{frame.monitor}" if frame.region else ""
+            profile = settings['profile'] # Filmstrips are always lossy WebP, at the profile's quality and method
+            self.filmstrips[stream] = FilmstripWriter(profile.quality, settings['strip_frames'], method=profile.method, tag=tag)
+        return self.tile_encoders.get(frame.monitor), self.filmstrips.get(stream)
+
+    def _process_screenshot(self, frame, settings):
+        """Converts and encodes a grabbed frame. Runs on a pipeline worker thread."""
+        timings = self.timings
+        timings.add("queue", (datetime.now() - frame.timestamp).total_seconds())
+        with timings.time("frame"):
+            result = self._process_frame(frame, settings, timings)
+        self.on_counters(self.counters())
+        return result
+
+    def _process_frame(self, frame, settings, timings):
+        from changes import dhash
+        from contactsheet import SegmentSheet
+        from filmstrip import FILMSTRIP_SUFFIX
+        from profiles import CODECS, encode_frame
+        try:
+            timestamp = frame.timestamp.strftime('%Y%m%d_%H%M%S_%f')
+            if frame.region:
+                timestamp += f"_m{frame.monitor}" # The monitors of one grab share a capture time
+            with timings.time("thumbnail"):
+                img = self._thumbnail(frame, settings, timings)
+            stream = frame.monitor if frame.region else 0 # Each monitor is its own stream in per-monitor mode
+
+            # Compare against the last kept frame of the stream in capture order; unchanged frames aren't encoded.
+            # Tile deltas and filmstrip frames depend on the previous frame, so they are encoded in order as well.
+            tile_data = None
+            strip = None
+            with self.pipeline.ordered(frame.seq), self._segment_lock:
+                segment = self.segment
+                if segment is None or frame.generation != self._generation:
+                    # Grabbed just before Pause or a rotation closed its segment: it must not become a tile
+                    # keyframe, filmstrip frame or change baseline of the next segment
+                    return None
+                tile_encoder, filmstrip = self._stream_encoders(frame, stream, settings)
+                if tile_encoder:
+                    suffix = tile_encoder.next_suffix(img)
+                else:
+                    suffix = FILMSTRIP_SUFFIX if filmstrip else CODECS[settings['profile'].codec]
+                with timings.time("change"):
+                    changed = self.change_detector.check(img, frame.timestamp, f"ss_{timestamp}{suffix}", stream)
+                if changed and tile_encoder:
+                    with timings.time("encode"):
+                        suffix, tile_data = tile_encoder.encode(img)
+                if changed and filmstrip:
+                    with timings.time("encode"):
+                        strip = filmstrip.add(img, frame.timestamp, {"monitor": frame.monitor, "hash": f"{dhash(img):016x}"})
+                if changed and settings['contact_sheets']:
+                    if stream not in self.sheets:
+                        self.sheets[stream] = SegmentSheet(f"_m{frame.monitor}" if frame.region else "", settings['contact_cells'], settings['preview_frames'])
+                    self.sheets[stream].add(img, frame.timestamp)
+            if not changed:
+                self.status(f"💤 Screen unchanged, skipped frame (queue {self.pipeline.depth() - 1}/{self.pipeline.max_queue})")
+                return None
+
+            if filmstrip:
+                if strip:
+                    with timings.time("write"):
+                        if not self._add_strip(segment, strip):
+                            return None
+                self.status(f"🎞️ Added frame ss_{timestamp} to the filmstrip (queue {self.pipeline.depth() - 1}/{self.pipeline.max_queue})")
+                return f"ss_{timestamp}"
+
+            filename = f"ss_{timestamp}{suffix}"
+            if tile_data is not None:
+                data = tile_data
+            else:
+                with timings.time("encode"):
+                    data = self.pipeline.offload(encode_frame, img, settings['profile'])
+            metadata = {"monitor": frame.monitor, "hash": f"{dhash(img):016x}"}
+            with timings.time("write"):
+                if not segment.add_frame(filename, data, frame.timestamp, metadata):
+                    return None # The segment was closed by Pause/Stop while this frame was in flight
+            self.status(f"📸 Captured {filename} (queue {self.pipeline.depth() - 1}/{self.pipeline.max_queue})")
+            return filename
+        except Exception as e:
+            self.status(f"❌ Error: {e}")
+            return None
+
+    # --- Segments ---
+
+    def _open_segment(self):
+        """Opens the segment archive that captured frames are streamed into."""
+        start = self.current_archive_start_time
+        path = os.path.join(ARCHIVE_DIR, f"{start.strftime('%Y-%m-%d-%H%M%S_%f')}_recording.zip.part")
+        segment = SegmentWriter(path, self.journal)
+        with self._segment_lock:
+            self._generation += 1 # Frames grabbed while no segment was open are dropped, see _process_frame
+            self.segment = segment
+        if self.journal:
+            self.journal.append({"type": "segment_open", "path": path, "time": start.isoformat(), "label": self._segment_label()}, sync=True)
+
+    def _finish_segment(self, wait=True):
+        """Hands the current segment to the archiver, first waiting for the frames in flight if wait. Returns the end time."""
+        if wait and self.pipeline:
+            self.pipeline.join()
+        with self._segment_lock: # Waits for a frame in its ordered step; any later frame of this segment is dropped
+            self._generation += 1
+            segment, self.segment = self.segment, None
+            end_time = datetime.now()
+            unchanged = self.change_detector.start_segment() if self.change_detector else {}
+            self.tile_encoders.clear() # Every segment starts with keyframes
+            filmstrips, self.filmstrips = list(self.filmstrips.values()), {}
+            sheets, self.sheets = list(self.sheets.values()), {}
+            written = self.pipeline.submitted if self.pipeline else 0
+        if self.preroll:
+            self.preroll.clear() # The pre-roll only ever goes into the segment it was recorded in
+        if segment is not None:
+            self._bytes_archived += segment.bytes_written
+            self.archiver.submit(segment, self.current_archive_start_time, end_time, self._segment_label(), unchanged, sheets,
+                                 filmstrips, written)
+        return end_time
+
+    def _segment_due(self, settings):
+        """Whether the current segment has reached SegmentMinutes or SegmentMB."""
+        segment = self.segment
+        if segment is None:
+            return False
+        if settings['segment_minutes'] and datetime.now() - self.current_archive_start_time >= timedelta(minutes=settings['segment_minutes']):
+            return True
+        return bool(settings['segment_mb']) and segment.bytes_written >= settings['segment_mb'] * 1024 * 1024
+
+    def _rotate_segment(self):
+        """Continues the session in a new segment while the archiver finishes the old one. Runs on the capture thread."""
+        with self._control_lock:
+            if self.state != "running" or self.stop_event.is_set() or self.segment is None:
+                return # Paused or stopped in the meantime
+            self.current_archive_start_time = self._finish_segment()
+            self._open_segment()
+
+    def _add_strip(self, segment, strip):
+        """Stores a finished filmstrip in the segment. Returns False if there was nowhere to store it."""
+        if segment is None or strip is None:
+            return False
+        return segment.add_frame(strip.name, strip.data, strip.start, strip.metadata)
+
+    def _segment_label(self):
+        """Filename-safe label taken from the comment of the last Start or Resume event."""
+        last_action_comment = "capture"
+        for event, _, comment in reversed(self.time_log):
+            if event in ("Session Start", "Resume"):
+                last_action_comment = comment.replace(" ", "_").replace("/", "-")
+                break
+
+        # Sanitize comment for filename
+        safe_comment = "".join(c for c in last_action_comment if c.isalnum() or c in ('_','-')).rstrip()
+        return safe_comment[:20]
+
+    def _segment_archive_path(self, start_dt, end_dt, label):
+        """Final name of a segment archive; segments within the same minutes are numbered _2, _3, ..."""
+        ts_format = f"{start_dt.strftime('%Y-%m-%d-%H%M')}-{end_dt.strftime('%H%M')}"
+        path = os.path.join(ARCHIVE_DIR, f"{ts_format}_{label}.zip")
+        n = 2
+        while os.path.exists(path):
+            path = os.path.join(ARCHIVE_DIR, f"{ts_format}_{label}_{n}.zip")
+            n += 1
+        return path
+
+    def _archive_and_cleanup(self, segment, start_dt, end_dt, label, unchanged=None, sheets=(), filmstrips=(), written=None):
+        """Closes a segment archive and gives it its final name. Empty segments are removed. Runs on the archiver thread."""
+        try:
+            archive_start = time.perf_counter()
+            if written and self.pipeline:
+                self.pipeline.join(written) # Frames that got into the segment before it was handed over finish writing
+            for filmstrip in filmstrips:
+                self._add_strip(segment, filmstrip.flush(end_dt)) # The last frame stays on screen until the segment ends
+            zip_filepath = self._segment_archive_path(start_dt, end_dt, label)
+            zip_filename = os.path.basename(zip_filepath)
+            if unchanged:
+                lines = [f"{name} unchanged until {dt.strftime('%Y-%m-%d %H:%M:%S')}" for name, dt in sorted(unchanged.items())]
+                segment.add_text("unchanged.txt", "\n".join(lines))
+            self._add_sheets(segment, os.path.splitext(zip_filename)[0], sheets)
+            segment.close()
+            if not segment.frames:
+                zip_filepath = None
+            # Journaled before the rename, so recovery can finish it from either name
+            if self.journal:
+                self.journal.append({"type": "segment_close", "path": segment.path, "final": zip_filepath}, sync=True)
+            if not zip_filepath:
+                os.remove(segment.path)
+            else:
+                os.replace(segment.path, zip_filepath)
+                self.session_archives.append(zip_filepath)
+            if self.timings:
+                self.timings.add("archive", time.perf_counter() - archive_start)
+            if not zip_filepath:
+                return
+            self.status(f"✅ Archived {segment.frames} frames to {zip_filename}")
+        except Exception as e:
+            self.status(f"❌ Archive Error: {e}")
+
+    def _add_sheets(self, segment, segment_name, sheets):
+        """Renders the segment's contact sheets and preview strips into it. A failure only costs the sheets."""
+        from contactsheet import sheet_names
+        try:
+            for sheet in sheets:
+                rendered = sheet.render(segment_name)
+                if rendered:
+                    for name, data in zip(sheet_names(segment_name, sheet.tag), rendered):
+                        segment.add_image(name, data)
+        except Exception as e:
+            self.status(f"⚠️ Contact sheet failed: {e}")
+
+    # --- Master Archive ---
+
+    def _create_master_archive(self, description, layout=DEFAULT_MASTER_LAYOUT, journal=None, overwrite=True):
+        """Writes the master archive, numbered _2, _3, ... instead of replacing a file unless overwrite, then deletes the session archives."""
+        if not self.time_log:
+            return None
+
+        start_dt = self.time_log[0][1]
+        end_dt = self.time_log[-1][1]
+        ts_format = f"{start_dt.strftime('%Y-%m-%d-%H%M')}-{end_dt.strftime('%H%M')}"
+        safe_desc = "".join(c for c in description if c.isalnum() or c in ('_','-')).rstrip()
+        master_stem = f"MASTER_{safe_desc}_{ts_format}" if safe_desc else f"MASTER_{ts_format}"
+        master_zip_filename = f"{master_stem}.zip"
+        n = 2
+        while not overwrite and os.path.exists(os.path.join(self.master_save_dir, master_zip_filename)):
+            master_zip_filename = f"{master_stem}_{n}.zip"
+            n += 1
+        master_zip_filepath = os.path.join(self.master_save_dir, master_zip_filename)
+        part_path = master_zip_filepath + ".part"
+
+        try:
+            master_start = time.perf_counter()
+            with open(part_path, 'wb') as master_file, zipfile.ZipFile(master_file, 'w', zipfile.ZIP_DEFLATED, compresslevel=9) as master_zipf:
+                # 1. Add readme.txt
+                readme_content = self._generate_readme()
+                master_zipf.writestr("readme.txt", readme_content)
+
+                # 2. Add all session archives
+                if layout == "flat":
+                    self.status("📦 Copying segments into master archive...")
+                    segments = self._copy_segments_flat(master_zipf)
+                    sheets = self._copy_sheets(master_zipf)
+                    master_zipf.writestr("manifest.json", json.dumps(self._build_manifest(description, segments, sheets), indent=2))
+                else:
+                    for archive_path in self.session_archives:
+                        if os.path.exists(archive_path):
+                            master_zipf.write(archive_path, os.path.basename(archive_path))
+                    self._copy_sheets(master_zipf)
+
+                # 3. Add the per-stage timings of the session
+                if self.timings:
+                    self.timings.add("master", time.perf_counter() - master_start)
+                    master_zipf.writestr(TIMINGS_ENTRY, self.timings.to_json(preroll=self.preroll_timings))
+                master_zipf.close()
+                master_file.flush()
+                os.fsync(master_file.fileno())
+            os.replace(part_path, master_zip_filepath)
+
+            # 4. Delete the session archives once the master is complete and journaled
+            if journal:
+                journal.append({"type": "master_written", "master": master_zip_filepath}, sync=True)
+            for archive_path in self.session_archives:
+                if os.path.exists(archive_path):
+                    os.remove(archive_path)
+            self.status(f"📦 Master archive created: {master_zip_filename}")
+            self._request_summary(master_zip_filepath, readme_content)
+            return master_zip_filepath
+        except Exception as e:
+            if os.path.exists(part_path):
+                os.remove(part_path)
+            self.status(f"❌ Master Archive Error: {e}")
+            return None
+
+    def _copy_segments_flat(self, master_zipf):
+        """Copies every segment's entries into segments/<name>/ of the master without recompressing them."""
+        from catalog import CatalogWriter, CATALOG_ENTRY, KIND_FILMSTRIP, frame_kind
+        from contactsheet import is_sheet_entry
+        from filmstrip import is_filmstrip, strip_frames
+        segments = []
+        catalog = CatalogWriter()
+        for archive_path in self.session_archives:
+            if not os.path.exists(archive_path):
+                continue
+            segment_name = os.path.splitext(os.path.basename(archive_path))[0]
+            segment_index = catalog.add_segment(segment_name)
+            prefix = f"segments/{segment_name}/"
+            timestamps = []
+            stored_bytes = 0
+            with zipfile.ZipFile(archive_path) as segment_zipf:
+                metadata = {}
+                if FRAME_METADATA_ENTRY in segment_zipf.NameToInfo:
+                    metadata = json.loads(segment_zipf.read(FRAME_METADATA_ENTRY))
+                for info in segment_zipf.infolist():
+                    if is_sheet_entry(info.filename):
+                        continue # Goes to the top level, see _copy_sheets
+                    data_offset = copy_entry_raw(segment_zipf, info, master_zipf, prefix + info.filename)
+                    stored_bytes += info.compress_size
+                    if is_filmstrip(info.filename):
+                        # One catalog record per frame of the strip, all pointing at the strip's data
+                        frame_meta = metadata.get(info.filename)
+                        data = None if frame_meta else segment_zipf.read(info)
+                        for dt, meta in strip_frames(info.filename, frame_meta, data):
+                            timestamps.append(dt)
+                            catalog.add_frame(dt, data_offset, info.compress_size, segment_index,
+                                              meta.get("monitor", 0), KIND_FILMSTRIP, int(meta.get("hash", "0"), 16))
+                        continue
+                    dt = frame_timestamp(info.filename)
+                    if dt:
+                        timestamps.append(dt)
+                        frame_meta = metadata.get(info.filename, {})
+                        catalog.add_frame(dt, data_offset, info.compress_size, segment_index,
+                                          frame_meta.get("monitor", 0), frame_kind(info.filename),
+                                          int(frame_meta.get("hash", "0"), 16))
+            segments.append({
+                "name": segment_name,
+                "path": prefix,
+                "start": min(timestamps).isoformat() if timestamps else None,
+                "end": max(timestamps).isoformat() if timestamps else None,
+                "frames": len(timestamps),
+                "bytes": stored_bytes,
+            })
+        master_zipf.writestr(CATALOG_ENTRY, catalog.to_bytes(), compress_type=zipfile.ZIP_STORED)
+        return segments
+
+    def _copy_sheets(self, master_zipf):
+        """Copies every segment's contact sheets and preview strips to the top level of the master. Returns their names."""
+        from contactsheet import is_sheet_entry
+        names = []
+        for archive_path in self.session_archives:
+            if not os.path.exists(archive_path):
+                continue
+            with zipfile.ZipFile(archive_path) as segment_zipf:
+                for info in segment_zipf.infolist():
+                    if is_sheet_entry(info.filename):
+                        copy_entry_raw(segment_zipf, info, master_zipf, info.filename)
+                        names.append(info.filename)
+        return names
+
+    def _build_manifest(self, description, segments, sheets=()):
+        """Machine-readable description of a flat master archive."""
+        from catalog import CATALOG_ENTRY
+        return {
+            "version": MANIFEST_VERSION,
+            "layout": "flat",
+            "session": {
+                "name": self.session_details.get('name'),
+                "company": self.session_details.get('company'),
+                "description": description,
+                "ticket_id": self.session_details.get('ticket_id'),
+                "ticket_link": self.session_details.get('ticket_link'),
+                "start": self.time_log[0][1].isoformat(),
+                "end": self.time_log[-1][1].isoformat(),
+                "frames": sum(segment["frames"] for segment in segments),
+            },
+            "index": CATALOG_ENTRY,
+            "timeline": [{"event": event, "time": dt.isoformat(), "comment": comment} for event, dt, comment in self.time_log],
+            "segments": segments,
+            "sheets": list(sheets),
+        }
+
+    # --- Recovery ---
+
+    def recover_unfinished_sessions(self):
+        """Rebuilds the archives of sessions that a crash or power loss left unfinished and returns the master archive paths."""
+        recovered = []
+        with self._control_lock:
+            if self.state != "stopped":
+                return recovered
+            for journal_path in find_unfinished_journals(ARCHIVE_DIR):
+                self.status(f"🩹 Recovering unfinished session from {os.path.basename(journal_path)}...")
+                try:
+                    master_zip_filepath = self._recover_session(journal_path)
+                except Exception as e:
+                    self.status(f"❌ Recovery Error: {e}")
+                    continue
+                if master_zip_filepath:
+                    self.status(f"🩹 Recovered session: {os.path.basename(master_zip_filepath)}")
+                    recovered.append(master_zip_filepath)
+        self.start_retention()
+        self.start_indexing()
+        return recovered
+
+    def _recover_session(self, journal_path):
+        """Rebuilds one session from its journal without re-reading its frames."""
+        records = read_journal(journal_path)
+        start = records[0]
+        segments = {} # .zip.part path -> open record, journaled frames and final path
+        for record in records:
+            if record["type"] == "segment_open":
+                segments[record["path"]] = {"open": record, "frames": [], "final": None}
+            elif record["type"] == "frame" and record["segment"] in segments:
+                segments[record["segment"]]["frames"].append(record)
+            elif record["type"] == "segment_close" and record["path"] in segments:
+                segments[record["path"]]["final"] = record["final"]
+
+        written = [r["master"] for r in records if r["type"] == "master_written" and os.path.exists(r["master"])]
+        if written:
+            # The master was complete; the crash only interrupted deleting its segments
+            for part_path, segment in segments.items():
+                for path in (segment["final"], part_path):
+                    if path and os.path.exists(path):
+                        os.remove(path)
+            os.remove(journal_path)
+            return written[-1]
+
+        archives = []
+        for part_path, segment in segments.items():
+            if segment["final"]:
+                if os.path.exists(part_path) and not os.path.exists(segment["final"]):
+                    os.replace(part_path, segment["final"]) # Closed, but not yet renamed
+                if os.path.exists(segment["final"]):
+                    archives.append(segment["final"])
+                continue
+            if not os.path.exists(part_path):
+                continue
+            if not segment["frames"] or not rebuild_segment(part_path, segment["frames"]):
+                os.remove(part_path)
+                continue
+            start_dt = datetime.fromisoformat(segment["open"]["time"])
+            end_dt = datetime.fromisoformat(segment["frames"][-1]["time"])
+            final_path = self._segment_archive_path(start_dt, end_dt, segment["open"]["label"])
+            os.replace(part_path, final_path)
+            archives.append(final_path)
+
+        time_log = [(r["event"], datetime.fromisoformat(r["time"]), r["comment"]) for r in records if r["type"] == "event"]
+        if not time_log:
+            return None
+        if time_log[-1][0] != "Session Stop":
+            last_seen = max(datetime.fromisoformat(r["time"]) for r in records if "time" in r)
+            time_log.append(("Session Stop", last_seen, "Recovered after an unexpected shutdown"))
+
+        saved_state = (self.time_log, self.session_archives, self.session_details, self.master_save_dir)
+        try:
+            self.time_log = time_log
+            self.session_archives = archives
+            self.session_details = start["details"]
+            self.master_save_dir = start["master_save_dir"] if os.path.isdir(start["master_save_dir"] or "") else ARCHIVE_DIR
+            journal = SessionJournal(journal_path)
+            try:
+                master_zip_filepath = self._create_master_archive(start["details"].get("description", "").strip(), start["master_layout"],
+                                                                  journal, overwrite=False)
+            finally:
+                journal.close()
+        finally:
+            self.time_log, self.session_archives, self.session_details, self.master_save_dir = saved_state
+        if master_zip_filepath:
+            os.remove(journal_path)
+        return master_zip_filepath
+
+    # --- Retention ---
+
+    def retention_policy(self):
+        from retention import RetentionPolicy
+        settings = self.capture_config()
+        return RetentionPolicy(settings['retention_full_days'], settings['retention_reduced_days'], settings['retention_interval'],
+                               settings['retention_quality'], settings['disk_budget_mb'])
+
+    def start_retention(self):
+        """Compacts old master archives on a background thread, if retention is on and no compaction is running."""
+        from retention import RetentionManager, prune_files
+        settings = self.capture_config()
+        if not settings['retention'] or (self.retention and not self.retention.join(0)):
+            return
+        prune_files(SUMMARY_CACHE_DIR, settings['retention_reduced_days'])
+        self.retention = RetentionManager([self.master_save_dir, ARCHIVE_DIR], self.retention_policy(), self.status)
+        self.retention.start()
+
+    # --- Search Index ---
+
+    def start_indexing(self):
+        """Brings the search index up to date with the save folder on a background thread, if indexing is on."""
+        if not self.capture_config()['search_index'] or not self.master_save_dir:
+            return
+        threading.Thread(target=self._update_search_index, args=(self.master_save_dir,), daemon=True).start()
+
+    def _update_search_index(self, directory):
+        from search import SearchIndex
+        try:
+            with SearchIndex(SEARCH_INDEX_PATH) as index:
+                index.update([directory], workers=1) # One archive per session; older ones only on the first run
+        except Exception as e:
+            self.status(f"⚠️ Search Index Error: {e}")
+
+    # --- Readme ---
+
+    def _request_summary(self, master_zip_filepath, readme_content):
+        """Queues the AI summary of a finished master archive; it is saved next to the archive when it arrives."""
+        if self.summaries is None:
+            settings = self.capture_config()
+            backend = self.summary_backend
+            if backend is None:
+                try:
+                    backend = make_backend(settings['summary'], settings['summary_timeout'])
+                except ValueError as e:
+                    self.status(f"⚠️ AI Summary skipped: {e}")
+                    return
+            if backend is None:
+                return # Summaries are off
+            self.summaries = SummaryWorker(backend, SUMMARY_CACHE_DIR, settings['summary_timeout'], settings['summary_retries'], self.status)
+        self.summaries.submit(master_zip_filepath, readme_content)
+
+    def wait_for_summaries(self, timeout=None):
+        """Waits for queued AI summaries. Returns False if some are still pending after timeout."""
+        return self.summaries is None or self.summaries.join(timeout)
+
+    def _generate_readme(self):
+        from profiles import describe
+        # --- Calculate Durations ---
+        total_duration, active_duration, paused_duration = session_durations(self.time_log)
+
+        def format_timedelta(td):
+            """Formats a timedelta into a human-readable string."""
+            total_seconds = int(td.total_seconds())
+            hours, remainder = divmod(total_seconds, 3600)
+            minutes, seconds = divmod(remainder, 60)
+            return f"{hours}h {minutes}m {seconds}s"
+
+        # --- Build Readme Content ---
+        session_details = [
+            f"Support Name: {self.session_details.get('name')}",
+            f"The company the support is working under: {self.session_details.get('company')}",
+            f"Description: {self.session_details.get('description') or 'N/A'}",
+            f"Support Ticket ID: {self.session_details.get('ticket_id') or 'N/A'}",
+            f"Support Ticket Link: {self.session_details.get('ticket_link') or 'N/A'}",
+            "\n--- Session Summary ---",
+            f"Total Duration:       {format_timedelta(total_duration)}",
+            f"Active Capture Time:  {format_timedelta(active_duration)}",
+            f"Paused Time:          {format_timedelta(paused_duration)}",
+        ]
+        if self.change_detector:
+            session_details += [
+                f"Frames Kept:          {self.change_detector.kept}",
+                f"Frames Skipped:       {self.change_detector.skipped} (screen unchanged)",
+            ]
+        if self.bursts:
+            session_details.append(f"Burst Frames:         {self.burst_frames} ({self.bursts} bursts, pre-roll included)")
+        if self.scheduler:
+            jitter_mean, jitter_sd, jitter_max = self.scheduler.jitter_stats()
+            if self.adaptive_rate:
+                rate = self.adaptive_rate
+                interval = f"adaptive {rate.min_interval:g}-{rate.max_interval:g}s, base {rate.base:g}s"
+            else:
+                interval = f"{self.scheduler.interval:g}s"
+            session_details += [
+                "\n--- Capture Timing ---",
+                f"Interval:             {interval} (overrun policy: {self.scheduler.policy})",
+                f"Ticks Captured:       {self.scheduler.ticks}",
+                f"Missed Ticks:         {self.scheduler.missed} ({self.scheduler.overruns} overruns)",
+                f"Coverage:             {self.scheduler.coverage():.2%}",
+                f"Jitter (mean/sd/max): {jitter_mean * 1000:.1f} / {jitter_sd * 1000:.1f} / {jitter_max * 1000:.1f} ms",
+            ]
+            if self.pipeline:
+                session_details.append(f"Frames Dropped:       {self.pipeline.dropped} (encoder backlog)")
+            if self.encoder_profile:
+                session_details.append(f"Encoder Profile:      {self.encoder_profile[0]} ({describe(self.encoder_profile[1])})")
+        if self.adaptive_rate:
+            session_details += [
+                "\n--- Capture Rate ---",
+                f"Input Events:         {self.adaptive_rate.inputs}",
+            ]
+            for start, minutes, per_minute in self.adaptive_rate.rate_over_time():
+                period = start.strftime('%H:%M') + (f" (+{minutes} min)" if minutes > 1 else "")
+                session_details.append(f"{period:<22}{per_minute:.1f} captures/min")
+        session_details += [
+            "\n--- Session Timeline ---\n"
+        ]
+        for event, dt, comment in self.time_log:
+            session_details.append(f"{dt.strftime('%Y-%m-%d %H:%M:%S')} - {event}: {comment}")
+
+        return "\n".join(session_details)
@@ -0,0 +1,147 @@
+"""Animated-WebP "filmstrip" segment format."""
+import io
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+from PIL import Image
+
+from segments import frame_timestamp
+
+try:
+    from PIL import _webp
+except ImportError: # Pillow built without WebP; saving fails with a clear error later
+    _webp = None
+
+FILMSTRIP_SUFFIX = ".film.webp"
+DEFAULT_STRIP_FRAMES = 60
+LAST_FRAME_MS = 1000 # Display time of a strip's last frame when its end time is unknown
+
+# Incremental encoding needs Pillow's WebPAnimEncoder with the image-capsule API (Pillow 11+);
+# older Pillows buffer the strip's frames and encode them when it is full.
+INCREMENTAL = _webp is not None and hasattr(_webp, "WebPAnimEncoder") and hasattr(Image.Image, "getim")
+
+Strip = namedtuple("Strip", ["name", "data", "start", "metadata"])
+
+
+def is_filmstrip(name):
+    return name.endswith(FILMSTRIP_SUFFIX)
+
+
+class FilmstripWriter:
+    """Builds the filmstrips of one segment, frame by frame."""
+    def __init__(self, quality, max_frames=DEFAULT_STRIP_FRAMES, method=4, tag=""): # method 4 is what Pillow uses for stills
+        self.quality = quality
+        self.tag = tag # Added to strip names after the timestamp, e.g. "_m2" for one monitor's strips
+        self.max_frames = max(1, int(max_frames))
+        self.method = method
+        self._reset()
+
+    def _reset(self):
+        self._encoder = None
+        self._images = [] # Only used without incremental encoding
+        self._start = None
+        self._size = None
+        self._frames = []
+        self._starts = [] # Frame start times in milliseconds from the first frame
+
+    def add(self, img, timestamp, metadata=None):
+        """Appends a frame. Returns the previous strip as a Strip once it is complete, else None."""
+        finished = None
+        if self._frames and (len(self._frames) >= self.max_frames or img.size != self._size):
+            finished = self.flush(timestamp)
+        if not self._frames:
+            self._start, self._size = timestamp, img.size
+            if INCREMENTAL:
+                self._encoder = _webp.WebPAnimEncoder(img.size, 0, 0, False, 3, 5, False, False)
+
+        frame = {"time": timestamp.isoformat()}
+        frame.update(metadata or {})
+        start_ms = max(self._starts[-1] + 1 if self._starts else 0, self._millis(timestamp))
+        if self._encoder:
+            self._encoder.add(img.convert('RGB').getim(), start_ms, False, self.quality, 100, self.method)
+        else:
+            self._images.append(img)
+        self._frames.append(frame)
+        self._starts.append(start_ms)
+        return finished
+
+    def _millis(self, timestamp):
+        return round((timestamp - self._start) / timedelta(milliseconds=1))
+
+    def flush(self, end_time=None):
+        """Finishes the current strip, its last frame shown until end_time. Returns a Strip or None."""
+        if not self._frames:
+            return None
+        starts = self._starts
+        end_ms = self._millis(end_time) if end_time else None
+        if end_ms is None or end_ms <= starts[-1]:
+            end_ms = starts[-1] + LAST_FRAME_MS
+
+        if self._encoder:
+            self._encoder.add(None, end_ms, False, self.quality, 100, 0)
+            data = self._encoder.assemble("", "", "")
+        else:
+            durations = [b - a for a, b in zip(starts, starts[1:] + [end_ms])]
+            buffer = io.BytesIO()
+            self._images[0].save(buffer, 'webp', save_all=True, append_images=self._images[1:],
+                                 duration=durations, quality=self.quality, method=self.method)
+            data = buffer.getvalue()
+        if data is None:
+            raise OSError("WebP animation encoder returned no data")
+
+        strip = Strip(f"ss_{self._start.strftime('%Y%m%d_%H%M%S_%f')}{self.tag}{FILMSTRIP_SUFFIX}", data, self._start,
+                      {"frames": self._frames})
+        self._reset()
+        return strip
+
+
+def strip_frames(name, metadata=None, data=None):
+    """[(capture time, frame metadata)] of a strip, from its frames.json metadata or else its frame timestamps."""
+    if metadata and "frames" in metadata:
+        return [(datetime.fromisoformat(frame["time"]), frame) for frame in metadata["frames"]]
+    start = frame_timestamp(name)
+    if start is None or data is None:
+        return []
+    frames = []
+    with Image.open(io.BytesIO(data)) as img:
+        for n in range(img.n_frames):
+            img.seek(n)
+            img.load()
+            frames.append((start + timedelta(milliseconds=img.info.get("timestamp", 0)), {}))
+    return frames
+
+
+def strip_offset(start, timestamp):
+    """Milliseconds from a strip's first frame to a frame captured at timestamp, as the writer rounds them."""
+    return round((timestamp - start) / timedelta(milliseconds=1))
+
+
+class StripReader:
+    """Reads the frames of one strip forward in time."""
+    def __init__(self, data):
+        self._img = Image.open(io.BytesIO(data))
+        self._next = 0
+        self._current = None
+
+    def at(self, ms):
+        """Grayscale image on screen ms after the strip's start. Each call must be at or after the previous one."""
+        while self._next < self._img.n_frames:
+            self._img.seek(self._next)
+            self._img.load()
+            if self._current is not None and self._img.info.get("timestamp", 0) > ms:
+                break
+            self._current = self._img.convert('L')
+            self._next += 1
+        return self._current
+
+    def close(self):
+        self._img.close()
+
+
+def strip_image(data, ms):
+    """Grayscale image of a strip ms after its start."""
+    reader = StripReader(data)
+    try:
+        return reader.at(ms)
+    finally:
+        reader.close()
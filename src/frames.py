@@ -0,0 +1,108 @@
+import io
+from contextlib import nullcontext
+
+from PIL import Image
+
+try:
+    import numpy as np
+except ImportError: # NumPy is optional; the Pillow path is always available
+    np = None
+
+THUMBNAIL_SIZE = (500, 310)
+QUALITY_MAP = {"Low": 30, "Medium": 50, "High": 85} # WebP quality of each GUI quality level
+
+# ITU-R 601-2 luma weights (per mille), the same ones Pillow uses for convert('L'), in BGR order
+LUMA_WEIGHTS_BGR = (114, 587, 299)
+
+
+def _timed(timer, stage):
+    return timer.time(stage) if timer else nullcontext()
+
+
+def thumbnail_pillow(raw, size, thumb_size=THUMBNAIL_SIZE, region=None, timer=None):
+    """Reference path: full-frame RGB copy, grayscale conversion, then a LANCZOS resize, each step timed in timer."""
+    with _timed(timer, "frombytes"):
+        img = Image.frombytes("RGB", size, raw, "raw", "BGRX")
+        if region:
+            left, top, width, height = region
+            img = img.crop((left, top, left + width, top + height))
+    with _timed(timer, "grayscale"):
+        img = img.convert('L')
+    with _timed(timer, "resize"):
+        return img.resize(thumb_size, Image.Resampling.LANCZOS)
+
+
+def thumbnail_numpy(raw, size, thumb_size=THUMBNAIL_SIZE, smooth=False, region=None):
+    """Fast path: area-averages the BGRA buffer (or its region) in place and computes luma on the reduced data."""
+    width, height = size
+    thumb_w, thumb_h = thumb_size
+    pixels = np.frombuffer(raw, dtype=np.uint8).reshape(height, width * 4)
+    if region:
+        left, top, width, height = region
+        pixels = pixels[top:top + height, left * 4:(left + width) * 4]
+
+    row_edges = ((np.arange(thumb_h + 1) * height) // thumb_h).tolist()
+    col_edges = (np.arange(thumb_w) * width) // thumb_w
+    row_counts = np.diff(row_edges).astype(np.uint64)
+    col_counts = np.diff(np.append(col_edges, width)).astype(np.uint64)
+
+    # Sum each band of rows. A per-band loop over contiguous rows is far faster
+    # than np.add.reduceat along axis 0 on a frame this size. uint16 holds bands of up to 257 rows.
+    band_dtype = np.uint16 if max(row_counts) * 255 <= np.iinfo(np.uint16).max else np.uint32
+    bands = np.empty((thumb_h, width * 4), dtype=band_dtype)
+    for i in range(thumb_h):
+        np.sum(pixels[row_edges[i]:row_edges[i + 1]], axis=0, dtype=band_dtype, out=bands[i])
+    bands = bands.reshape(thumb_h, width, 4)
+
+    # Luma is linear, so weighting the band sums gives the same result as weighting every pixel.
+    luma = bands[:, :, 0].astype(np.uint32) * LUMA_WEIGHTS_BGR[0]
+    luma += bands[:, :, 1] * np.uint32(LUMA_WEIGHTS_BGR[1])
+    luma += bands[:, :, 2] * np.uint32(LUMA_WEIGHTS_BGR[2])
+    del bands
+    sums = np.add.reduceat(luma, col_edges, axis=1, dtype=np.uint64)
+    area = np.outer(row_counts, col_counts) * 1000
+    thumb = (sums + area // 2) // area
+
+    if smooth:
+        thumb = _smooth(thumb)
+    return Image.fromarray(thumb.astype(np.uint8), 'L')
+
+
+def _smooth(pixels):
+    """Light separable [1, 2, 1] blur to soften the aliasing of the box reduction."""
+    padded = np.pad(pixels, 1, mode='edge').astype(np.uint32)
+    vertical = padded[:-2, :] + 2 * padded[1:-1, :] + padded[2:, :]
+    blurred = vertical[:, :-2] + 2 * vertical[:, 1:-1] + vertical[:, 2:]
+    return (blurred + 8) // 16
+
+
+def to_thumbnail(raw, size, fast=True, smooth=False, thumb_size=THUMBNAIL_SIZE, region=None, timer=None):
+    """Downscaled grayscale image of a raw BGRA capture (or of region of it), using the fast path when possible."""
+    # The box reduction only downsamples; tiny monitors fall back to Pillow.
+    source_size = region[2:] if region else size
+    if fast and np is not None and source_size[0] >= thumb_size[0] and source_size[1] >= thumb_size[1]:
+        return thumbnail_numpy(raw, size, thumb_size, smooth, region)
+    return thumbnail_pillow(raw, size, thumb_size, region, timer)
+
+
+def crop_raw(raw, size, region):
+    """(raw, size) of just region (left, top, width, height) of a BGRA buffer, e.g. before sending it to another process."""
+    left, top, width, height = region
+    stride = size[0] * 4
+    view = memoryview(raw)
+    return b"".join(view[row * stride + left * 4:row * stride + (left + width) * 4] for row in range(top, top + height)), (width, height)
+
+
+def composite_thumbnail(raw, size, placements, canvas_size, fast=True, smooth=False, timer=None):
+    """One thumbnail of a whole-desktop grab, each monitor downscaled on its own and pasted where it sits."""
+    canvas = Image.new('L', canvas_size, 0)
+    for region, position, thumb_size in placements:
+        canvas.paste(to_thumbnail(raw, size, fast, smooth, thumb_size, region, timer), position)
+    return canvas
+
+
+def encode_webp(img, quality):
+    """Encodes a thumbnail as WebP and returns the bytes."""
+    buffer = io.BytesIO()
+    img.save(buffer, 'webp', quality=quality)
+    return buffer.getvalue()
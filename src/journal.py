@@ -0,0 +1,88 @@
+import glob
+import json
+import os
+import threading
+import time
+
+JOURNAL_SUFFIX = ".journal"
+
+
+class SessionJournal:
+    """Append-only JSON-lines journal of a capture session."""
+    def __init__(self, path, batch_records=32, batch_interval=1.0):
+        self.path = path
+        self.batch_records = max(1, int(batch_records))
+        self.batch_interval = batch_interval
+        self._lock = threading.Lock()
+        self._file = open(path, 'a', encoding='utf-8')
+        self._pending = 0
+        self._last_sync = time.monotonic()
+        self._attached = []
+
+    def attach(self, fileobj):
+        with self._lock:
+            self._attached.append(fileobj)
+
+    def detach(self, fileobj):
+        with self._lock:
+            if fileobj in self._attached:
+                self._attached.remove(fileobj)
+
+    def append(self, record, sync=False):
+        line = json.dumps(record, separators=(',', ':'), default=str)
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.write(line + "\n")
+            self._pending += 1
+            if (sync or self._pending >= self.batch_records
+                    or time.monotonic() - self._last_sync >= self.batch_interval):
+                self._sync()
+
+    def sync(self):
+        with self._lock:
+            if self._file is not None and self._pending:
+                self._sync()
+
+    def _sync(self):
+        # Caller holds self._lock
+        for fileobj in self._attached:
+            fileobj.flush()
+            os.fsync(fileobj.fileno())
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._pending = 0
+        self._last_sync = time.monotonic()
+
+    def close(self, remove=False):
+        """Syncs and closes the journal. remove=True deletes it once the session is safely finished."""
+        with self._lock:
+            if self._file is None:
+                return
+            self._sync()
+            self._file.close()
+            self._file = None
+        if remove:
+            os.remove(self.path)
+
+
+def read_journal(path):
+    """Returns the records of a journal, ignoring a torn last line left by a crash."""
+    records = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                break
+    return records
+
+
+def find_unfinished_journals(directory):
+    """Journals in directory whose session never reached its session_end record."""
+    unfinished = []
+    for path in sorted(glob.glob(os.path.join(directory, f"*{JOURNAL_SUFFIX}"))):
+        records = read_journal(path)
+        if records and records[0].get("type") == "session_start" and records[-1].get("type") != "session_end":
+            unfinished.append(path)
+    return unfinished
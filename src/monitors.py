@@ -0,0 +1,45 @@
+import time
+
+from frames import THUMBNAIL_SIZE
+
+LAYOUTS = ("per-monitor", "composite")
+LAYOUT_CHECK_INTERVAL = 10.0 # Seconds between checks for added, removed or rearranged monitors
+_GEOMETRY_KEYS = ("left", "top", "width", "height")
+
+
+def read_monitors():
+    """Freshly enumerated monitors, in the sct.monitors format (mss caches them per instance)."""
+    import mss
+    with mss.mss() as sct:
+        return sct.monitors
+
+
+class MonitorLayout:
+    """Geometry for all-monitors capture, worked out once per monitor arrangement."""
+    def __init__(self, monitors, thumb_size=THUMBNAIL_SIZE):
+        self.geometry = self._geometry(monitors)
+        self.desktop = dict(monitors[0])
+        left, top = self.desktop["left"], self.desktop["top"]
+        self.regions = [(index, (m["left"] - left, m["top"] - top, m["width"], m["height"]))
+                        for index, m in enumerate(monitors[1:], 1)]
+
+        largest_w = max(region[2] for _, region in self.regions)
+        largest_h = max(region[3] for _, region in self.regions)
+        scale = min(thumb_size[0] / largest_w, thumb_size[1] / largest_h)
+        self.composite_size = (max(1, round(self.desktop["width"] * scale)), max(1, round(self.desktop["height"] * scale)))
+        self.placements = [(region, (round(region[0] * scale), round(region[1] * scale)),
+                            (max(1, round(region[2] * scale)), max(1, round(region[3] * scale))))
+                           for _, region in self.regions]
+        self.checked = time.monotonic()
+
+    @staticmethod
+    def _geometry(monitors):
+        return [tuple(m[key] for key in _GEOMETRY_KEYS) for m in monitors]
+
+    def check_due(self):
+        return time.monotonic() - self.checked >= LAYOUT_CHECK_INTERVAL
+
+    def matches(self, monitors):
+        """True if monitors has the same arrangement; also restarts the check timer."""
+        self.checked = time.monotonic()
+        return self._geometry(monitors) == self.geometry
@@ -0,0 +1,155 @@
+import threading
+from contextlib import contextmanager
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+# A raw capture handed from the capture thread to the workers. region is the
+# (left, top, width, height) of the monitor when raw holds the whole desktop;
+# generation tells which segment was open when it was grabbed (see CaptureEngine).
+Frame = namedtuple("Frame", ["seq", "timestamp", "size", "raw", "monitor", "region", "generation"], defaults=[None, 0])
+
+POOL_TYPES = ("thread", "process")
+BACKPRESSURE_POLICIES = ("drop-oldest", "block")
+
+
+class CapturePipeline:
+    """Bounded producer/consumer queue between the capture thread and a worker pool."""
+    def __init__(self, handler, workers=2, pool="thread", max_queue=8, policy="drop-oldest", on_error=None):
+        if pool not in POOL_TYPES:
+            raise ValueError(f"Unknown pool type: {pool}")
+        if policy not in BACKPRESSURE_POLICIES:
+            raise ValueError(f"Unknown backpressure policy: {policy}")
+        self.handler = handler
+        self.workers = max(1, int(workers))
+        self.pool = pool
+        self.max_queue = max(1, int(max_queue))
+        self.policy = policy
+        self.on_error = on_error
+
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._busy = 0
+        self._turn = 0 # Sequence number allowed into the ordered section next
+        self._passed = set() # Frames that finished their ordered step (or skipped it) early
+        self._done = 0 # Every frame numbered below has been processed or dropped
+        self._finished = set() # Frames processed before an earlier one
+        self._closed = False
+        self._threads = []
+        self._executor = None
+
+        # --- Statistics ---
+        self.submitted = 0
+        self.processed = 0
+        self.dropped = 0
+        self.max_depth = 0
+
+    def start(self):
+        if self.pool == "process":
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker, name=f"capture-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def submit(self, frame):
+        """Queues a frame and numbers it. Returns False if a frame had to be dropped to make room."""
+        with self._cond:
+            accepted = True
+            if self.policy == "block":
+                while len(self._queue) >= self.max_queue and not self._closed:
+                    self._cond.wait()
+            elif len(self._queue) >= self.max_queue:
+                seq = self._queue.popleft().seq
+                self._mark_passed(seq)
+                self._mark_done(seq)
+                self.dropped += 1
+                accepted = False
+            self._queue.append(frame._replace(seq=self.submitted))
+            self.submitted += 1
+            self.max_depth = max(self.max_depth, len(self._queue))
+            self._cond.notify_all()
+            return accepted
+
+    def depth(self):
+        """Returns the number of frames waiting plus the ones being processed."""
+        with self._cond:
+            return len(self._queue) + self._busy
+
+    def offload(self, fn, *args):
+        """Runs fn in the process pool if one is configured, otherwise inline."""
+        if self._executor is not None:
+            return self._executor.submit(fn, *args).result()
+        return fn(*args)
+
+    @contextmanager
+    def ordered(self, seq):
+        """Runs the enclosed block for each frame strictly in capture order."""
+        with self._cond:
+            while self._turn != seq:
+                self._cond.wait()
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._mark_passed(seq)
+
+    def _mark_passed(self, seq):
+        # Caller holds self._cond
+        self._passed.add(seq)
+        while self._turn in self._passed:
+            self._passed.discard(self._turn)
+            self._turn += 1
+        self._cond.notify_all()
+
+    def _mark_done(self, seq):
+        # Caller holds self._cond
+        self._finished.add(seq)
+        while self._done in self._finished:
+            self._finished.discard(self._done)
+            self._done += 1
+        self._cond.notify_all()
+
+    def join(self, until=None):
+        """Blocks until every queued frame has been processed, or only the frames numbered below until."""
+        with self._cond:
+            while (self._queue or self._busy) if until is None else self._done < until:
+                self._cond.wait()
+
+    def stop(self):
+        """Processes the remaining frames, then shuts the workers down."""
+        self.join()
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                while not self._queue and not self._closed:
+                    self._cond.wait()
+                if not self._queue:
+                    return
+                frame = self._queue.popleft()
+                self._busy += 1
+                self._cond.notify_all()
+            try:
+                self.handler(frame)
+            except Exception as e:
+                if self.on_error:
+                    self.on_error(e)
+            finally:
+                with self._cond:
+                    # Let later frames through if this one never reached its ordered step
+                    if frame.seq >= self._turn and frame.seq not in self._passed:
+                        self._mark_passed(frame.seq)
+                    self._mark_done(frame.seq)
+                    self._busy -= 1
+                    self.processed += 1
+                    self._cond.notify_all()
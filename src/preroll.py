@@ -0,0 +1,66 @@
+"""Pre-roll ring buffer for hotkey bursts."""
+import threading
+
+from PIL import Image
+
+from frames import THUMBNAIL_SIZE
+
+
+class PrerollBuffer:
+    """Fixed-size ring of the most recent grayscale thumbnails."""
+    def __init__(self, slots, slot_size=THUMBNAIL_SIZE):
+        self.slots = max(1, int(slots))
+        self.slot_size = tuple(slot_size)
+        self._slot_bytes = self.slot_size[0] * self.slot_size[1]
+        self._pixels = bytearray(self.slots * self._slot_bytes)
+        self._view = memoryview(self._pixels)
+        self._frames = [None] * self.slots # (timestamp, monitor, size) of each slot, None while empty
+        self._mapped = [None] * self.slots # Image over each slot's memory, remapped only if the thumbnail size changes
+        self._next = 0
+        self._lock = threading.Lock()
+
+    @property
+    def nbytes(self):
+        return len(self._pixels)
+
+    def __len__(self):
+        with self._lock:
+            return sum(frame is not None for frame in self._frames)
+
+    def add(self, img, timestamp, monitor=0):
+        """Stores a grayscale thumbnail over the oldest one. Returns False if it doesn't fit in a slot."""
+        width, height = img.size
+        if img.mode != 'L' or width > self.slot_size[0] or height > self.slot_size[1]:
+            return False
+        with self._lock:
+            slot = self._next
+            mapped = self._mapped[slot]
+            if mapped is None or mapped.size != img.size:
+                mapped = self._mapped[slot] = self._map(slot, img.size)
+            mapped.paste(img)
+            self._frames[slot] = (timestamp, monitor, img.size)
+            self._next = (slot + 1) % self.slots
+        return True
+
+    def _map(self, slot, size):
+        start = slot * self._slot_bytes
+        mapped = Image.frombuffer('L', size, self._view[start:start + size[0] * size[1]], 'raw', 'L', 0, 1)
+        mapped.readonly = 0 # Shares the slot's memory; pasting must write into it rather than into a copy
+        return mapped
+
+    def drain(self):
+        """Removes and returns every stored frame as (timestamp, monitor, image), oldest first."""
+        frames = []
+        with self._lock:
+            for n in range(self.slots):
+                slot = (self._next + n) % self.slots
+                if self._frames[slot] is None:
+                    continue
+                timestamp, monitor, _ = self._frames[slot]
+                frames.append((timestamp, monitor, self._mapped[slot].copy()))
+                self._frames[slot] = None
+        return frames
+
+    def clear(self):
+        with self._lock:
+            self._frames = [None] * self.slots
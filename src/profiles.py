@@ -0,0 +1,186 @@
+"""Named encoder profiles, and calibration of a profile on the current machine."""
+import io
+import math
+import time
+from collections import namedtuple
+
+from PIL import Image, ImageChops, ImageStat
+
+from frames import QUALITY_MAP, THUMBNAIL_SIZE
+
+# size is the (width, height) frames are downscaled to; method only applies to WebP (0 fastest - 6 smallest)
+EncoderProfile = namedtuple("EncoderProfile", ["codec", "quality", "method", "lossless", "size"])
+CalibrationResult = namedtuple("CalibrationResult", ["profile", "cpu_ms", "bytes", "legibility"])
+
+CODECS = {"webp": ".webp", "jpeg": ".jpg", "png": ".png"} # Codec -> frame extension
+DEFAULT_METHOD = 4 # What Pillow uses when no method is given
+PROFILE_SECTION = "Profile " # config.ini sections "[Profile <name>]"
+CALIBRATED_PROFILE = "Calibrated"
+BUILTIN_PROFILES = {name: EncoderProfile("webp", quality, DEFAULT_METHOD, False, THUMBNAIL_SIZE) for name, quality in QUALITY_MAP.items()}
+
+# --- Calibration Defaults ---
+DEFAULT_TARGET_BYTES = 16 * 1024 # Per frame
+DEFAULT_MIN_LEGIBILITY = 27.0 # dB, see legibility()
+CANDIDATE_SCALES = (1.28, 1.0, 0.8, 0.64) # Thumbnail sizes tried, relative to THUMBNAIL_SIZE; the largest is the reference
+
+
+def scaled_size(scale, size=THUMBNAIL_SIZE):
+    return (round(size[0] * scale), round(size[1] * scale))
+
+
+def parse_size(text):
+    """(width, height) from "WIDTHxHEIGHT"."""
+    width, _, height = text.lower().partition("x")
+    if not (width.isdigit() and height.isdigit()) or not int(width) or not int(height):
+        raise ValueError(f"Expected a size like 500x310, got {text!r}")
+    return int(width), int(height)
+
+
+def describe(profile):
+    """Short description for status lines and the readme, e.g. "webp q50 m4 500x310"."""
+    if profile.codec == "png" or profile.lossless:
+        detail = "lossless" + (f" m{profile.method}" if profile.codec == "webp" else "")
+    elif profile.codec == "webp":
+        detail = f"q{profile.quality} m{profile.method}"
+    else:
+        detail = f"q{profile.quality}"
+    return f"{profile.codec} {detail} {profile.size[0]}x{profile.size[1]}"
+
+
+def encode_frame(img, profile):
+    """Encodes a thumbnail with the profile's codec and settings and returns the bytes."""
+    buffer = io.BytesIO()
+    if profile.codec == "webp":
+        img.save(buffer, 'webp', quality=profile.quality, method=profile.method, lossless=profile.lossless)
+    elif profile.codec == "jpeg":
+        img.save(buffer, 'jpeg', quality=profile.quality)
+    else:
+        img.save(buffer, 'png', compress_level=max(1, min(9, profile.method + 3))) # PNG is lossless; method sets the zlib effort
+    return buffer.getvalue()
+
+
+def profile_from_section(section):
+    """EncoderProfile from a config.ini section. Raises ValueError for unknown codecs or bad sizes."""
+    codec = section.get('Codec', fallback="webp").lower()
+    if codec not in CODECS:
+        raise ValueError(f"Unknown codec {codec!r}, choose from {', '.join(CODECS)}")
+    return EncoderProfile(
+        codec,
+        section.getint('Quality', fallback=QUALITY_MAP["Medium"]),
+        section.getint('Method', fallback=DEFAULT_METHOD),
+        section.getboolean('Lossless', fallback=False),
+        parse_size(section.get('Size', fallback=f"{THUMBNAIL_SIZE[0]}x{THUMBNAIL_SIZE[1]}")),
+    )
+
+
+def load_profiles(config):
+    """Every profile by name: the built-in ones, then those from config.ini (which may override them)."""
+    profiles = dict(BUILTIN_PROFILES)
+    for section in config.sections():
+        if section.startswith(PROFILE_SECTION):
+            profiles[section[len(PROFILE_SECTION):].strip()] = profile_from_section(config[section])
+    return profiles
+
+
+def save_profile(config, name, profile, **notes):
+    """Stores a profile as [Profile <name>]; notes (e.g. the calibration results) are kept alongside for reference."""
+    config[PROFILE_SECTION + name] = {
+        "Codec": profile.codec,
+        "Quality": str(profile.quality),
+        "Method": str(profile.method),
+        "Lossless": "yes" if profile.lossless else "no",
+        "Size": f"{profile.size[0]}x{profile.size[1]}",
+        **{key: str(value) for key, value in notes.items()},
+    }
+
+
+# --- Calibration ---
+
+def legibility(reference, img):
+    """PSNR (dB) of img against reference, after scaling img back up to the reference size."""
+    if img.size != reference.size:
+        img = img.resize(reference.size, Image.Resampling.BICUBIC)
+    rms = ImageStat.Stat(ImageChops.difference(reference, img)).rms[0]
+    return 100.0 if rms == 0 else 20 * math.log10(255 / rms)
+
+
+def candidate_profiles(reference_size=None):
+    """Profiles tried by default: lossy and lossless WebP at every effort, JPEG and PNG, each at several sizes."""
+    sizes = [scaled_size(scale) for scale in CANDIDATE_SCALES]
+    if reference_size:
+        sizes = [size for size in sizes if size[0] <= reference_size[0] and size[1] <= reference_size[1]] or [reference_size]
+    candidates = []
+    for size in sizes:
+        candidates += [EncoderProfile("webp", quality, method, False, size) for quality in (30, 50, 70, 85) for method in (0, 2, 4, 6)]
+        candidates += [EncoderProfile("webp", 50, method, True, size) for method in (0, 4)]
+        candidates += [EncoderProfile("jpeg", quality, 0, False, size) for quality in (50, 75, 90)]
+        candidates.append(EncoderProfile("png", 0, 3, True, size))
+    return candidates
+
+
+def measure(profile, samples):
+    """CalibrationResult of one profile: mean CPU ms to encode, bytes and legibility per sample frame."""
+    cpu = 0.0
+    total_bytes = 0
+    score = 0.0
+    for reference in samples:
+        img = reference if reference.size == profile.size else reference.resize(profile.size, Image.Resampling.LANCZOS)
+        start = time.thread_time()
+        data = encode_frame(img, profile)
+        cpu += time.thread_time() - start
+        total_bytes += len(data)
+        decoded = Image.open(io.BytesIO(data))
+        score += legibility(reference, decoded.convert('L'))
+    n = len(samples)
+    return CalibrationResult(profile, cpu / n * 1000, total_bytes / n, score / n)
+
+
+def choose(results, target_bytes=DEFAULT_TARGET_BYTES, min_legibility=DEFAULT_MIN_LEGIBILITY):
+    """The cheapest result within both limits. Without one, the most legible within the byte budget, else the smallest."""
+    fitting = [result for result in results if result.bytes <= target_bytes and result.legibility >= min_legibility]
+    if fitting:
+        return min(fitting, key=lambda result: (result.cpu_ms, result.bytes))
+    within_budget = [result for result in results if result.bytes <= target_bytes]
+    if within_budget:
+        return max(within_budget, key=lambda result: result.legibility)
+    return min(results, key=lambda result: result.bytes)
+
+
+def screen_samples(count, size, interval=1.0):
+    """Grayscale frames of every monitor at size, grabbed count times interval seconds apart."""
+    import mss # Only needed when calibrating on the screen
+    from frames import to_thumbnail
+    samples = []
+    with mss.mss() as sct:
+        for n in range(count):
+            if n:
+                time.sleep(interval)
+            for monitor in sct.monitors[1:]:
+                shot = sct.grab(monitor)
+                samples.append(to_thumbnail(shot.raw, shot.size, thumb_size=size))
+    return samples
+
+
+def archive_samples(master_path, count, size):
+    """count frames spread evenly over a master archive, scaled to size (recorded frames are already thumbnails)."""
+    from catalog import iter_images, open_frame_source
+    with open_frame_source(master_path) as source:
+        if not len(source):
+            return []
+        wanted = {round(n * (len(source) - 1) / max(1, count - 1)) for n in range(count)}
+        return [img.resize(size, Image.Resampling.LANCZOS) if img.size != size else img
+                for i, (_, img) in enumerate(iter_images(source)) if i in wanted]
+
+
+def calibrate(samples, target_bytes=DEFAULT_TARGET_BYTES, min_legibility=DEFAULT_MIN_LEGIBILITY, candidates=None, on_status=None):
+    """Measures every candidate on samples (grayscale frames at the reference size). Returns (chosen result, all results)."""
+    if not samples:
+        raise ValueError("No sample frames to calibrate on")
+    on_status = on_status or (lambda text: None)
+    candidates = candidates or candidate_profiles(samples[0].size)
+    results = []
+    for n, profile in enumerate(candidates, 1):
+        results.append(measure(profile, samples))
+        if n % 10 == 0 or n == len(candidates):
+            on_status(f"⏱️ Measured {n}/{len(candidates)} profiles")
+    return choose(results, target_bytes, min_legibility), results
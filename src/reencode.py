@@ -0,0 +1,215 @@
+"""Batch re-encoding of existing master archives to a new quality, resolution or format."""
+import glob
+import io
+import json
+import os
+import re
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+from PIL import Image
+
+from catalog import CATALOG_ENTRY, FrameCatalog, iter_images, open_frame_source, read_timeline, write_stills
+from contactsheet import is_sheet_entry
+from frames import encode_webp
+from retention import MASTER_PATTERN, TIER_FULL, read_manifest
+
+FORMATS = {"webp": ".webp", "png": ".png", "jpeg": ".jpg"} # Target format -> frame extension
+DEFAULT_FORMAT = "webp"
+DEFAULT_QUALITY = 50
+REENCODE_SUFFIX = ".reencode.tmp"
+_KEPT_ENTRIES = ("readme.txt", "timings.json") # Kept as they are, with the contact sheets
+_FRAMES_KEPT = re.compile(r"^Frames Kept:\s+(\d+)", re.MULTILINE)
+_BURST_FRAMES = re.compile(r"^Burst Frames:\s+(\d+)", re.MULTILINE)
+
+
+def make_target(fmt=DEFAULT_FORMAT, quality=DEFAULT_QUALITY, max_size=None):
+    """Target settings as recorded in the manifest. max_size (width, height) only ever shrinks frames."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format {fmt!r}, choose from {', '.join(FORMATS)}")
+    return {"format": fmt, "quality": quality, "max_size": list(max_size) if max_size else None}
+
+
+def encode_still(img, target):
+    if target["max_size"]:
+        img = img.copy()
+        img.thumbnail(tuple(target["max_size"]), Image.Resampling.LANCZOS)
+    if target["format"] == "webp":
+        return encode_webp(img, target["quality"])
+    buffer = io.BytesIO()
+    img.save(buffer, target["format"], quality=target["quality"], optimize=True)
+    return buffer.getvalue()
+
+
+def find_archives(directory):
+    """Master archives anywhere under directory, oldest name first."""
+    return sorted(glob.glob(os.path.join(directory, "**", MASTER_PATTERN), recursive=True))
+
+
+def is_reencoded(path, target):
+    with zipfile.ZipFile(path) as zipf:
+        return read_manifest(zipf).get("reencode", {}).get("target") == target
+
+
+def timeline_spans(timeline):
+    """[(start, end)] of the capturing stretches of a session timeline, between each Start/Resume and the next Pause/Stop."""
+    spans = []
+    start = None
+    for event, dt, _ in timeline:
+        if event in ("Session Start", "Resume"):
+            start = dt
+        elif event in ("Pause", "Session Stop") and start is not None:
+            spans.append((start, dt))
+            start = None
+    if start is not None:
+        spans.append((start, datetime.max))
+    return spans
+
+
+def span_counts(timestamps, spans):
+    """Frames in each span, plus (last) the ones outside every span, e.g. in flight when a pause was logged."""
+    counts = [0] * (len(spans) + 1)
+    for dt in timestamps:
+        counts[next((n for n, (start, end) in enumerate(spans) if start <= dt <= end), len(spans))] += 1
+    return counts
+
+
+def readme_frame_count(readme):
+    """Frames Kept (plus Burst Frames) from a session readme, or None for readmes without it."""
+    match = _FRAMES_KEPT.search(readme)
+    if not match:
+        return None
+    burst = _BURST_FRAMES.search(readme)
+    return int(match.group(1)) + (int(burst.group(1)) if burst else 0)
+
+
+def reencode_archive(path, target):
+    """Re-encodes one master archive to target and swaps it in. Runs in a pool worker; returns its statistics."""
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    result = {"path": path, "frames": 0, "bytes_before": os.path.getsize(path), "bytes_after": None, "skipped": None, "warning": None}
+    mtime = os.path.getmtime(path)
+    tmp_path = path + REENCODE_SUFFIX
+    with zipfile.ZipFile(path) as zipf:
+        manifest = read_manifest(zipf)
+        kept_entries = {name: zipf.read(name) for name in zipf.namelist() if name in _KEPT_ENTRIES or is_sheet_entry(name)}
+    if manifest.get("reencode", {}).get("target") == target:
+        result["skipped"] = "already re-encoded"
+        return result
+    timeline = read_timeline(path)
+    if not manifest:
+        # Nested or older archives: start a manifest from what the readme says
+        manifest = {"version": 1, "timeline": [{"event": e, "time": dt.isoformat(), "comment": c} for e, dt, c in timeline]}
+
+    with open_frame_source(path) as source:
+        timestamps = [source.record(i).timestamp for i in range(len(source))]
+        if not timestamps:
+            result["skipped"] = "no frames"
+            return result
+        try:
+            with zipfile.ZipFile(tmp_path, 'w', zipfile.ZIP_DEFLATED, compresslevel=9) as out:
+                for name, data in kept_entries.items():
+                    out.writestr(name, data)
+                segments = write_stills(out, source.segments, iter_images(source), lambda img: encode_still(img, target),
+                                        FORMATS[target["format"]])
+                manifest["layout"] = "flat"
+                manifest["segments"] = segments
+                manifest["index"] = CATALOG_ENTRY
+                manifest.setdefault("session", {})["frames"] = len(timestamps)
+                reencode = manifest.setdefault("reencode", {"history": []})
+                reencode["target"] = target
+                reencode["history"].append({"time": datetime.now().isoformat(), "target": target, "frames": len(timestamps),
+                                            "bytes_before": result["bytes_before"]})
+                out.writestr("manifest.json", json.dumps(manifest, indent=2))
+
+            # Every frame must have made it, in the same stretch of the timeline as before
+            with FrameCatalog(tmp_path) as written:
+                written_counts = span_counts([written.record(i).timestamp for i in range(len(written))], timeline_spans(timeline))
+            source_counts = span_counts(timestamps, timeline_spans(timeline))
+            if written_counts != source_counts:
+                raise ValueError(f"frame counts per timeline span changed from {source_counts} to {written_counts}")
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    os.utime(tmp_path, (mtime, mtime)) # Retention ages archives without a timeline by their modification time
+    os.replace(tmp_path, path)
+    expected = readme_frame_count(kept_entries.get("readme.txt", b"").decode('utf-8', errors='replace'))
+    if expected is not None and manifest.get("retention", {}).get("tier", TIER_FULL) == TIER_FULL and expected != len(timestamps):
+        result["warning"] = f"readme lists {expected} frames kept, the archive holds {len(timestamps)}"
+    result.update(frames=len(timestamps), bytes_after=os.path.getsize(path), cpu=time.process_time() - cpu_start,
+                  seconds=time.perf_counter() - wall_start)
+    return result
+
+
+class BatchReencoder:
+    """Re-encodes the master archives under a folder on a pool of worker processes."""
+    def __init__(self, directory, target, workers=None, on_status=None):
+        self.directory = directory
+        self.target = target
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.on_status = on_status or (lambda text: None)
+        self.failed = [] # Archives whose re-encode failed in the last run; they are left as they were
+
+    def pending(self):
+        """Archives not yet at the target. Unreadable archives (e.g. one being written) are left out."""
+        pending = []
+        for path in find_archives(self.directory):
+            try:
+                if not is_reencoded(path, self.target):
+                    pending.append(path)
+            except (OSError, zipfile.BadZipFile, ValueError):
+                continue
+        return pending
+
+    def run(self):
+        """Re-encodes every pending archive. Returns the per-archive results; failures are reported and left untouched."""
+        for tmp_path in glob.glob(os.path.join(self.directory, "**", MASTER_PATTERN + REENCODE_SUFFIX), recursive=True):
+            os.remove(tmp_path) # Left behind by an interrupted run; the archive itself is intact
+        pending = self.pending()
+        self.on_status(f"🔁 Re-encoding {len(pending)} archive(s) to {self.target['format']} quality {self.target['quality']}"
+                       f"{' max ' + 'x'.join(map(str, self.target['max_size'])) if self.target['max_size'] else ''} on {self.workers} worker(s)")
+        results = []
+        self.failed = []
+        wall_start = time.perf_counter()
+        pool = ProcessPoolExecutor(max_workers=self.workers)
+        try:
+            futures = {pool.submit(reencode_archive, path, self.target): path for path in pending}
+            for future in as_completed(futures):
+                name = os.path.relpath(futures[future], self.directory)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    self.on_status(f"❌ Re-encode Error: {name}: {e}")
+                    self.failed.append(futures[future])
+                    continue
+                results.append(result)
+                if result["skipped"]:
+                    self.on_status(f"⏭️ {name}: {result['skipped']}")
+                    continue
+                self.on_status(f"✅ {name}: {result['frames']} frames, {result['bytes_before'] / 1024 / 1024:.1f} -> "
+                               f"{result['bytes_after'] / 1024 / 1024:.1f} MB, {result['seconds']:.1f}s")
+                if result["warning"]:
+                    self.on_status(f"⚠️ {name}: {result['warning']}")
+        except KeyboardInterrupt:
+            pool.shutdown(wait=True, cancel_futures=True) # Archives in progress finish (or are discarded whole)
+            self.on_status("⏹️ Interrupted; run again to continue where this left off")
+            raise
+        finally:
+            pool.shutdown()
+        self.on_status(self.throughput(results, time.perf_counter() - wall_start))
+        return results
+
+    def throughput(self, results, wall):
+        """Summary line with the overall and per-core frame rates, for sizing a larger run."""
+        done = [result for result in results if not result["skipped"]]
+        frames = sum(result["frames"] for result in done)
+        cpu = sum(result["cpu"] for result in done)
+        saved = sum(result["bytes_before"] - result["bytes_after"] for result in done)
+        if not frames:
+            return "🔁 Nothing re-encoded"
+        return (f"🔁 {len(done)} archive(s), {frames} frames in {wall:.1f}s on {self.workers} worker(s): "
+                f"{frames / wall:.1f} frames/s overall, {frames / cpu:.1f} frames/s per core, {saved / 1024 / 1024:.1f} MB freed")
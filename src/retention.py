@@ -0,0 +1,250 @@
+"""Disk budget and age-tiered retention for master archives."""
+import glob
+import json
+import os
+import threading
+import time
+import zipfile
+from datetime import datetime, timedelta
+
+from catalog import CATALOG_ENTRY, open_frame_source, read_timeline, write_stills
+from contactsheet import is_sheet_entry
+from frames import encode_webp
+
+TIER_FULL = "full"
+TIER_REDUCED = "reduced"
+TIER_INDEX = "index"
+TIERS = (TIER_FULL, TIER_REDUCED, TIER_INDEX)
+
+DEFAULT_FULL_DAYS = 7
+DEFAULT_REDUCED_DAYS = 30
+DEFAULT_REDUCED_INTERVAL = 60 # Seconds of capture per kept frame in the reduced tier
+DEFAULT_REDUCED_QUALITY = 30
+DEFAULT_BUDGET_MB = 0 # 0 is no budget
+MASTER_PATTERN = "MASTER_*.zip"
+COMPACT_SUFFIX = ".compact.tmp"
+THROTTLE = 0.005 # Seconds yielded after every re-encoded frame, so compaction never competes with a capture
+LOW_PRIORITY_NICE = 19
+_KEPT_ENTRIES = ("readme.txt", "timings.json") # Besides the manifest, what the index tier keeps
+
+
+class RetentionPolicy:
+    """Age tiers and disk budget, as configured."""
+    def __init__(self, full_days=DEFAULT_FULL_DAYS, reduced_days=DEFAULT_REDUCED_DAYS, reduced_interval=DEFAULT_REDUCED_INTERVAL,
+                 reduced_quality=DEFAULT_REDUCED_QUALITY, budget_mb=DEFAULT_BUDGET_MB):
+        self.full_days = full_days
+        self.reduced_days = max(reduced_days, full_days)
+        self.reduced_interval = max(1, reduced_interval)
+        self.reduced_quality = reduced_quality
+        self.budget_bytes = int(budget_mb * 1024 * 1024)
+
+    def tier_for_age(self, age):
+        if age >= timedelta(days=self.reduced_days):
+            return TIER_INDEX
+        if age >= timedelta(days=self.full_days):
+            return TIER_REDUCED
+        return TIER_FULL
+
+
+def read_manifest(zipf):
+    return json.loads(zipf.read("manifest.json")) if "manifest.json" in zipf.NameToInfo else {}
+
+
+def archive_tier(path):
+    with zipfile.ZipFile(path) as zipf:
+        return read_manifest(zipf).get("retention", {}).get("tier", TIER_FULL)
+
+
+def session_end(path):
+    """When the archive's session ended: the last timeline event, else the file's modification time."""
+    try:
+        timeline = read_timeline(path)
+    except (zipfile.BadZipFile, ValueError, KeyError):
+        timeline = []
+    if timeline:
+        return timeline[-1][1]
+    return datetime.fromtimestamp(os.path.getmtime(path))
+
+
+def _reduced_frames(source, interval):
+    """Indexes of the frames the reduced tier keeps: the first of every interval, per segment and monitor."""
+    kept = []
+    seen = set()
+    for i in range(len(source)):
+        record = source.record(i)
+        key = (record.segment, record.monitor, int(record.timestamp.timestamp() // interval))
+        if key not in seen:
+            seen.add(key)
+            kept.append(i)
+    return kept
+
+
+def compact_archive(path, tier, policy, reason="age"):
+    """Rewrites a master archive down to the given tier. Returns the history entry recorded in its manifest."""
+    before_bytes = os.path.getsize(path)
+    mtime = os.path.getmtime(path)
+    tmp_path = path + COMPACT_SUFFIX
+    with zipfile.ZipFile(path) as zipf:
+        manifest = read_manifest(zipf)
+        kept_entries = {name: zipf.read(name) for name in _KEPT_ENTRIES if name in zipf.NameToInfo}
+        if tier == TIER_REDUCED: # Contact sheets are small and outlive the full frames, but not the index tier
+            kept_entries.update((name, zipf.read(name)) for name in zipf.namelist() if is_sheet_entry(name))
+    if not manifest:
+        # Nested or older archives: start a manifest from what the readme says
+        manifest = {"version": 1, "timeline": [{"event": e, "time": dt.isoformat(), "comment": c} for e, dt, c in read_timeline(path)]}
+    previous = manifest.get("retention", {}).get("tier", TIER_FULL)
+
+    source = open_frame_source(path)
+    try:
+        frames_before = len(source)
+        with zipfile.ZipFile(tmp_path, 'w', zipfile.ZIP_DEFLATED, compresslevel=9) as out:
+            for name, data in kept_entries.items():
+                out.writestr(name, data)
+            segments = []
+            if tier == TIER_REDUCED:
+                segments = write_stills(out, source.segments, _reduced_images(source, policy),
+                                        lambda img: encode_webp(img, policy.reduced_quality))
+            frames_after = sum(segment["frames"] for segment in segments)
+            entry = {
+                "time": datetime.now().isoformat(),
+                "from": previous,
+                "to": tier,
+                "reason": reason,
+                "frames_before": frames_before,
+                "frames_after": frames_after,
+                "bytes_before": before_bytes,
+            }
+            if tier == TIER_REDUCED:
+                entry["interval"] = policy.reduced_interval
+                entry["quality"] = policy.reduced_quality
+            manifest["layout"] = "flat"
+            manifest["segments"] = segments
+            manifest["index"] = CATALOG_ENTRY if segments else None
+            manifest["sheets"] = sorted(name for name in kept_entries if is_sheet_entry(name))
+            manifest.setdefault("session", {})["frames"] = frames_after
+            retention = manifest.setdefault("retention", {"history": []})
+            retention["tier"] = tier
+            retention["history"].append(entry)
+            out.writestr("manifest.json", json.dumps(manifest, indent=2))
+    except BaseException:
+        source.close()
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    source.close()
+    os.utime(tmp_path, (mtime, mtime))
+    os.replace(tmp_path, path)
+    entry["bytes_after"] = os.path.getsize(path) # Not in the manifest, which is written before the size is known
+    return entry
+
+
+def _reduced_images(source, policy):
+    """(record, image) of the frames the reduced tier keeps, pausing after each so compaction stays in the background."""
+    for i in _reduced_frames(source, policy.reduced_interval):
+        yield source.record(i), source.image(i)
+        time.sleep(THROTTLE)
+
+
+class RetentionManager:
+    """Applies a RetentionPolicy to the master archives in some directories, on a low-priority background thread."""
+    def __init__(self, directories, policy, on_status=None):
+        self.directories = list(dict.fromkeys(os.path.abspath(d) for d in directories if d and os.path.isdir(d)))
+        self.policy = policy
+        self.on_status = on_status or (lambda text: None)
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def archives(self):
+        """[(path, session end, tier, bytes)], oldest first. Unreadable archives (e.g. one being written) are left out."""
+        found = []
+        for directory in self.directories:
+            for path in glob.glob(os.path.join(directory, MASTER_PATTERN)):
+                try:
+                    found.append((path, session_end(path), archive_tier(path), os.path.getsize(path)))
+                except (OSError, zipfile.BadZipFile, ValueError):
+                    continue
+        return sorted(found, key=lambda archive: archive[1])
+
+    def plan(self, now=None):
+        """[(path, tier)] of the compactions the archives' ages call for, oldest first."""
+        now = now or datetime.now()
+        plan = []
+        for path, end, tier, _ in self.archives():
+            target = self.policy.tier_for_age(now - end)
+            if TIERS.index(target) > TIERS.index(tier):
+                plan.append((path, target))
+        return plan
+
+    def over_budget(self):
+        """Bytes by which the archives exceed the budget (0 if they fit or there is no budget)."""
+        if not self.policy.budget_bytes:
+            return 0
+        return max(0, sum(size for *_, size in self.archives()) - self.policy.budget_bytes)
+
+    def run(self, now=None):
+        """Compacts everything the policy asks for. Returns the history entries of the compactions."""
+        _lower_thread_priority()
+        for directory in self.directories: # Left behind if the app exited mid-compaction; the archive itself is intact
+            for tmp_path in glob.glob(os.path.join(directory, MASTER_PATTERN + COMPACT_SUFFIX)):
+                os.remove(tmp_path)
+        done = []
+        for path, tier in self.plan(now):
+            self._compact(path, tier, "age", done)
+
+        # Over budget: move the oldest archives down one tier at a time, reduced before index
+        failed = set()
+        while self.over_budget():
+            candidates = [(path, tier) for path, _, tier, _ in self.archives() if tier != TIER_INDEX and path not in failed]
+            if not candidates:
+                self.on_status(f"⚠️ Archives are {self.over_budget() / 1024 / 1024:.1f} MB over the disk budget, nothing left to compact")
+                break
+            path, tier = candidates[0]
+            if not self._compact(path, TIERS[TIERS.index(tier) + 1], "budget", done):
+                failed.add(path)
+
+        if done:
+            saved = sum(entry["bytes_before"] - entry["bytes_after"] for entry in done)
+            self.on_status(f"🧹 Compacted {len(done)} archive(s), {saved / 1024 / 1024:.1f} MB freed")
+        return done
+
+    def _compact(self, path, tier, reason, done):
+        self.on_status(f"🧹 Compacting {os.path.basename(path)} to {tier} ({reason})...")
+        try:
+            done.append(compact_archive(path, tier, self.policy, reason))
+            return True
+        except Exception as e:
+            self.on_status(f"❌ Compaction Error: {os.path.basename(path)}: {e}")
+            return False
+
+    def start(self, now=None):
+        """Runs the compaction on a background thread, unless one is already running."""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return False
+            self._thread = threading.Thread(target=self.run, args=(now,), daemon=True)
+            self._thread.start()
+            return True
+
+    def join(self, timeout=None):
+        if self._thread:
+            self._thread.join(timeout)
+        return not (self._thread and self._thread.is_alive())
+
+
+def prune_files(directory, max_age_days):
+    """Removes files in directory not modified for max_age_days (e.g. cached AI summaries)."""
+    cutoff = time.time() - max_age_days * 86400
+    for path in glob.glob(os.path.join(directory, "*")):
+        try:
+            if os.path.isfile(path) and os.path.getmtime(path) < cutoff:
+                os.remove(path)
+        except OSError:
+            continue
+
+
+def _lower_thread_priority():
+    """Lowest CPU priority for the calling thread where the OS allows it (Linux nice values are per thread)."""
+    try:
+        os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), LOW_PRIORITY_NICE)
+    except (AttributeError, OSError):
+        pass # Elsewhere compaction only relies on THROTTLE
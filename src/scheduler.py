@@ -0,0 +1,106 @@
+import math
+import threading
+import time
+
+OVERRUN_POLICIES = ("skip", "catch-up", "coalesce")
+MAX_CATCH_UP_TICKS = 10 # A catch-up backlog longer than this is skipped instead of fired back-to-back
+
+
+class CaptureScheduler:
+    """Deadline-based capture cadence on time.monotonic()."""
+    def __init__(self, interval, policy="skip", clock=time.monotonic):
+        if policy not in OVERRUN_POLICIES:
+            raise ValueError(f"Unknown overrun policy: {policy}")
+        self.interval = float(interval)
+        self.policy = policy
+        self.clock = clock
+        self.max_sleep = None # Longest single sleep, so a deadline brought forward from another thread is noticed
+        self._deadline = None
+        self._wake = None # Earliest deadline asked for by bring_forward(), applied by the capture thread in wait()
+        self._backlog = 0 # Missed deadlines still to fire under catch-up, already counted as an overrun
+        self._lock = threading.Lock() # Guards _deadline, _wake, _backlog and interval
+
+        # --- Statistics ---
+        self.ticks = 0
+        self.missed = 0
+        self.overruns = 0
+        self.jitter_max = 0.0
+        self._jitter_sum = 0.0
+        self._jitter_sq_sum = 0.0
+
+    def reset(self):
+        """Re-anchors the grid at the current time, e.g. on start or resume after a pause."""
+        with self._lock:
+            self._deadline = self.clock()
+            self._wake = None
+            self._backlog = 0
+
+    def set_interval(self, interval):
+        """Changes the interval from the next deadline onwards. Safe to call from other threads."""
+        with self._lock:
+            self.interval = float(interval)
+
+    def bring_forward(self, delay):
+        """Moves the pending deadline to at most delay seconds from now. Safe to call from other threads."""
+        with self._lock:
+            wake = self.clock() + delay
+            self._wake = wake if self._wake is None else min(self._wake, wake)
+
+    def wait(self, stop_event):
+        """Sleeps until the next deadline. Returns False if stop_event was set meanwhile."""
+        if self._deadline is None:
+            self.reset()
+        while True:
+            with self._lock:
+                if self._wake is not None:
+                    self._deadline = min(self._deadline, self._wake)
+                    self._wake = None
+                remaining = self._deadline - self.clock()
+            if remaining <= 0:
+                break
+            if stop_event.wait(min(remaining, self.max_sleep) if self.max_sleep else remaining):
+                return False
+
+        with self._lock:
+            jitter = self.clock() - self._deadline
+        self.ticks += 1
+        self.jitter_max = max(self.jitter_max, jitter)
+        self._jitter_sum += jitter
+        self._jitter_sq_sum += jitter * jitter
+        return True
+
+    def advance(self):
+        """Moves to the next deadline after a tick has been handled, applying the overrun policy."""
+        with self._lock:
+            now = self.clock()
+            self._deadline += self.interval
+            backlog, self._backlog = max(0, self._backlog - 1), 0
+            if now < self._deadline:
+                return
+
+            # The tick overran: count the deadlines that have already passed
+            late_ticks = math.floor((now - self._deadline) / self.interval) + 1
+            if late_ticks > backlog: # Not just the rest of a backlog that was already counted
+                self.overruns += 1
+            if self.policy == "catch-up" and late_ticks <= MAX_CATCH_UP_TICKS:
+                self._backlog = late_ticks
+                return # Leave the deadline in the past so the missed ticks fire right away
+            if self.policy == "coalesce":
+                self.missed += late_ticks - 1
+                self._deadline = now
+            else:
+                self.missed += late_ticks
+                self._deadline += late_ticks * self.interval
+
+    def jitter_stats(self):
+        """Returns (mean, standard deviation, max) tick lateness in seconds."""
+        if not self.ticks:
+            return 0.0, 0.0, 0.0
+        mean = self._jitter_sum / self.ticks
+        variance = max(0.0, self._jitter_sq_sum / self.ticks - mean * mean)
+        return mean, math.sqrt(variance), self.jitter_max
+
+    def coverage(self):
+        """Fraction of scheduled ticks that were actually captured."""
+        scheduled = self.ticks + self.missed
+        return self.ticks / scheduled if scheduled else 1.0
@@ -0,0 +1,293 @@
+"""Search index over master archives: session details, timeline comments and frame hashes."""
+import glob
+import os
+import sqlite3
+import struct
+import zipfile
+from array import array
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timedelta
+
+from PIL import Image
+
+from catalog import iter_images, open_frame_source, read_timeline
+from changes import dhash
+from frames import THUMBNAIL_SIZE
+from retention import MASTER_PATTERN, read_manifest
+from summary import summary_path
+
+try:
+    import numpy as np
+except ImportError: # NumPy is optional; similar-screen queries fall back to a Python loop
+    np = None
+
+DEFAULT_INDEX_PATH = os.path.join("archives", "search.db")
+DEFAULT_MAX_DISTANCE = 10 # Differing dHash bits (of 64) up to which two screens count as similar
+DEFAULT_LIMIT = 20
+_EPOCH = datetime(1970, 1, 1)
+
+# Session details and the readme lines they are parsed from, for archives without a manifest
+DETAIL_FIELDS = {
+    "name": "Support Name: ",
+    "company": "The company the support is working under: ",
+    "description": "Description: ",
+    "ticket_id": "Support Ticket ID: ",
+    "ticket_link": "Support Ticket Link: ",
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS archives (
+    id INTEGER PRIMARY KEY, path TEXT UNIQUE, size INTEGER, mtime REAL, summary_mtime REAL, start TEXT, end TEXT,
+    name TEXT, company TEXT, description TEXT, ticket_id TEXT, ticket_link TEXT, summary TEXT, frames INTEGER);
+CREATE INDEX IF NOT EXISTS archives_ticket ON archives (ticket_id COLLATE NOCASE);
+CREATE TABLE IF NOT EXISTS events (archive_id INTEGER, time TEXT, event TEXT, comment TEXT);
+CREATE INDEX IF NOT EXISTS events_archive ON events (archive_id);
+CREATE TABLE IF NOT EXISTS frames (archive_id INTEGER PRIMARY KEY, times BLOB, monitors BLOB, hashes BLOB);
+CREATE VIRTUAL TABLE IF NOT EXISTS text USING fts5 (archive_id UNINDEXED, field UNINDEXED, time UNINDEXED, content);
+"""
+
+Session = namedtuple("Session", ["path", "start", "end", "name", "description", "ticket_id", "ticket_link", "frames"])
+TextHit = namedtuple("TextHit", ["path", "field", "time", "snippet"])
+ScreenHit = namedtuple("ScreenHit", ["path", "distance", "first_seen", "last_seen", "frames"])
+
+
+def _micros(dt):
+    return (dt - _EPOCH) // timedelta(microseconds=1)
+
+
+def image_hash(path):
+    """dHash of a screenshot file, computed on a thumbnail the way captured frames are."""
+    with Image.open(path) as img:
+        return dhash(img.convert('L').resize(THUMBNAIL_SIZE, Image.Resampling.LANCZOS))
+
+
+def frame_hash(master_path, dt):
+    """dHash of the frame that was on screen at dt in a master archive."""
+    with open_frame_source(master_path) as source:
+        i = source.find(dt)
+        if i is None:
+            raise ValueError(f"No frame at {dt} in {master_path}")
+        return source.record(i).hash or dhash(source.image(i))
+
+
+def archive_signature(path):
+    """(size, mtime, summary mtime): when any of these changes, the archive is scanned again."""
+    summary = summary_path(path)
+    return os.path.getsize(path), os.path.getmtime(path), os.path.getmtime(summary) if os.path.exists(summary) else None
+
+
+def details_from_readme(readme):
+    details = {}
+    for line in readme.splitlines():
+        for field, prefix in DETAIL_FIELDS.items():
+            if line.startswith(prefix) and field not in details:
+                value = line[len(prefix):].strip()
+                details[field] = "" if value in ("N/A", "None") else value
+    return details
+
+
+def scan_archive(path):
+    """Everything the index keeps about one master archive. Runs in a pool worker."""
+    path = os.path.abspath(path)
+    signature = archive_signature(path) # Before reading, so a change while scanning is caught by the next update
+    with zipfile.ZipFile(path) as zipf:
+        manifest = read_manifest(zipf)
+        readme = zipf.read("readme.txt").decode('utf-8', errors='replace') if "readme.txt" in zipf.NameToInfo else ""
+    details = dict(details_from_readme(readme), **{k: v for k, v in manifest.get("session", {}).items() if k in DETAIL_FIELDS and v})
+    summary = None
+    if signature[2] is not None:
+        with open(summary_path(path), encoding='utf-8') as f:
+            summary = f.read().strip()
+
+    with open_frame_source(path) as source:
+        records = [source.record(i) for i in range(len(source))]
+        if any(not record.hash for record in records): # Archives from before frame hashes were stored
+            frames = [(record.timestamp, record.monitor, record.hash or dhash(img)) for record, img in iter_images(source)]
+        else:
+            frames = [(record.timestamp, record.monitor, record.hash) for record in records]
+    timeline = read_timeline(path)
+    return {
+        "path": path,
+        "signature": signature,
+        "details": details,
+        "summary": summary,
+        "timeline": timeline,
+        "frames": frames,
+    }
+
+
+def pack_frames(frames):
+    """(times, monitors, hashes) blobs of [(timestamp, monitor, hash)]."""
+    return (struct.pack(f"<{len(frames)}q", *(_micros(dt) for dt, _, _ in frames)),
+            bytes(monitor & 0xFF for _, monitor, _ in frames),
+            struct.pack(f"<{len(frames)}Q", *(value for _, _, value in frames)))
+
+
+class SearchIndex:
+    """The search index database. Use from one thread; open another SearchIndex for another thread."""
+    def __init__(self, path=DEFAULT_INDEX_PATH):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.db = sqlite3.connect(path, timeout=30)
+        self.db.executescript(SCHEMA)
+        self._hashes = None # Every indexed frame, loaded on the first similar-screen query
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # --- Updating ---
+
+    def update(self, directories, workers=None, on_status=None):
+        """Scans new and changed master archives under directories and drops deleted ones. Returns the paths scanned."""
+        on_status = on_status or (lambda text: None)
+        known = {path: (size, mtime, summary_mtime) for path, size, mtime, summary_mtime
+                 in self.db.execute("SELECT path, size, mtime, summary_mtime FROM archives")}
+        for path in known:
+            if not os.path.exists(path):
+                self.remove(path)
+        changed = []
+        for directory in directories:
+            for path in glob.glob(os.path.join(os.path.abspath(directory), "**", MASTER_PATTERN), recursive=True):
+                try:
+                    if known.get(path) != archive_signature(path):
+                        changed.append(path)
+                except OSError:
+                    continue
+        changed = sorted(set(changed))
+        if not changed:
+            return []
+
+        on_status(f"🔎 Indexing {len(changed)} archive(s)...")
+        scanned = []
+        if len(changed) == 1 or workers == 1:
+            for path in changed:
+                self._store_scan(path, lambda path=path: scan_archive(path), scanned, on_status)
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = {pool.submit(scan_archive, path): path for path in changed}
+                for future in as_completed(futures):
+                    self._store_scan(futures[future], future.result, scanned, on_status)
+        on_status(f"🔎 Indexed {len(scanned)} archive(s)")
+        return scanned
+
+    def _store_scan(self, path, get_scan, scanned, on_status):
+        try:
+            self.store(get_scan())
+            scanned.append(path)
+        except (OSError, zipfile.BadZipFile, ValueError, KeyError) as e: # e.g. an archive still being written
+            on_status(f"⚠️ Could not index {os.path.basename(path)}: {e}")
+
+    def store(self, scan):
+        """Adds or replaces one archive, as returned by scan_archive()."""
+        details = scan["details"]
+        timeline = scan["timeline"]
+        frames = scan["frames"]
+        with self.db:
+            self._delete(scan["path"])
+            archive_id = self.db.execute(
+                "INSERT INTO archives (path, size, mtime, summary_mtime, start, end, name, company, description, ticket_id, ticket_link,"
+                " summary, frames) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (scan["path"], *scan["signature"],
+                 timeline[0][1].isoformat() if timeline else None, timeline[-1][1].isoformat() if timeline else None,
+                 *(details.get(field, "") for field in DETAIL_FIELDS), scan["summary"], len(frames))).lastrowid
+            self.db.executemany("INSERT INTO events VALUES (?, ?, ?, ?)",
+                                [(archive_id, dt.isoformat(), event, comment) for event, dt, comment in timeline])
+            texts = [(archive_id, field, None, details[field]) for field in DETAIL_FIELDS if details.get(field)]
+            texts += [(archive_id, event, dt.isoformat(), comment) for event, dt, comment in timeline if comment]
+            if scan["summary"]:
+                texts.append((archive_id, "summary", None, scan["summary"]))
+            self.db.executemany("INSERT INTO text VALUES (?, ?, ?, ?)", texts)
+            if frames:
+                self.db.execute("INSERT INTO frames VALUES (?, ?, ?, ?)", (archive_id, *pack_frames(frames)))
+        self._hashes = None
+
+    def remove(self, path):
+        with self.db:
+            self._delete(path)
+        self._hashes = None
+
+    def _delete(self, path):
+        row = self.db.execute("SELECT id FROM archives WHERE path = ?", (path,)).fetchone()
+        if row:
+            for table, column in (("archives", "id"), ("events", "archive_id"), ("frames", "archive_id"), ("text", "archive_id")):
+                self.db.execute(f"DELETE FROM {table} WHERE {column} = ?", row)
+
+    # --- Queries ---
+
+    def sessions(self):
+        """Every indexed session, newest first."""
+        return [Session(*row) for row in self.db.execute(
+            "SELECT path, start, end, name, description, ticket_id, ticket_link, frames FROM archives ORDER BY start DESC")]
+
+    def ticket(self, ticket):
+        """Sessions recorded for a ticket ID, or mentioning it in the ticket link, description, a comment or the summary."""
+        ids = {row[0] for row in self.db.execute(
+            "SELECT id FROM archives WHERE ticket_id = ? COLLATE NOCASE OR instr(lower(ticket_link), lower(?)) > 0", (ticket, ticket))}
+        ids.update(row[0] for row in self.db.execute("SELECT archive_id FROM text WHERE text MATCH ?", (_phrase_query(ticket),)))
+        if not ids:
+            return []
+        return [Session(*row) for row in self.db.execute(
+            f"SELECT path, start, end, name, description, ticket_id, ticket_link, frames FROM archives"
+            f" WHERE id IN ({','.join('?' * len(ids))}) ORDER BY start DESC", sorted(ids))]
+
+    def search(self, text, limit=DEFAULT_LIMIT):
+        """Details, comments and summaries containing every word of text, best match first."""
+        return [TextHit(*row) for row in self.db.execute(
+            "SELECT archives.path, text.field, text.time, snippet(text, 3, '[', ']', '...', 12) FROM text"
+            " JOIN archives ON archives.id = text.archive_id WHERE text MATCH ? ORDER BY rank LIMIT ?", (_phrase_query(text), limit))]
+
+    def similar(self, query_hash, max_distance=DEFAULT_MAX_DISTANCE, limit=DEFAULT_LIMIT):
+        """Sessions showing a screen within max_distance dHash bits of query_hash, closest first."""
+        archive_ids, times, hashes = self._load_hashes()
+        if np is not None:
+            distances = np.bitwise_count(hashes ^ np.uint64(query_hash)) if hasattr(np, "bitwise_count") else _popcount(hashes ^ np.uint64(query_hash))
+            matches = np.flatnonzero(distances <= max_distance).tolist()
+        else:
+            distances = [(value ^ query_hash).bit_count() for value in hashes]
+            matches = [i for i, distance in enumerate(distances) if distance <= max_distance]
+
+        per_archive = {}
+        for i in matches:
+            archive_id, distance, micros = int(archive_ids[i]), int(distances[i]), int(times[i])
+            best, first, last, count = per_archive.get(archive_id, (distance, micros, micros, 0))
+            per_archive[archive_id] = (min(best, distance), min(first, micros), max(last, micros), count + 1)
+        paths = dict(self.db.execute("SELECT id, path FROM archives"))
+        hits = [ScreenHit(paths[archive_id], best, _EPOCH + timedelta(microseconds=first), _EPOCH + timedelta(microseconds=last), count)
+                for archive_id, (best, first, last, count) in per_archive.items() if archive_id in paths]
+        return sorted(hits, key=lambda hit: (hit.distance, hit.first_seen))[:limit]
+
+    def _load_hashes(self):
+        """(archive ids, capture times, hashes) of every indexed frame, as NumPy arrays or else Python arrays."""
+        if self._hashes is None:
+            ids, counts, times, hashes = [], [], array('q'), array('Q')
+            for archive_id, frame_times, frame_hashes in self.db.execute("SELECT archive_id, times, hashes FROM frames"):
+                ids.append(archive_id)
+                counts.append(len(frame_hashes) // 8)
+                times.frombytes(frame_times)
+                hashes.frombytes(frame_hashes)
+            if np is not None:
+                self._hashes = (np.repeat(np.array(ids, dtype=np.int64), counts), np.frombuffer(times, dtype=np.int64),
+                                np.frombuffer(hashes, dtype=np.uint64))
+            else:
+                self._hashes = ([archive_id for archive_id, count in zip(ids, counts) for _ in range(count)], times, hashes)
+        return self._hashes
+
+
+def _phrase_query(text):
+    """FTS5 query matching every word of text, so ticket IDs like ABC-123 need no quoting."""
+    return " ".join('"' + word.replace('"', '""') + '"' for word in text.split())
+
+
+def _popcount(values):
+    """Set bits per element of a uint64 array, for NumPy versions without bitwise_count."""
+    table = np.array([bin(n).count("1") for n in range(256)], dtype=np.uint8)
+    return table[values.view(np.uint8)].reshape(-1, 8).sum(axis=1)
@@ -0,0 +1,205 @@
+import os
+import json
+import queue
+import struct
+import threading
+import zipfile
+from datetime import datetime
+
+FRAME_PREFIX = "ss_"
+FRAME_TIMESTAMP_FORMAT = "%Y%m%d_%H%M%S_%f"
+FRAME_METADATA_ENTRY = "frames.json"
+_MASK_USE_DATA_DESCRIPTOR = 0x08
+_COPY_CHUNK = 1024 * 1024
+
+
+class SegmentWriter:
+    """Append-only ZIP for the segment being recorded."""
+    def __init__(self, path, journal=None):
+        self.path = path
+        self.journal = journal
+        self.frames = 0
+        self.bytes_written = 0
+        self.metadata = {}
+        self._lock = threading.Lock()
+        self._zip = zipfile.ZipFile(path, 'w', zipfile.ZIP_STORED)
+        if journal:
+            journal.attach(self._zip.fp)
+
+    def add_frame(self, name, data, timestamp, metadata=None):
+        """Appends an encoded frame. Returns False if the segment has already been closed."""
+        info = zipfile.ZipInfo(name, date_time=timestamp.timetuple()[:6])
+        info.compress_type = zipfile.ZIP_STORED
+        with self._lock:
+            if self._zip is None:
+                return False
+            self._zip.writestr(info, data)
+            self.frames += 1
+            self.bytes_written += len(data)
+            if metadata:
+                self.metadata[name] = metadata
+        if self.journal:
+            self.journal.append({
+                "type": "frame",
+                "segment": self.path,
+                "name": name,
+                "time": timestamp.isoformat(),
+                "offset": info.header_offset,
+                "size": info.compress_size,
+                "file_size": info.file_size,
+                "crc": info.CRC,
+                "metadata": metadata,
+            })
+        return True
+
+    def add_text(self, name, text):
+        with self._lock:
+            self._zip.writestr(name, text, compress_type=zipfile.ZIP_DEFLATED)
+
+    def add_image(self, name, data):
+        """Adds an already compressed image that isn't a frame (e.g. a contact sheet)."""
+        with self._lock:
+            self._zip.writestr(name, data, compress_type=zipfile.ZIP_STORED)
+
+    def close(self):
+        with self._lock:
+            if self._zip is not None:
+                if self.metadata:
+                    self._zip.writestr(FRAME_METADATA_ENTRY, json.dumps(self.metadata), compress_type=zipfile.ZIP_DEFLATED)
+                if self.journal:
+                    self.journal.detach(self._zip.fp)
+                self._zip.close()
+                self._zip = None
+
+
+
+class SegmentArchiver:
+    """Finishes closed-off segments on a background thread, so rotating or pausing never waits for it."""
+    def __init__(self, archive, max_pending=2):
+        self.archive = archive
+        self._queue = queue.Queue(max_pending)
+        self._pending = 0
+        self._lock = threading.Condition()
+        self._thread = None
+
+    def submit(self, *job):
+        with self._lock:
+            self._pending += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+        self._queue.put(job)
+
+    def join(self, timeout=None):
+        """Waits until every submitted job is done. Returns False if timeout passed first."""
+        with self._lock:
+            return self._lock.wait_for(lambda: self._pending == 0, timeout)
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            try:
+                self.archive(*job)
+            finally:
+                with self._lock:
+                    self._pending -= 1
+                    self._lock.notify_all()
+
+def frame_timestamp(name):
+    """Capture time encoded in a frame entry name (ss_YYYYmmdd_HHMMSS_ffffff.*), or None."""
+    base = name.rsplit("/", 1)[-1]
+    if not base.startswith(FRAME_PREFIX):
+        return None
+    try:
+        return datetime.strptime(base[len(FRAME_PREFIX):len(FRAME_PREFIX) + 22], FRAME_TIMESTAMP_FORMAT)
+    except ValueError:
+        return None
+
+
+# copy_entry_raw() writes through these internals of zipfile.ZipFile (stable from Python 3.6 on)
+_RAW_COPY_ATTRIBUTES = ("fp", "_lock", "_writing", "_seekable", "start_dir", "_didModify", "_writecheck", "filelist", "NameToInfo")
+
+
+def _supports_raw_copy(zipf):
+    return all(hasattr(zipf, name) for name in _RAW_COPY_ATTRIBUTES)
+
+
+def copy_entry_raw(src, info, dst, arcname):
+    """Copies an entry's compressed bytes between open ZipFiles without recompressing; returns its data offset in dst."""
+    new_info = zipfile.ZipInfo(arcname, date_time=info.date_time)
+    new_info.compress_type = info.compress_type
+    new_info.external_attr = info.external_attr
+    if not (_supports_raw_copy(src) and _supports_raw_copy(dst)):
+        dst.writestr(new_info, src.read(info))
+        return new_info.header_offset + len(new_info.FileHeader())
+
+    new_info.CRC = info.CRC
+    new_info.compress_size = info.compress_size
+    new_info.file_size = info.file_size
+    # Sizes and CRC are known up front, so the copy never needs a data descriptor
+    new_info.flag_bits = info.flag_bits & ~_MASK_USE_DATA_DESCRIPTOR
+
+    with src._lock, dst._lock:
+        src.fp.seek(info.header_offset)
+        header = src.fp.read(zipfile.sizeFileHeader)
+        if header[:4] != zipfile.stringFileHeader:
+            raise zipfile.BadZipFile(f"Bad local header for {info.filename}")
+        name_len, extra_len = struct.unpack("<HH", header[26:30])
+        src.fp.seek(info.header_offset + zipfile.sizeFileHeader + name_len + extra_len)
+
+        if dst._writing:
+            raise ValueError("Can't copy into a ZIP file while another write handle is open on it.")
+        if dst._seekable:
+            dst.fp.seek(dst.start_dir)
+        new_info.header_offset = dst.fp.tell()
+        dst._writecheck(new_info)
+        dst._didModify = True
+        header = new_info.FileHeader()
+        dst.fp.write(header)
+        remaining = info.compress_size
+        while remaining:
+            chunk = src.fp.read(min(remaining, _COPY_CHUNK))
+            if not chunk:
+                raise zipfile.BadZipFile(f"Truncated entry {info.filename}")
+            dst.fp.write(chunk)
+            remaining -= len(chunk)
+        dst.start_dir = dst.fp.tell()
+        dst.filelist.append(new_info)
+        dst.NameToInfo[arcname] = new_info
+    return new_info.header_offset + len(header)
+
+
+def rebuild_segment(path, entries):
+    """Writes the central directory of a segment that was never closed from its journaled entries; returns the frames recovered."""
+    file_size = os.path.getsize(path)
+    infos = []
+    end = 0
+    # Frames are journaled after the writer lock is released, so records can be out of file order
+    for entry in sorted(entries, key=lambda entry: entry["offset"]):
+        dt = datetime.fromisoformat(entry["time"])
+        info = zipfile.ZipInfo(entry["name"], date_time=dt.timetuple()[:6])
+        info.compress_type = zipfile.ZIP_STORED
+        info.external_attr = 0o600 << 16
+        info.header_offset = entry["offset"]
+        info.compress_size = entry["size"]
+        info.file_size = entry["file_size"]
+        info.CRC = entry["crc"]
+        data_end = info.header_offset + zipfile.sizeFileHeader + len(info.filename.encode('utf-8')) + info.compress_size
+        if data_end > file_size:
+            continue # Journaled, but the data never made it to disk
+        infos.append(info)
+        end = max(end, data_end)
+
+    with open(path, 'r+b') as fp:
+        fp.seek(end)
+        fp.truncate()
+        # A ZipFile opened for writing at this position appends just the central directory
+        with zipfile.ZipFile(fp, 'w') as zipf:
+            for info in infos:
+                zipf.filelist.append(info)
+                zipf.NameToInfo[info.filename] = info
+            recovered = {info.filename for info in infos}
+            metadata = {entry["name"]: entry["metadata"] for entry in entries if entry.get("metadata") and entry["name"] in recovered}
+            if metadata:
+                zipf.writestr(FRAME_METADATA_ENTRY, json.dumps(metadata), compress_type=zipfile.ZIP_DEFLATED)
+    return len(infos)
@@ -0,0 +1,187 @@
+import hashlib
+import os
+import queue
+import threading
+import time
+
+SUMMARY_SUFFIX = ".summary.txt" # Sidecar next to the master archive: MASTER_....zip -> MASTER_....summary.txt
+DEFAULT_TIMEOUT = 30.0 # Seconds per attempt
+DEFAULT_RETRIES = 2
+RETRY_BACKOFF = 2.0 # Seconds before the first retry, doubled for each further one
+GEMINI_MODEL = "gemini-2.5-flash"
+
+PROMPT = (
+    "You are a reporter of work done to clients. The client name is not mention in the session log. Only details on the supporter and what the supporter did."
+    "Based on the closely examine the session log to determine what was doen, provide a summary in correct professional English South Africa. "
+    "The summary must be a maximum of 50 words. "
+    "Mention how much time was actively spent based of the capturing time and what the work was about and any challenges noted.\n\n"
+    "--- SESSION LOG ---\n"
+)
+
+
+class GeminiBackend:
+    """Summaries from the Gemini API. The client is created on first use and reused."""
+    name = "gemini"
+
+    def __init__(self, api_key, model=GEMINI_MODEL, timeout=DEFAULT_TIMEOUT):
+        self.api_key = api_key
+        self.model = model
+        self.timeout = timeout
+        self._client = None
+        self._lock = threading.Lock()
+
+    def _get_client(self):
+        with self._lock:
+            if self._client is None:
+                from google import genai # Slow to import, so only loaded when a summary is actually requested
+                self._client = genai.Client(api_key=self.api_key, http_options={"timeout": int(self.timeout * 1000)})
+            return self._client
+
+    def __call__(self, readme):
+        response = self._get_client().models.generate_content(model=self.model, contents=f"{PROMPT}{readme}")
+        return response.text.strip()
+
+
+class StubBackend:
+    """Local stand-in that needs no network: the first lines of the readme, after an optional delay."""
+    name = "stub"
+
+    def __init__(self, lines=3, delay=0.0):
+        self.lines = lines
+        self.delay = delay
+        self.calls = 0
+
+    def __call__(self, readme):
+        self.calls += 1
+        if self.delay:
+            time.sleep(self.delay)
+        return "Stub summary: " + " / ".join(line.strip() for line in readme.splitlines()[:self.lines] if line.strip())
+
+
+def make_backend(name, timeout=DEFAULT_TIMEOUT):
+    """Backend for the Summary setting: "gemini", "stub" or "off" (None). Raises ValueError if it can't be used."""
+    if name == "off":
+        return None
+    if name == "stub":
+        return StubBackend()
+    if name == "gemini":
+        from dotenv import load_dotenv
+        load_dotenv()
+        api_key = os.getenv("GEMINI_API_KEY")
+        if not api_key:
+            raise ValueError("GEMINI_API_KEY not found.")
+        return GeminiBackend(api_key, timeout=timeout)
+    raise ValueError(f"Unknown summary backend: {name}")
+
+
+def summary_path(master_zip_filepath):
+    return os.path.splitext(master_zip_filepath)[0] + SUMMARY_SUFFIX
+
+
+class SummaryWorker:
+    """Summarizes session readmes on a background thread and writes each summary next to its master archive."""
+    def __init__(self, backend, cache_dir, timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES, on_status=None):
+        self.backend = backend
+        self.cache_dir = cache_dir
+        self.timeout = timeout
+        self.retries = retries
+        self.on_status = on_status or (lambda text: None)
+        self.requests = 0 # Backend calls made, for checking the cache
+        self._queue = queue.Queue()
+        self._pending = 0
+        self._lock = threading.Condition()
+        self._thread = None
+
+    def submit(self, master_zip_filepath, readme):
+        """Queues a summary for the archive and returns immediately."""
+        with self._lock:
+            self._pending += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+        self._queue.put((master_zip_filepath, readme))
+
+    def pending(self):
+        with self._lock:
+            return self._pending
+
+    def join(self, timeout=None):
+        """Waits until every queued summary is done. Returns False if timeout passed first."""
+        with self._lock:
+            return self._lock.wait_for(lambda: self._pending == 0, timeout)
+
+    def _run(self):
+        while True:
+            master_zip_filepath, readme = self._queue.get()
+            try:
+                self._attach(master_zip_filepath, readme)
+            except Exception as e:
+                self.on_status(f"⚠️ AI Summary failed: {e}")
+            finally:
+                with self._lock:
+                    self._pending -= 1
+                    self._lock.notify_all()
+
+    def _attach(self, master_zip_filepath, readme):
+        self.on_status("🤖 Generating AI summary...")
+        summary = self.summarize(readme)
+        if summary is None:
+            return
+        path = summary_path(master_zip_filepath)
+        _write_atomic(path, summary + "\n")
+        self.on_status(f"🤖 AI summary saved: {os.path.basename(path)}")
+
+    def summarize(self, readme):
+        """Cached summary of readme, or None if every attempt failed."""
+        key = self._key(readme)
+        cache_path = key and os.path.join(self.cache_dir, f"{key}.txt")
+        if cache_path and os.path.exists(cache_path):
+            with open(cache_path, encoding='utf-8') as f:
+                return f.read()
+
+        for attempt in range(self.retries + 1):
+            if attempt:
+                time.sleep(RETRY_BACKOFF * 2 ** (attempt - 1))
+            try:
+                summary = self._call_with_timeout(readme)
+            except Exception as e:
+                self.on_status(f"⚠️ AI Summary attempt {attempt + 1}/{self.retries + 1} failed: {e}")
+                continue
+            if cache_path:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                _write_atomic(cache_path, summary)
+            return summary
+        return None
+
+    def _key(self, readme):
+        """Cache key of readme, or None for a backend without a name (e.g. a lambda), whose summaries aren't cached."""
+        name = getattr(self.backend, "name", None)
+        if not name:
+            return None
+        return hashlib.sha256(f"{name}\n{readme}".encode('utf-8')).hexdigest()
+
+    def _call_with_timeout(self, readme):
+        result = {}
+
+        def call():
+            try:
+                result["summary"] = self.backend(readme)
+            except Exception as e:
+                result["error"] = e
+
+        self.requests += 1
+        attempt = threading.Thread(target=call, daemon=True)
+        attempt.start()
+        attempt.join(self.timeout)
+        if attempt.is_alive():
+            raise TimeoutError(f"no response after {self.timeout:g}s")
+        if "error" in result:
+            raise result["error"]
+        return result["summary"]
+
+
+def _write_atomic(path, text):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
@@ -0,0 +1,132 @@
+"""Keyframe + changed-tile delta storage for grayscale screenshots."""
+import io
+import struct
+
+from PIL import Image, ImageChops
+
+KEYFRAME_SUFFIX = ".key.webp"
+DELTA_SUFFIX = ".delta"
+DEFAULT_GRID = (10, 10) # 50x31 tiles on a 500x310 thumbnail
+
+_MAGIC = b"CCTD"
+_VERSION = 1
+_HEADER = struct.Struct("<4sBBBHH") # magic, version, columns, rows, width, height
+
+
+def is_tile_frame(name):
+    return name.endswith(KEYFRAME_SUFFIX) or name.endswith(DELTA_SUFFIX)
+
+
+def _tile_boxes(size, grid):
+    width, height = size
+    cols, rows = grid
+    boxes = []
+    for row in range(rows):
+        for col in range(cols):
+            boxes.append((col * width // cols, row * height // rows,
+                          (col + 1) * width // cols, (row + 1) * height // rows))
+    return boxes
+
+
+def _encode_lossless(img):
+    buffer = io.BytesIO()
+    img.save(buffer, 'webp', lossless=True)
+    return buffer.getvalue()
+
+
+class TileEncoder:
+    """Turns a stream of equally sized grayscale images into keyframes and tile deltas."""
+    def __init__(self, keyframe_interval=30, grid=DEFAULT_GRID):
+        self.keyframe_interval = max(1, int(keyframe_interval))
+        self.grid = grid
+        self._reference = None
+        self._since_keyframe = 0
+
+    def reset(self):
+        """Makes the next frame a keyframe, e.g. at the start of a new segment."""
+        self._reference = None
+
+    def next_suffix(self, img):
+        """The file suffix encode() will use for img."""
+        if (self._reference is None or self._reference.size != img.size
+                or self._since_keyframe >= self.keyframe_interval - 1):
+            return KEYFRAME_SUFFIX
+        return DELTA_SUFFIX
+
+    def encode(self, img):
+        """Returns (suffix, data) for the next frame. Frames must be passed in capture order."""
+        if self.next_suffix(img) == KEYFRAME_SUFFIX:
+            self._reference = img
+            self._since_keyframe = 0
+            return KEYFRAME_SUFFIX, _encode_lossless(img)
+
+        diff = ImageChops.difference(img, self._reference)
+        boxes = _tile_boxes(img.size, self.grid)
+        changed = [i for i, box in enumerate(boxes) if diff.crop(box).getbbox() is not None]
+
+        bitmap = bytearray((len(boxes) + 7) // 8)
+        for i in changed:
+            bitmap[i // 8] |= 1 << (i % 8)
+        header = _HEADER.pack(_MAGIC, _VERSION, self.grid[0], self.grid[1], img.size[0], img.size[1])
+
+        payload = b""
+        if changed:
+            # Pack the changed tiles into a mosaic laid out on the same grid width
+            tile_w = max(box[2] - box[0] for box in boxes)
+            tile_h = max(box[3] - box[1] for box in boxes)
+            cols = self.grid[0]
+            rows_used = (len(changed) + cols - 1) // cols
+            mosaic = Image.new('L', (tile_w * min(len(changed), cols), tile_h * rows_used))
+            for slot, i in enumerate(changed):
+                mosaic.paste(img.crop(boxes[i]), ((slot % cols) * tile_w, (slot // cols) * tile_h))
+            payload = _encode_lossless(mosaic)
+
+        self._reference = img
+        self._since_keyframe += 1
+        return DELTA_SUFFIX, header + bytes(bitmap) + payload
+
+
+class TileDecoder:
+    """Rebuilds frames from keyframes and deltas fed in capture order."""
+    def __init__(self):
+        self._current = None
+
+    def decode(self, name, data):
+        if name.endswith(KEYFRAME_SUFFIX):
+            img = Image.open(io.BytesIO(data))
+            img.load()
+            self._current = img.convert('L')
+            return self._current.copy()
+        if not name.endswith(DELTA_SUFFIX):
+            raise ValueError(f"Not a tile frame: {name}")
+        if self._current is None:
+            raise ValueError(f"Delta frame {name} has no preceding keyframe")
+
+        magic, version, cols, rows, width, height = _HEADER.unpack_from(data)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError(f"Unsupported delta frame: {name}")
+        if self._current.size != (width, height):
+            raise ValueError(f"Delta frame {name} does not match its keyframe size")
+        boxes = _tile_boxes((width, height), (cols, rows))
+        bitmap_len = (len(boxes) + 7) // 8
+        bitmap = data[_HEADER.size:_HEADER.size + bitmap_len]
+        changed = [i for i in range(len(boxes)) if bitmap[i // 8] & (1 << (i % 8))]
+
+        if changed:
+            mosaic = Image.open(io.BytesIO(data[_HEADER.size + bitmap_len:]))
+            mosaic.load()
+            mosaic = mosaic.convert('L')
+            tile_w = max(box[2] - box[0] for box in boxes)
+            tile_h = max(box[3] - box[1] for box in boxes)
+            for slot, i in enumerate(changed):
+                left, top, right, bottom = boxes[i]
+                x, y = (slot % cols) * tile_w, (slot // cols) * tile_h
+                self._current.paste(mosaic.crop((x, y, x + right - left, y + bottom - top)), (left, top))
+        return self._current.copy()
+
+
+def decode_sequence(entries):
+    """Yields (name, image) for (name, data) pairs of one segment, sorted by capture time."""
+    decoder = TileDecoder()
+    for name, data in sorted(entries, key=lambda entry: entry[0]):
+        yield name, decoder.decode(name, data)
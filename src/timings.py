@@ -0,0 +1,95 @@
+import bisect
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+# Upper bucket edges in milliseconds; the last bucket collects everything slower.
+BUCKET_EDGES_MS = (0.1, 0.2, 0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+TIMINGS_ENTRY = "timings.json"
+
+# Stages in capture order, for display. Others are shown after these.
+STAGE_ORDER = ("grab", "queue", "frombytes", "grayscale", "resize", "thumbnail", "change", "encode", "write", "frame",
+               "archive", "master")
+
+
+class StageHistogram:
+    """Count, total, max and a fixed log-scale histogram of one stage's durations."""
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * (len(BUCKET_EDGES_MS) + 1)
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.buckets[bisect.bisect_left(BUCKET_EDGES_MS, seconds * 1000)] += 1
+
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, fraction):
+        """Upper edge (in seconds) of the bucket holding the given fraction of samples."""
+        if not self.count:
+            return 0.0
+        target = fraction * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if seen >= target:
+                return min(BUCKET_EDGES_MS[i] / 1000, self.max) if i < len(BUCKET_EDGES_MS) else self.max
+        return self.max
+
+    def to_dict(self):
+        labels = [f"<={edge:g}ms" for edge in BUCKET_EDGES_MS] + [f">{BUCKET_EDGES_MS[-1]:g}ms"]
+        return {
+            "count": self.count,
+            "mean_ms": round(self.mean() * 1000, 3),
+            "p50_ms": round(self.percentile(0.5) * 1000, 3),
+            "p95_ms": round(self.percentile(0.95) * 1000, 3),
+            "max_ms": round(self.max * 1000, 3),
+            "histogram": {label: n for label, n in zip(labels, self.buckets) if n},
+        }
+
+
+class StageTimings:
+    """Thread-safe per-stage timing histograms of one capture session."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages = {}
+
+    def add(self, stage, seconds):
+        with self._lock:
+            if stage not in self._stages:
+                self._stages[stage] = StageHistogram()
+            self._stages[stage].add(seconds)
+
+    @contextmanager
+    def time(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - start)
+
+    def _ordered(self):
+        with self._lock:
+            stages = dict(self._stages)
+        order = [name for name in STAGE_ORDER if name in stages] + sorted(set(stages) - set(STAGE_ORDER))
+        return [(name, stages[name]) for name in order]
+
+    def summary_line(self):
+        """Short "stage mean/p95" overview for the status area."""
+        return "  ".join(f"{name} {hist.mean() * 1000:.1f}/{hist.percentile(0.95) * 1000:g}ms"
+                         for name, hist in self._ordered() if name not in ("archive", "master"))
+
+    def to_dict(self):
+        return {name: hist.to_dict() for name, hist in self._ordered()}
+
+    def to_json(self, **sections):
+        """The stages, plus the stages of each other StageTimings in sections (e.g. preroll=...) that recorded any."""
+        data = {"unit": "ms", "buckets_ms": list(BUCKET_EDGES_MS), "stages": self.to_dict()}
+        data.update((name, timings.to_dict()) for name, timings in sections.items() if timings and timings.to_dict())
+        return json.dumps(data, indent=2)
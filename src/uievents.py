@@ -0,0 +1,46 @@
+"""Event channel from the capture engine's threads to the Tk thread."""
+import collections
+import time
+
+DEFAULT_TICK_MS = 100 # How often the GUI drains the channel
+RATE_WINDOW = 5.0 # Seconds over which RateMeter averages
+
+
+class EventChannel:
+    """Many producer threads, one consumer (the Tk thread). post() never blocks."""
+    def __init__(self):
+        self._events = collections.deque()
+
+    def post(self, kind, value):
+        self._events.append((kind, value))
+
+    def poster(self, kind):
+        """A callback that posts its argument as kind, e.g. for CaptureEngine(on_status=channel.poster("status"))."""
+        return lambda value: self.post(kind, value)
+
+    def drain(self):
+        """Removes the waiting events and returns the latest value of each kind, in the order they last occurred."""
+        latest = {}
+        for _ in range(len(self._events)):
+            kind, value = self._events.popleft()
+            latest.pop(kind, None)
+            latest[kind] = value
+        return latest
+
+
+class RateMeter:
+    """Rate of a growing total over the last few seconds, e.g. frames/sec from the frame count."""
+    def __init__(self, window=RATE_WINDOW):
+        self.window = window
+        self._samples = collections.deque() # (time.monotonic(), total)
+
+    def update(self, total, now=None):
+        """Records the current total and returns the rate per second over the window."""
+        now = time.monotonic() if now is None else now
+        if self._samples and total < self._samples[-1][1]:
+            self._samples.clear() # A new session started counting from zero
+        self._samples.append((now, total))
+        while len(self._samples) > 2 and now - self._samples[1][0] >= self.window:
+            self._samples.popleft()
+        first_time, first_total = self._samples[0]
+        return (total - first_total) / (now - first_time) if now > first_time else 0.0
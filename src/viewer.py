@@ -0,0 +1,275 @@
+import os
+import queue
+import threading
+import tkinter as tk
+from collections import OrderedDict
+from tkinter import ttk, messagebox
+
+from PIL import ImageTk
+
+from catalog import open_frame_source, read_timeline
+
+DEFAULT_CACHE_MB = 64
+PREFETCH_RADIUS = 8 # Frames decoded ahead of and behind the current position
+POLL_MS = 30
+PLAY_MS = 200
+MARKER_COLORS = {"Session Start": "#28a745", "Resume": "#28a745", "Pause": "#f0ad4e", "Session Stop": "#dc3545"}
+
+
+class LRUImageCache:
+    """Thread-safe cache of decoded frames, bounded by the memory their pixels use."""
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.bytes_used = 0
+        self._images = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _size(img):
+        return img.width * img.height * len(img.getbands())
+
+    def get(self, key):
+        with self._lock:
+            img = self._images.get(key)
+            if img is not None:
+                self._images.move_to_end(key)
+            return img
+
+    def put(self, key, img):
+        with self._lock:
+            if key in self._images:
+                self._images.move_to_end(key)
+                return
+            self._images[key] = img
+            self.bytes_used += self._size(img)
+            while self.bytes_used > self.max_bytes and len(self._images) > 1:
+                _, evicted = self._images.popitem(last=False)
+                self.bytes_used -= self._size(evicted)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._images
+
+
+class FrameLoader:
+    """Background decoder: the wanted frame first, then its neighbours."""
+    def __init__(self, source, cache, radius=PREFETCH_RADIUS):
+        self.source = source
+        self.cache = cache
+        self.radius = radius
+        self.results = queue.Queue() # (index, error) of each requested frame for the Tk thread; error is None once it is cached
+        self._wanted = None
+        self._cond = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="replay-prefetch", daemon=True)
+        self._thread.start()
+
+    def request(self, index):
+        with self._cond:
+            self._wanted = index
+            self._cond.notify()
+
+    def close(self):
+        """Stops the loader and waits for a decode in progress, so the source can be closed afterwards."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
+
+    def _plan(self, index):
+        order = [index]
+        for offset in range(1, self.radius + 1):
+            order += [index + offset, index - offset]
+        return [i for i in order if 0 <= i < len(self.source)]
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._wanted is None and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                index, self._wanted = self._wanted, None
+            for i in self._plan(index):
+                with self._cond:
+                    if self._wanted is not None or self._closed:
+                        break # A newer position was requested
+                if i in self.cache:
+                    continue
+                try:
+                    self.cache.put(i, self.source.image(i))
+                except Exception as e:
+                    if i == index: # A neighbour that fails is decoded (and reported) again once it is requested
+                        self.results.put((i, str(e)))
+                    continue
+                if i == index:
+                    self.results.put((i, None))
+
+
+class ReplayViewer(tk.Toplevel):
+    """Timeline/scrubber window for reviewing a master archive."""
+    def __init__(self, parent, archive_path, cache_mb=DEFAULT_CACHE_MB):
+        super().__init__(parent)
+        self.title(f"Session Replay - {os.path.basename(archive_path)}")
+        self.source = open_frame_source(archive_path)
+        self.timeline = read_timeline(archive_path)
+        self.cache = LRUImageCache(cache_mb * 1024 * 1024)
+        self.loader = FrameLoader(self.source, self.cache)
+        self.position = tk.IntVar(value=0)
+        self.info_text = tk.StringVar()
+        self.playing = False
+        self._photo = None
+        self._poll_id = None
+        self._play_id = None
+
+        self._create_widgets()
+        self.protocol("WM_DELETE_WINDOW", self.close)
+        self.bind("<Left>", lambda event: self.step(-1))
+        self.bind("<Right>", lambda event: self.step(1))
+        self.bind("<space>", lambda event: self.toggle_play())
+
+        if not len(self.source):
+            self.info_text.set("This archive contains no frames.")
+            return
+        self.show(0)
+        self._poll_id = self.after(POLL_MS, self._poll)
+
+    def _create_widgets(self):
+        main_frame = ttk.Frame(self, padding="10")
+        main_frame.pack(fill=tk.BOTH, expand=True)
+
+        self.image_label = ttk.Label(main_frame, anchor=tk.CENTER)
+        self.image_label.pack(fill=tk.BOTH, expand=True)
+
+        self.markers = tk.Canvas(main_frame, height=18, highlightthickness=0)
+        self.markers.pack(fill=tk.X, pady=(5, 0))
+        self.markers.bind("<Configure>", lambda event: self._draw_markers())
+        self.markers.bind("<Button-1>", self._on_marker_click)
+
+        self.scrubber = ttk.Scale(main_frame, from_=0, to=max(0, len(self.source) - 1), orient=tk.HORIZONTAL,
+                                  command=lambda value: self.show(int(float(value))))
+        self.scrubber.pack(fill=tk.X)
+
+        controls = ttk.Frame(main_frame)
+        controls.pack(fill=tk.X, pady=(5, 0))
+        ttk.Button(controls, text="◀", width=4, command=lambda: self.step(-1)).pack(side=tk.LEFT)
+        self.play_button = ttk.Button(controls, text="Play", width=8, command=self.toggle_play)
+        self.play_button.pack(side=tk.LEFT, padx=5)
+        ttk.Button(controls, text="▶", width=4, command=lambda: self.step(1)).pack(side=tk.LEFT)
+        ttk.Label(controls, textvariable=self.info_text, anchor=tk.W).pack(side=tk.LEFT, padx=10, fill=tk.X, expand=True)
+
+    def _time_range(self):
+        start = self.source.record(0).timestamp
+        end = self.source.record(len(self.source) - 1).timestamp
+        if self.timeline:
+            start = min(start, self.timeline[0][1])
+            end = max(end, self.timeline[-1][1])
+        return start, max(end, start)
+
+    def _x_for(self, dt, width):
+        start, end = self._time_range()
+        span = (end - start).total_seconds() or 1
+        return int((dt - start).total_seconds() / span * (width - 1))
+
+    def _draw_markers(self):
+        """Draws Pause/Resume/Start/Stop events from the session timeline above the scrubber."""
+        self.markers.delete("all")
+        if not len(self.source):
+            return
+        width = self.markers.winfo_width()
+        for event, dt, _ in self.timeline:
+            x = self._x_for(dt, width)
+            self.markers.create_line(x, 0, x, 18, fill=MARKER_COLORS.get(event, "#6c757d"), width=3)
+        x = self._x_for(self.source.record(self.position.get()).timestamp, width)
+        self.markers.create_polygon(x - 5, 18, x + 5, 18, x, 9, fill="black", tags="cursor")
+
+    def _on_marker_click(self, event):
+        """Jumps to the frame on screen at the clicked time, e.g. a Pause or Resume marker."""
+        start, end = self._time_range()
+        width = max(1, self.markers.winfo_width() - 1)
+        dt = start + (end - start) * (event.x / width)
+        index = self.source.find(dt)
+        self.show(index if index is not None else 0)
+
+    def _event_at(self, dt):
+        current = None
+        for event, event_dt, comment in self.timeline:
+            if event_dt <= dt:
+                current = (event, comment)
+        return current
+
+    def show(self, index):
+        index = max(0, min(index, len(self.source) - 1))
+        self.position.set(index)
+        if int(float(self.scrubber.get())) != index:
+            self.scrubber.set(index)
+        record = self.source.record(index)
+        text = f"{index + 1}/{len(self.source)}  {record.timestamp.strftime('%Y-%m-%d %H:%M:%S')}"
+        if record.monitor:
+            text += f"  ·  monitor {record.monitor}"
+        event = self._event_at(record.timestamp)
+        if event:
+            text += f"  ·  {event[0]}: {event[1]}"
+        self.info_text.set(text)
+        self._draw_markers()
+
+        img = self.cache.get(index)
+        if img is not None:
+            self._display(img)
+        self.loader.request(index) # Decodes the frame if needed and prefetches its neighbours
+
+    def _display(self, img):
+        self._photo = ImageTk.PhotoImage(img)
+        self.image_label.config(image=self._photo)
+
+    def _poll(self):
+        """Shows frames decoded in the background once they are ready. Runs on the Tk thread."""
+        try:
+            while True:
+                index, error = self.loader.results.get_nowait()
+                if index != self.position.get():
+                    continue
+                if error:
+                    self.info_text.set(f"{self.info_text.get()}  ·  ⚠️ Could not decode this frame: {error}")
+                    continue
+                img = self.cache.get(index)
+                if img is not None:
+                    self._display(img)
+        except queue.Empty:
+            pass
+        self._poll_id = self.after(POLL_MS, self._poll)
+
+    def step(self, delta):
+        self.show(self.position.get() + delta)
+
+    def toggle_play(self):
+        self.playing = not self.playing
+        self.play_button.config(text="Pause" if self.playing else "Play")
+        if self.playing:
+            self._play()
+
+    def _play(self):
+        if not self.playing:
+            return
+        if self.position.get() >= len(self.source) - 1:
+            self.toggle_play()
+            return
+        self.step(1)
+        self._play_id = self.after(PLAY_MS, self._play)
+
+    def close(self):
+        self.playing = False
+        for after_id in (self._poll_id, self._play_id):
+            if after_id:
+                self.after_cancel(after_id)
+        self.loader.close()
+        self.source.close()
+        self.destroy()
+
+
+def open_replay_viewer(parent, archive_path, cache_mb=DEFAULT_CACHE_MB):
+    try:
+        return ReplayViewer(parent, archive_path, cache_mb)
+    except Exception as e:
+        messagebox.showerror("Replay Error", f"Could not open {os.path.basename(archive_path)}:\n\n{e}")
+        return None
@@ -0,0 +1,38 @@
+"""Puts src/ on the path and provides an engine running against a fake screen."""
+import configparser
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+from fakes import FakeMss, fake_modules
+
+DETAILS = {"name": "Tester", "company": "", "description": "", "ticket_id": "", "ticket_link": ""}
+
+
+@pytest.fixture
+def fake_screen(monkeypatch, tmp_path):
+    """A FakeMss standing in for mss (and FakeController for the pynput mouse), with tmp_path as the working directory."""
+    sct = FakeMss((640, 400))
+    for name, module in fake_modules(sct).items():
+        monkeypatch.setitem(sys.modules, name, module)
+    monkeypatch.chdir(tmp_path)
+    return sct
+
+
+@pytest.fixture
+def make_engine(fake_screen, tmp_path):
+    """Returns a factory of CaptureEngines saving to tmp_path/out, with the given [Capture] settings."""
+    from engine import CaptureEngine
+
+    def make(**capture):
+        config = configparser.ConfigParser()
+        config.read_dict({"Capture": {"Summary": "off", "SearchIndex": "no", **capture}})
+        engine = CaptureEngine(config)
+        engine.master_save_dir = str(tmp_path / "out")
+        os.makedirs(engine.master_save_dir, exist_ok=True)
+        return engine
+    return make
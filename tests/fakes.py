@@ -0,0 +1,68 @@
+"""Display-free stand-ins for mss and pynput, for running the engine in tests."""
+import itertools
+import types
+
+import numpy as np
+
+
+class FakeScreenShot:
+    """The parts of mss.ScreenShot the app uses: size and a fresh BGRA buffer in raw."""
+    def __init__(self, bgra):
+        height, width = bgra.shape[:2]
+        self.size = (width, height)
+        self.width, self.height = width, height
+        self.raw = bytearray(bgra.tobytes())
+
+
+class FakeMss:
+    """mss.mss() replacement with monitors side by side, showing a loop of frames that each differ from the last."""
+    def __init__(self, monitor_size=(640, 400), monitors=1, frames=8, seed=1):
+        width, height = monitor_size
+        self.monitors = [{"left": 0, "top": 0, "width": width * monitors, "height": height}]
+        self.monitors += [{"left": i * width, "top": 0, "width": width, "height": height} for i in range(monitors)]
+        rng = np.random.default_rng(seed)
+        self._frames = []
+        for _ in range(frames):
+            gray = np.repeat(np.repeat(rng.integers(0, 256, (height // 8, width * monitors // 8), dtype=np.uint8), 8, 0), 8, 1)
+            bgra = np.full((height, width * monitors, 4), 255, dtype=np.uint8)
+            bgra[:gray.shape[0], :gray.shape[1], :3] = gray[:, :, None]
+            self._frames.append(bgra)
+        self.grabs = 0
+
+    def __call__(self):
+        return self # Lets an instance stand in for the mss.mss factory
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        pass
+
+    def grab(self, monitor):
+        bgra = self._frames[self.grabs % len(self._frames)]
+        self.grabs += 1
+        left, top = monitor["left"] - self.monitors[0]["left"], monitor["top"] - self.monitors[0]["top"]
+        return FakeScreenShot(bgra[top:top + monitor["height"], left:left + monitor["width"]])
+
+
+class FakeController:
+    """pynput.mouse.Controller replacement whose cursor visits the given positions in turn."""
+    def __init__(self, positions=((10, 10),)):
+        self._positions = itertools.cycle(positions)
+
+    @property
+    def position(self):
+        return next(self._positions)
+
+
+def fake_modules(sct, mouse_positions=((10, 10),)):
+    """{name: module} for sys.modules, so that mss.mss() returns sct and pynput.mouse.Controller() a FakeController."""
+    mss = types.ModuleType("mss")
+    mss.mss = sct
+    pynput = types.ModuleType("pynput")
+    pynput.mouse = types.ModuleType("pynput.mouse")
+    pynput.mouse.Controller = lambda: FakeController(mouse_positions)
+    return {"mss": mss, "pynput": pynput, "pynput.mouse": pynput.mouse}
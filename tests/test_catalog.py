@@ -0,0 +1,77 @@
+import io
+import zipfile
+from datetime import datetime, timedelta
+
+from PIL import Image
+
+from catalog import CATALOG_ENTRY, KIND_STILL, ArchiveFrameSource, FrameCatalog, FrameRecord, open_frame_source, write_stills
+
+START = datetime(2025, 1, 1, 12, 0, 0)
+
+
+def png(img):
+    out = io.BytesIO()
+    img.save(out, format="PNG")
+    return out.getvalue()
+
+
+def master_with_stills(tmp_path, count):
+    """A flat master archive holding count stills, one second apart, written in reverse time order."""
+    frames = [(FrameRecord(START + timedelta(seconds=n), 0, 0, n % 2, 0, KIND_STILL, n), Image.new('L', (8, 4), n * 10))
+              for n in range(count)]
+    path = tmp_path / "master.zip"
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as zipf:
+        write_stills(zipf, ["first", "second.zip"], frames[::-1], png, ".png")
+    return str(path)
+
+
+def test_catalog_round_trip(tmp_path):
+    with FrameCatalog(master_with_stills(tmp_path, 5)) as catalog:
+        assert len(catalog) == 5
+        assert catalog.segments == ["first", "second"]
+        for n in range(5):
+            record = catalog.record(n)
+            assert record.timestamp == START + timedelta(seconds=n)
+            assert (record.segment, record.kind, record.hash) == (n % 2, KIND_STILL, n)
+            assert catalog.image(n).getpixel((0, 0)) == n * 10
+
+
+def test_catalog_find_at_boundaries(tmp_path):
+    with FrameCatalog(master_with_stills(tmp_path, 5)) as catalog:
+        assert catalog.find(START - timedelta(microseconds=1)) is None
+        assert catalog.find(START) == 0
+        assert catalog.find(START + timedelta(seconds=2, microseconds=-1)) == 1
+        assert catalog.find(START + timedelta(seconds=2)) == 2
+        assert catalog.find(START + timedelta(seconds=4)) == 4
+        assert catalog.find(START + timedelta(days=1)) == 4
+        assert catalog.at(START - timedelta(seconds=1)) is None
+        assert catalog.at(START + timedelta(seconds=3.5))[0].hash == 3
+
+
+def test_catalog_without_frames(tmp_path):
+    path = master_with_stills(tmp_path, 0)
+    with zipfile.ZipFile(path) as zipf:
+        assert zipf.getinfo(CATALOG_ENTRY).compress_type == zipfile.ZIP_STORED
+    with FrameCatalog(path) as catalog:
+        assert len(catalog) == 0
+        assert catalog.find(START) is None
+
+
+def test_nested_master_source(tmp_path):
+    segment = io.BytesIO()
+    with zipfile.ZipFile(segment, 'w') as zipf:
+        for n in range(4):
+            zipf.writestr(f"ss_{(START + timedelta(seconds=n)).strftime('%Y%m%d_%H%M%S_%f')}.png", png(Image.new('L', (8, 4), n * 10)))
+    path = tmp_path / "MASTER_nested.zip"
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as zipf:
+        zipf.writestr("readme.txt", "readme")
+        zipf.writestr("2025-01-01-1200-1201_start.zip", segment.getvalue())
+
+    source = open_frame_source(str(path))
+    with source:
+        assert isinstance(source, ArchiveFrameSource)
+        assert source.segments == ["2025-01-01-1200-1201_start.zip"]
+        assert [source.image(i).getpixel((0, 0)) for i in (3, 0, 2, 1)] == [30, 0, 20, 10] # Backward reads too
+        assert source.find(START + timedelta(seconds=1.5)) == 1
+        [(inner, tmp)] = source._inner
+    assert inner.fp is None and tmp.closed
@@ -0,0 +1,101 @@
+import json
+import threading
+import time
+import zipfile
+
+from catalog import iter_images, open_frame_source
+from conftest import DETAILS
+from timings import TIMINGS_ENTRY
+
+
+def wait_for_frames(engine, count, timeout=10):
+    deadline = time.monotonic() + timeout
+    while engine.counters().frames < count:
+        assert time.monotonic() < deadline, "capture didn't keep enough frames"
+        time.sleep(0.02)
+
+
+def test_frame_in_flight_during_pause_stays_out_of_the_next_segment(make_engine, fake_screen):
+    engine = make_engine(Format="tiles", ChangeThreshold="0")
+    masters = []
+    engine.on_session_end = masters.append
+
+    # Hold the capture thread inside a grab while the session is paused
+    grab = fake_screen.grab
+    hold, grabbing, release = threading.Event(), threading.Event(), threading.Event()
+
+    def held_grab(monitor):
+        if hold.is_set():
+            hold.clear()
+            grabbing.set()
+            release.wait(5)
+        return grab(monitor)
+    fake_screen.grab = held_grab
+
+    engine.start(DETAILS, 0.1, "Medium", "start")
+    wait_for_frames(engine, 3)
+    hold.set()
+    assert grabbing.wait(5)
+    engine.pause("pause")
+    release.set() # The frame grabbed before the pause now goes through the pipeline
+    time.sleep(0.3)
+    kept = engine.counters().frames
+    engine.resume("resume")
+    wait_for_frames(engine, kept + 3)
+    engine.stop("stop")
+    assert engine.wait(30)
+
+    assert masters and masters[0]
+    with open_frame_source(masters[0]) as source:
+        frames = len(source)
+        decoded = sum(1 for _ in iter_images(source)) # Raises on a delta frame without its keyframe
+    assert decoded == frames == engine.counters().frames
+
+
+def test_pause_does_not_wait_for_frames_in_flight(make_engine):
+    engine = make_engine(Format="filmstrip", ChangeThreshold="0")
+    masters = []
+    engine.on_session_end = masters.append
+
+    # Hold a worker in the middle of a frame, as a slow encode would
+    thumbnail = engine._thumbnail
+    hold, working, release = threading.Event(), threading.Event(), threading.Event()
+
+    def held_thumbnail(frame, settings, timings):
+        if hold.is_set():
+            hold.clear()
+            working.set()
+            release.wait(5)
+        return thumbnail(frame, settings, timings)
+    engine._thumbnail = held_thumbnail
+
+    engine.start(DETAILS, 0.1, "Medium", "start")
+    wait_for_frames(engine, 3)
+    hold.set()
+    assert working.wait(5)
+    paused = time.monotonic()
+    assert engine.pause("pause")
+    assert time.monotonic() - paused < 1
+    release.set()
+    engine.stop("stop")
+    assert engine.wait(30)
+
+    assert masters and masters[0]
+    with open_frame_source(masters[0]) as source:
+        assert len(source) >= 3
+
+
+def test_preroll_timings_are_kept_apart(make_engine, fake_screen):
+    engine = make_engine(Burst="yes", BurstHotkey="", BurstRate="20")
+    masters = []
+    engine.on_session_end = masters.append
+    engine.start(DETAILS, 0.2, "Medium", "start")
+    wait_for_frames(engine, 3)
+    time.sleep(0.3)
+    engine.stop("stop")
+    assert engine.wait(30)
+
+    with zipfile.ZipFile(masters[0]) as zipf:
+        timings = json.loads(zipf.read(TIMINGS_ENTRY))
+    assert timings["stages"]["grab"]["count"] == engine.pipeline.submitted
+    assert timings["preroll"]["grab"]["count"] == fake_screen.grabs - engine.pipeline.submitted > 0
@@ -0,0 +1,38 @@
+import numpy as np
+from PIL import ImageChops
+
+from frames import crop_raw, thumbnail_numpy, thumbnail_pillow, to_thumbnail
+
+
+def bgra(gray):
+    pixels = np.empty(gray.shape + (4,), dtype=np.uint8)
+    pixels[:, :, :3] = gray[:, :, None]
+    pixels[:, :, 3] = 255
+    return pixels.tobytes()
+
+
+def test_fast_path_matches_pillow():
+    gray = np.random.default_rng(1).integers(0, 256, (400, 640), dtype=np.uint8)
+    fast = thumbnail_numpy(bgra(gray), (640, 400), (64, 40))
+    reference = thumbnail_pillow(bgra(gray), (640, 400), (64, 40))
+    assert np.asarray(ImageChops.difference(fast, reference)).max() <= 40 # Box average vs. LANCZOS
+
+
+def test_fast_path_with_tall_bands():
+    gray = np.full((2000, 40), 255, dtype=np.uint8) # 400 rows per band overflow 16-bit sums
+    thumb = thumbnail_numpy(bgra(gray), (40, 2000), (8, 5))
+    assert (np.asarray(thumb) == 255).all()
+
+
+def test_region_of_a_desktop():
+    gray = np.zeros((100, 300), dtype=np.uint8)
+    gray[:, 100:200] = 200 # The middle monitor
+    thumb = to_thumbnail(bgra(gray), (300, 100), thumb_size=(10, 10), region=(100, 0, 100, 100))
+    assert (np.asarray(thumb) == 200).all()
+
+
+def test_crop_raw_matches_the_region():
+    gray = np.random.default_rng(2).integers(0, 256, (50, 90), dtype=np.uint8)
+    raw, size = crop_raw(bgra(gray), (90, 50), (30, 10, 40, 20))
+    assert size == (40, 20)
+    assert raw == bgra(gray[10:30, 30:70])
@@ -0,0 +1,66 @@
+import configparser
+import io
+
+import pytest
+from PIL import Image, ImageDraw
+
+from profiles import (BUILTIN_PROFILES, CalibrationResult, EncoderProfile, calibrate, candidate_profiles, choose, describe,
+                      encode_frame, legibility, load_profiles, parse_size, save_profile)
+
+
+def text_screen(size=(160, 100)):
+    img = Image.new('L', size, 240)
+    draw = ImageDraw.Draw(img)
+    for top in range(4, size[1] - 10, 12):
+        draw.text((4, top), "ticket resolved 1234", fill=20)
+    return img
+
+
+def test_parse_size():
+    assert parse_size("640X397") == (640, 397)
+    for text in ("640", "0x10", "axb", ""):
+        with pytest.raises(ValueError):
+            parse_size(text)
+
+
+def test_saved_profile_loads_back():
+    profile = EncoderProfile("jpeg", 70, 0, False, (320, 200))
+    config = configparser.ConfigParser()
+    save_profile(config, "Small", profile, cpu_ms=1.5)
+    profiles = load_profiles(config)
+    assert profiles["Small"] == profile
+    assert profiles["Medium"] == BUILTIN_PROFILES["Medium"]
+    assert describe(profile) == "jpeg q70 320x200"
+
+    config["Profile Bad"] = {"Codec": "gif"}
+    with pytest.raises(ValueError):
+        load_profiles(config)
+
+
+@pytest.mark.parametrize("codec, lossless", [("webp", False), ("webp", True), ("jpeg", False), ("png", True)])
+def test_encode_frame_round_trip(codec, lossless):
+    img = text_screen()
+    decoded = Image.open(io.BytesIO(encode_frame(img, EncoderProfile(codec, 80, 4, lossless, img.size)))).convert('L')
+    assert decoded.size == img.size
+    if lossless:
+        assert legibility(img, decoded) == 100.0
+    else:
+        assert 20 < legibility(img, decoded) < 100
+
+
+def test_choose_within_limits_and_fallbacks():
+    result = lambda name, cpu_ms, size, score: CalibrationResult(name, cpu_ms, size, score)
+    cheap_blurry, fast, slow, big = result("a", 1, 100, 20), result("b", 2, 100, 30), result("c", 5, 90, 35), result("d", 1, 900, 40)
+    assert choose([cheap_blurry, fast, slow, big], target_bytes=500, min_legibility=28).profile == "b"
+    assert choose([cheap_blurry, big], target_bytes=500, min_legibility=28).profile == "a" # Most legible within the budget
+    assert choose([big, result("e", 9, 800, 10)], target_bytes=500).profile == "e" # Else the smallest
+
+
+def test_calibrate():
+    samples = [text_screen()]
+    candidates = candidate_profiles(samples[0].size)
+    assert all(c.size[0] <= 160 and c.size[1] <= 100 for c in candidates)
+    chosen, results = calibrate(samples, target_bytes=10 ** 6, min_legibility=0, candidates=candidates[:3])
+    assert len(results) == 3 and chosen in results
+    with pytest.raises(ValueError):
+        calibrate([])
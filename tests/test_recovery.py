@@ -0,0 +1,81 @@
+import glob
+import os
+
+from catalog import open_frame_source
+from conftest import DETAILS
+from journal import SessionJournal
+from test_engine import wait_for_frames
+
+
+def crash_before_session_end(engine):
+    """Makes the engine stop like a crash right after its master archive: the journal never gets session_end."""
+    def crashed(master_zip_filepath):
+        engine.journal.close()
+        engine.journal = None
+    engine._finish_journal = crashed
+
+
+def record_session(engine, frames=3):
+    masters = []
+    engine.on_session_end = masters.append
+    engine.start(DETAILS, 0.05, "Medium", "start")
+    wait_for_frames(engine, frames)
+    engine.stop("stop")
+    assert engine.wait(30)
+    return masters[0]
+
+
+def test_recovery_keeps_a_master_written_before_the_crash(make_engine):
+    engine = make_engine(ChangeThreshold="0")
+    crash_before_session_end(engine)
+    master = record_session(engine)
+    with open_frame_source(master) as source:
+        frames = len(source)
+    assert frames >= 3
+    assert glob.glob(os.path.join("archives", "*.journal"))
+
+    assert make_engine().recover_unfinished_sessions() == [master]
+    assert not glob.glob(os.path.join("archives", "*.journal"))
+    assert os.listdir(os.path.dirname(master)) == [os.path.basename(master)]
+    with open_frame_source(master) as source:
+        assert len(source) == frames
+
+
+def test_recovery_finishes_a_segment_closed_but_not_renamed(make_engine, monkeypatch):
+    engine = make_engine(ChangeThreshold="0")
+    engine._create_master_archive = lambda *args, **kwargs: None # Crash before the master, keeping the journal
+    replace = os.replace
+
+    def crash_on_rename(src, dst):
+        if src.endswith(".zip.part"):
+            raise OSError("crashed before the rename")
+        replace(src, dst)
+    monkeypatch.setattr(os, "replace", crash_on_rename)
+    record_session(engine)
+    frames = engine.counters().frames
+    assert glob.glob(os.path.join("archives", "*.zip.part"))
+    monkeypatch.setattr(os, "replace", replace)
+
+    [master] = make_engine().recover_unfinished_sessions()
+    with open_frame_source(master) as source:
+        assert len(source) == frames
+    assert not glob.glob(os.path.join("archives", "*.zip*"))
+
+
+def test_recovery_finishes_a_segment_whose_close_never_reached_the_journal(make_engine, monkeypatch):
+    engine = make_engine(ChangeThreshold="0")
+    engine._create_master_archive = lambda *args, **kwargs: None
+    append = SessionJournal.append
+
+    def crash_on_close(journal, record, sync=False):
+        if record["type"] == "segment_close":
+            raise OSError("crashed before the journal write")
+        append(journal, record, sync)
+    monkeypatch.setattr(SessionJournal, "append", crash_on_close)
+    record_session(engine)
+    frames = engine.counters().frames
+    monkeypatch.setattr(SessionJournal, "append", append)
+
+    [master] = make_engine().recover_unfinished_sessions()
+    with open_frame_source(master) as source:
+        assert len(source) == frames
@@ -0,0 +1,60 @@
+import zipfile
+from datetime import datetime, timedelta
+
+import pytest
+
+from catalog import FrameCatalog
+from reencode import BatchReencoder, make_target, readme_frame_count, reencode_archive, span_counts, timeline_spans
+from test_retention import START, write_master
+
+
+def test_timeline_spans_and_counts():
+    at = lambda seconds: START + timedelta(seconds=seconds)
+    timeline = [("Session Start", at(0), ""), ("Pause", at(10), ""), ("Resume", at(20), ""), ("Session Stop", at(30), "")]
+    spans = timeline_spans(timeline)
+    assert spans == [(at(0), at(10)), (at(20), at(30))]
+    assert span_counts([at(0), at(10), at(15), at(20), at(31)], spans) == [2, 1, 2]
+    assert timeline_spans(timeline[:1]) == [(at(0), datetime.max)] # Never stopped
+    assert span_counts([], []) == [0]
+
+
+def test_readme_frame_count():
+    assert readme_frame_count("Frames Kept: 12\nBurst Frames: 3\n") == 15
+    assert readme_frame_count("Frames Kept: 12\n") == 12
+    assert readme_frame_count("") is None
+
+
+def test_unknown_format_is_rejected():
+    with pytest.raises(ValueError):
+        make_target("gif")
+
+
+def test_reencode_archive_round_trip(tmp_path):
+    path = write_master(tmp_path / "MASTER_a.zip", frames=5)
+    with FrameCatalog(path) as catalog:
+        before = catalog.image(4).getpixel((0, 0))
+    target = make_target("png", max_size=(8, 8))
+    result = reencode_archive(path, target)
+    assert (result["frames"], result["skipped"], result["warning"]) == (5, None, None)
+
+    with FrameCatalog(path) as catalog, zipfile.ZipFile(path) as zipf:
+        assert len(catalog) == 5
+        assert [catalog.record(i).hash for i in range(5)] == list(range(5))
+        assert catalog.image(4).size == (8, 4)
+        assert catalog.image(4).getpixel((0, 0)) == before # PNG is lossless
+        assert all(name.endswith(".png") for name in zipf.namelist() if name.startswith("segments/") and "/ss_" in name)
+    assert reencode_archive(path, target)["skipped"] == "already re-encoded"
+
+
+def test_reencode_archive_without_frames(tmp_path):
+    path = write_master(tmp_path / "MASTER_a.zip", frames=0)
+    assert reencode_archive(path, make_target())["skipped"] == "no frames"
+
+
+def test_batch_reencoder_skips_finished_archives(tmp_path):
+    write_master(tmp_path / "MASTER_a.zip", frames=3)
+    (tmp_path / "sub").mkdir()
+    write_master(tmp_path / "sub" / "MASTER_b.zip", frames=2)
+    reencoder = BatchReencoder(str(tmp_path), make_target("png"), workers=1)
+    assert sorted(result["frames"] for result in reencoder.run()) == [2, 3]
+    assert reencoder.failed == [] and reencoder.pending() == []
@@ -0,0 +1,76 @@
+import json
+import os
+import zipfile
+from datetime import datetime, timedelta
+
+from PIL import Image
+
+from catalog import KIND_STILL, FrameRecord, open_frame_source, write_stills
+from frames import encode_webp
+from retention import TIER_FULL, TIER_INDEX, TIER_REDUCED, RetentionManager, RetentionPolicy, archive_tier, compact_archive
+
+START = datetime(2025, 1, 1, 12, 0, 0)
+
+
+def write_master(path, frames=12, seconds_apart=10, end=None, session=None, comment=""):
+    """A flat master archive with frames stills of one monitor and a manifest whose timeline ends at end."""
+    end = end or START + timedelta(seconds=frames * seconds_apart)
+    records = [(FrameRecord(START + timedelta(seconds=n * seconds_apart), 0, 0, 0, 0, KIND_STILL, n), Image.new('L', (16, 8), n))
+               for n in range(frames)]
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as zipf:
+        zipf.writestr("readme.txt", "readme")
+        segments = write_stills(zipf, ["segment"], records, lambda img: encode_webp(img, 80))
+        timeline = [{"event": "Session Start", "time": START.isoformat(), "comment": comment},
+                    {"event": "Session Stop", "time": end.isoformat(), "comment": ""}]
+        zipf.writestr("manifest.json", json.dumps({"version": 1, "layout": "flat", "session": session or {}, "timeline": timeline,
+                                                   "segments": segments}))
+    return str(path)
+
+
+def test_tier_boundaries():
+    policy = RetentionPolicy(full_days=7, reduced_days=30)
+    assert policy.tier_for_age(timedelta(days=7) - timedelta(seconds=1)) == TIER_FULL
+    assert policy.tier_for_age(timedelta(days=7)) == TIER_REDUCED
+    assert policy.tier_for_age(timedelta(days=30)) == TIER_INDEX
+    assert RetentionPolicy(full_days=10, reduced_days=5).tier_for_age(timedelta(days=9)) == TIER_FULL
+
+
+def test_compact_to_reduced_keeps_one_frame_per_interval(tmp_path):
+    path = write_master(tmp_path / "MASTER_a.zip") # Frames at 0, 10, ..., 110 seconds
+    mtime = os.path.getmtime(path)
+    entry = compact_archive(path, TIER_REDUCED, RetentionPolicy(reduced_interval=60))
+
+    assert (entry["from"], entry["to"], entry["frames_before"], entry["frames_after"]) == (TIER_FULL, TIER_REDUCED, 12, 2)
+    assert archive_tier(path) == TIER_REDUCED
+    assert os.path.getmtime(path) == mtime
+    with open_frame_source(path) as source:
+        assert [source.record(i).hash for i in range(len(source))] == [0, 6]
+        assert source.image(1).getpixel((0, 0)) in range(4, 9) # Lossy, but still the frame that was kept
+
+
+def test_compact_to_index_drops_every_frame(tmp_path):
+    path = write_master(tmp_path / "MASTER_a.zip")
+    entry = compact_archive(path, TIER_INDEX, RetentionPolicy())
+    assert entry["frames_after"] == 0
+    with zipfile.ZipFile(path) as zipf:
+        assert sorted(zipf.namelist()) == ["manifest.json", "readme.txt"]
+
+
+def test_manager_compacts_by_age_and_budget(tmp_path):
+    old = write_master(tmp_path / "MASTER_old.zip")
+    new = write_master(tmp_path / "MASTER_new.zip", end=START + timedelta(days=10))
+    manager = RetentionManager([str(tmp_path)], RetentionPolicy(full_days=7, reduced_days=30))
+    now = START + timedelta(days=12)
+    assert manager.plan(now) == [(old, TIER_REDUCED)]
+    manager.run(now)
+    assert (archive_tier(old), archive_tier(new)) == (TIER_REDUCED, TIER_FULL)
+
+    manager.policy.budget_bytes = 1 # Nothing fits: everything ends up in the index tier
+    manager.run(now)
+    assert (archive_tier(old), archive_tier(new)) == (TIER_INDEX, TIER_INDEX)
+
+
+def test_manager_without_archives(tmp_path):
+    manager = RetentionManager([str(tmp_path), str(tmp_path / "missing")], RetentionPolicy(budget_mb=1))
+    assert manager.archives() == []
+    assert manager.run() == []
@@ -0,0 +1,59 @@
+import threading
+
+from scheduler import CaptureScheduler
+
+
+def due_now():
+    """A set stop event: wait() then returns at once, True only if the deadline has come."""
+    stop = threading.Event()
+    stop.set()
+    return stop
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_wake_up_during_a_tick_is_not_lost():
+    clock = FakeClock()
+    scheduler = CaptureScheduler(10.0, clock=clock)
+    stop = due_now()
+    assert scheduler.wait(stop) # First tick at 0
+
+    clock.now = 1.0
+    scheduler.bring_forward(0.5) # Input while the tick is being handled
+    scheduler.advance()
+    clock.now = 1.5
+    assert scheduler.wait(stop) # Due at 1.5, not at the grid point 10
+
+
+def test_bring_forward_never_moves_the_deadline_back():
+    clock = FakeClock()
+    scheduler = CaptureScheduler(1.0, clock=clock)
+    stop = due_now()
+    assert scheduler.wait(stop)
+    scheduler.advance()
+    scheduler.bring_forward(5.0) # Later than the next deadline at 1
+    clock.now = 1.0
+    assert scheduler.wait(stop)
+    assert scheduler.jitter_stats()[2] == 0.0
+
+
+def test_catch_up_counts_one_overrun_per_backlog():
+    clock = FakeClock()
+    scheduler = CaptureScheduler(1.0, "catch-up", clock=clock)
+    stop = due_now()
+    assert scheduler.wait(stop)
+    clock.now = 3.5 # The tick ran past the deadlines at 1, 2 and 3
+    scheduler.advance()
+    while scheduler.wait(stop): # The missed ticks fire back-to-back
+        scheduler.advance()
+    assert (scheduler.ticks, scheduler.overruns, scheduler.missed) == (4, 1, 0)
+
+    clock.now = 5.5 # A new overrun: the deadlines at 4 and 5 passed
+    scheduler.advance()
+    assert scheduler.overruns == 2
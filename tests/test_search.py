@@ -0,0 +1,55 @@
+import os
+
+import search
+from search import SearchIndex, frame_hash
+from test_retention import START, write_master
+
+
+def indexed_archives(tmp_path):
+    """A search index over two master archives with different tickets, comments and screens."""
+    first = write_master(tmp_path / "MASTER_first.zip", frames=3, session={"name": "Ada", "ticket_id": "ABC-123"},
+                         comment="printer driver crash")
+    second = write_master(tmp_path / "MASTER_second.zip", frames=3, session={"name": "Bob", "ticket_id": "XYZ-9"},
+                          comment="see ABC-123 for the driver")
+    index = SearchIndex(str(tmp_path / "search.db"))
+    assert sorted(index.update([str(tmp_path)], workers=1)) == sorted(map(os.path.abspath, (first, second)))
+    return index, os.path.abspath(first), os.path.abspath(second)
+
+
+def test_ticket_and_text_search(tmp_path):
+    index, first, second = indexed_archives(tmp_path)
+    with index:
+        assert sorted(session.path for session in index.ticket("abc-123")) == [first, second] # By ID and by comment
+        assert [session.path for session in index.ticket("XYZ-9")] == [second]
+        assert [hit.path for hit in index.search("printer crash")] == [first]
+        assert index.search("nothing like this") == []
+        assert index.ticket("NOPE-1") == []
+
+
+def test_similar_screens(tmp_path, monkeypatch):
+    index, first, second = indexed_archives(tmp_path)
+    with index:
+        query = frame_hash(first, START)
+        hits = index.similar(query, max_distance=0)
+        assert sorted(hit.path for hit in hits) == [first, second] # Both show the same plain screens
+        assert all(hit.distance == 0 and hit.first_seen == START for hit in hits)
+        monkeypatch.setattr(search, "np", None) # The pure Python fallback finds the same
+        index._hashes = None
+        assert index.similar(query, max_distance=0) == hits
+
+
+def test_update_only_rescans_changes(tmp_path):
+    index, first, second = indexed_archives(tmp_path)
+    with index:
+        assert index.update([str(tmp_path)], workers=1) == []
+        os.remove(second)
+        assert index.update([str(tmp_path)], workers=1) == []
+        assert [session.path for session in index.sessions()] == [first]
+
+
+def test_empty_index(tmp_path):
+    with SearchIndex(str(tmp_path / "search.db")) as index:
+        assert index.update([str(tmp_path)]) == []
+        assert index.sessions() == []
+        assert index.similar(0) == []
+        assert index.search("anything") == []
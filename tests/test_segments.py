@@ -0,0 +1,80 @@
+import shutil
+import zipfile
+import zlib
+from datetime import datetime
+
+import segments
+from segments import SegmentWriter, copy_entry_raw, rebuild_segment
+
+
+def journal_entries(writer):
+    """What the journal records for each frame written so far, in file order."""
+    return [{"name": info.filename, "time": datetime(2025, 1, 1, 12, 0, n).isoformat(), "offset": info.header_offset,
+             "size": info.compress_size, "file_size": info.file_size, "crc": info.CRC, "metadata": {"monitor": n}}
+            for n, info in enumerate(writer._zip.infolist())]
+
+
+def crashed_segment(tmp_path, frames=3):
+    """A segment with frames written but never closed, and the journal entries of its frames."""
+    writer = SegmentWriter(str(tmp_path / "recording.zip.part"))
+    for n in range(frames):
+        writer.add_frame(f"ss_{n}.webp", bytes([n]) * (100 + n), datetime(2025, 1, 1, 12, 0, n))
+    writer._zip.fp.flush()
+    path = str(tmp_path / "crashed.zip.part")
+    shutil.copyfile(writer.path, path) # As the file was left on disk, without a central directory
+    entries = journal_entries(writer)
+    writer.close()
+    return path, entries
+
+
+def test_rebuild_segment_with_out_of_order_journal(tmp_path):
+    path, entries = crashed_segment(tmp_path)
+    entries[1], entries[2] = entries[2], entries[1]
+
+    assert rebuild_segment(path, entries) == 3
+    with zipfile.ZipFile(path) as zipf:
+        assert zipf.testzip() is None
+        assert zipf.read("ss_2.webp") == bytes([2]) * 102
+
+
+def test_rebuild_segment_drops_frames_that_never_reached_the_disk(tmp_path):
+    path, entries = crashed_segment(tmp_path)
+    with open(path, 'r+b') as fp:
+        fp.truncate(entries[2]["offset"] + 10) # Cut off in the middle of the last frame
+
+    assert rebuild_segment(path, entries[::-1]) == 2
+    with zipfile.ZipFile(path) as zipf:
+        assert zipf.testzip() is None
+        assert sorted(zipf.namelist()) == ["frames.json", "ss_0.webp", "ss_1.webp"]
+
+
+def copy_round_trip(tmp_path):
+    """Copies a stored and a deflated entry into a new ZIP and checks them against the originals."""
+    src_path, dst_path = tmp_path / "src.zip", tmp_path / "dst.zip"
+    with zipfile.ZipFile(src_path, 'w') as zipf:
+        zipf.writestr("readme.txt", b"padding" * 10)
+        zipf.writestr("ss_stored.webp", bytes(range(256)) * 5000, zipfile.ZIP_STORED) # More than one copy chunk
+        zipf.writestr("ss_deflated.txt", b"frame " * 5000, zipfile.ZIP_DEFLATED)
+    offsets = {}
+    with zipfile.ZipFile(src_path) as src, zipfile.ZipFile(dst_path, 'w') as dst:
+        dst.writestr("first.txt", b"already here")
+        for info in src.infolist()[1:]:
+            offsets[info.filename] = copy_entry_raw(src, info, dst, "copied/" + info.filename)
+    with zipfile.ZipFile(src_path) as src, zipfile.ZipFile(dst_path) as dst, open(dst_path, 'rb') as fp:
+        assert dst.testzip() is None
+        for info in src.infolist()[1:]:
+            copied = dst.getinfo("copied/" + info.filename)
+            assert (copied.CRC, copied.compress_type, copied.file_size) == (info.CRC, info.compress_type, info.file_size)
+            assert dst.read(copied) == src.read(info)
+            fp.seek(offsets[info.filename]) # The returned offset is where the entry's data starts
+            raw = fp.read(copied.compress_size)
+            assert (zlib.decompress(raw, -15) if copied.compress_type == zipfile.ZIP_DEFLATED else raw) == src.read(info)
+
+
+def test_copy_entry_raw_round_trip(tmp_path):
+    copy_round_trip(tmp_path)
+
+
+def test_copy_entry_raw_falls_back_without_zipfile_internals(tmp_path, monkeypatch):
+    monkeypatch.setattr(segments, "_supports_raw_copy", lambda zipf: False)
+    copy_round_trip(tmp_path)
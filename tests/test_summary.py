@@ -0,0 +1,23 @@
+from summary import StubBackend, SummaryWorker, summary_path
+
+
+def test_plain_callable_backend(tmp_path):
+    master = str(tmp_path / "MASTER_2025-01-01-1200-1300.zip")
+    worker = SummaryWorker(lambda readme: f"{len(readme)} characters", str(tmp_path / "summaries"), timeout=5, retries=0)
+    worker.submit(master, "Session readme")
+    assert worker.join(10)
+    with open(summary_path(master), encoding='utf-8') as f:
+        assert f.read() == "14 characters\n"
+
+    # Anonymous callables share a qualified name, so their summaries are never cached
+    other = SummaryWorker(lambda readme: "something else", str(tmp_path / "summaries"), timeout=5, retries=0)
+    assert other.summarize("Session readme") == "something else"
+    assert worker.summarize("Session readme") == "14 characters"
+    assert worker.requests == 2
+
+
+def test_named_backend_is_cached(tmp_path):
+    backend = StubBackend()
+    worker = SummaryWorker(backend, str(tmp_path / "summaries"), timeout=5, retries=0)
+    assert worker.summarize("Session readme") == worker.summarize("Session readme") == "Stub summary: Session readme"
+    assert backend.calls == 1
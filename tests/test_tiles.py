@@ -0,0 +1,53 @@
+import pytest
+from PIL import Image, ImageChops, ImageDraw
+
+from tiles import DELTA_SUFFIX, KEYFRAME_SUFFIX, TileDecoder, TileEncoder, decode_sequence
+
+
+def frames(count, size=(103, 61)):
+    """Grayscale frames in which a box moves and a corner changes; the size doesn't divide evenly into tiles."""
+    result = []
+    for n in range(count):
+        img = Image.new('L', size, 200)
+        draw = ImageDraw.Draw(img)
+        draw.rectangle((n * 7, 10, n * 7 + 12, 30), fill=n * 20)
+        draw.point((size[0] - 1, size[1] - 1), fill=n)
+        result.append(img)
+    return result
+
+
+def test_tiles_round_trip_is_lossless():
+    encoder = TileEncoder(keyframe_interval=4)
+    images = frames(6)
+    encoded = [encoder.encode(img) for img in images]
+    assert [suffix for suffix, _ in encoded] == [KEYFRAME_SUFFIX, DELTA_SUFFIX, DELTA_SUFFIX, DELTA_SUFFIX, KEYFRAME_SUFFIX, DELTA_SUFFIX]
+    entries = [(f"ss_{n}{suffix}", data) for n, (suffix, data) in enumerate(encoded)]
+    for (_, decoded), img in zip(decode_sequence(entries), images):
+        assert ImageChops.difference(decoded, img).getbbox() is None
+
+
+def test_unchanged_frame_is_an_empty_delta():
+    encoder = TileEncoder()
+    img = frames(1)[0]
+    _, keyframe = encoder.encode(img)
+    suffix, data = encoder.encode(img.copy())
+    assert suffix == DELTA_SUFFIX
+    decoder = TileDecoder()
+    decoder.decode("ss_0" + KEYFRAME_SUFFIX, keyframe)
+    assert ImageChops.difference(decoder.decode("ss_1" + DELTA_SUFFIX, data), img).getbbox() is None
+
+
+def test_size_change_and_reset_start_a_keyframe():
+    encoder = TileEncoder()
+    encoder.encode(frames(1)[0])
+    assert encoder.next_suffix(frames(1, (50, 50))[0]) == KEYFRAME_SUFFIX
+    encoder.reset()
+    assert encoder.next_suffix(frames(1)[0]) == KEYFRAME_SUFFIX
+
+
+def test_delta_without_keyframe_is_rejected():
+    encoder = TileEncoder()
+    encoder.encode(frames(1)[0])
+    _, data = encoder.encode(frames(2)[1])
+    with pytest.raises(ValueError):
+        TileDecoder().decode("ss_1" + DELTA_SUFFIX, data)